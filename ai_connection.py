@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog AI连接测试
+在后台线程池中执行连接测试并限定最长等待时间，慢的AI服务不会拖住请求线程。
+测试结果按 (base_url, 模型, API密钥指纹) 短时间缓存，OpenAI 客户端在多次调用间复用，
+重复点击"测试连接"不会再次请求AI服务。
+
+设置环境变量 QUIRKLOG_AI_TEST_TIMEOUT 可修改默认的超时秒数。
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+# 连接测试的默认超时（秒）
+DEFAULT_TEST_TIMEOUT = 15.0
+
+# 成功结果与失败结果的缓存时间（秒），失败结果缓存较短，方便修正配置后重试
+RESULT_TTL = 60.0
+FAILURE_TTL = 10.0
+
+# 后台测试线程数与复用的客户端数量上限
+TEST_WORKERS = 4
+MAX_CLIENTS = 8
+
+# 测试请求的附加请求头
+EXTRA_HEADERS = {
+    "HTTP-Referer": "https://quirklog.app",
+    "X-Title": "QuirkLog Daily Planner",
+}
+
+
+def timeout_from_env():
+    """读取 QUIRKLOG_AI_TEST_TIMEOUT 环境变量，无效时使用默认值"""
+    try:
+        value = float(os.environ.get('QUIRKLOG_AI_TEST_TIMEOUT', DEFAULT_TEST_TIMEOUT))
+    except ValueError:
+        return DEFAULT_TEST_TIMEOUT
+    return value if value > 0 else DEFAULT_TEST_TIMEOUT
+
+
+def key_fingerprint(api_key):
+    """API密钥的指纹（不在内存缓存的键中保存明文密钥）"""
+    return hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]
+
+
+def describe_error(error):
+    """把连接异常转换为用户可读的提示"""
+    error_msg = str(error)
+    if "401" in error_msg or "Unauthorized" in error_msg:
+        return "API密钥无效或已过期"
+    elif "404" in error_msg or "Not Found" in error_msg:
+        return "API服务地址无效或模型不存在"
+    elif "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
+        return "连接超时，请检查网络"
+    else:
+        return f"连接失败: {error_msg}"
+
+
+class ConnectionTester:
+    """带超时、结果缓存和客户端复用的AI连接测试器
+
+    Args:
+        timeout: 默认的等待上限（秒），超时后立即返回，后台测试完成时结果仍会写入缓存
+        probe: 实际执行测试的函数 probe(api_key, base_url, model, timeout) -> (成功, 消息)，
+               默认通过 OpenAI 客户端发送一条最小的对话请求
+    """
+
+    def __init__(self, timeout=None, result_ttl=RESULT_TTL, failure_ttl=FAILURE_TTL,
+                 workers=TEST_WORKERS, probe=None):
+        self.timeout = timeout or timeout_from_env()
+        self.result_ttl = result_ttl
+        self.failure_ttl = failure_ttl
+        self.workers = workers
+        self.probe = probe or self.openai_probe
+        self._lock = threading.Lock()
+        self._executor = None
+        self._results = {}
+        self._pending = {}
+        self._clients = OrderedDict()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='quirklog-ai-test')
+            return self._executor
+
+    def test(self, api_key, base_url, model, timeout=None):
+        """测试连接，返回 (是否成功, 消息)
+
+        相同配置的测试在缓存有效期内直接返回上次结果；正在进行中的测试会被复用，
+        不会重复发起请求。
+        """
+        timeout = timeout or self.timeout
+        key = (base_url, model, key_fingerprint(api_key))
+
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+            future = self._pending.get(key)
+        if future is None:
+            future = self._submit(key, api_key, base_url, model, timeout)
+
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            return False, f"连接超时（{timeout:g} 秒内未响应），请检查网络或稍后重试"
+
+    def _submit(self, key, api_key, base_url, model, timeout):
+        executor = self._get_executor()
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = executor.submit(self._run_probe, api_key, base_url, model, timeout)
+            self._pending[key] = future
+
+        def done(finished):
+            with self._lock:
+                self._pending.pop(key, None)
+                try:
+                    result = finished.result()
+                except Exception as e:
+                    result = (False, describe_error(e))
+                ttl = self.result_ttl if result[0] else self.failure_ttl
+                self._results[key] = (time.monotonic() + ttl, result)
+
+        future.add_done_callback(done)
+        return future
+
+    def _run_probe(self, api_key, base_url, model, timeout):
+        try:
+            return self.probe(api_key, base_url, model, timeout)
+        except Exception as e:
+            return False, describe_error(e)
+
+    def clear(self):
+        """清空结果缓存和复用的客户端"""
+        with self._lock:
+            self._results.clear()
+            self._clients.clear()
+
+    # ---- OpenAI ----
+
+    def get_client(self, api_key, base_url, timeout):
+        """返回复用的 OpenAI 客户端（按 base_url 和密钥指纹区分）"""
+        key = (base_url, key_fingerprint(api_key), timeout)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                return client
+
+        from openai import OpenAI
+
+        # 客户端自身的超时与测试期限一致且不重试，超时后后台线程也会尽快结束
+        client = OpenAI(base_url=base_url, api_key=api_key, timeout=timeout, max_retries=0)
+        with self._lock:
+            self._clients[key] = client
+            while len(self._clients) > MAX_CLIENTS:
+                self._clients.popitem(last=False)
+        return client
+
+    def openai_probe(self, api_key, base_url, model, timeout):
+        """通过 OpenAI 兼容接口发送一条最小的测试请求"""
+        try:
+            client = self.get_client(api_key, base_url, timeout)
+        except ImportError:
+            return False, "未安装openai库，请运行: pip install openai"
+
+        completion = client.chat.completions.create(
+            extra_headers=EXTRA_HEADERS,
+            model=model,
+            messages=[
+                {
+                    "role": "user",
+                    "content": "Hello! This is a connection test."
+                }
+            ],
+            max_tokens=10  # 限制token数量，减少费用
+        )
+
+        if completion.choices and completion.choices[0].message:
+            return True, f"API连接测试成功！使用模型: {model}"
+        return False, "API返回了空响应"
+
+
+# 进程级测试器
+tester = ConnectionTester()
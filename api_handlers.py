@@ -0,0 +1,699 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog API 处理逻辑
+与具体的服务器实现无关：线程版 web_server.SettingsHandler 和 asyncio 版
+async_server 都通过 dispatch() 调用这里的函数，保证两者的路由和行为一致。
+路由表见文件末尾的 ROUTES，请求体解码、参数解析和异常处理由 api_router 的中间件完成。
+"""
+
+import os
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import ai_connection
+import change_log
+import export_records
+import live_events
+import month_archive
+import process_lock
+import record_store
+import search_index
+import server_metrics
+import settings_store
+from api_router import ApiResponse, Route, Router, error_response
+
+
+# 批量加载接口一次最多返回的天数，以及读取文件的线程数
+MAX_BATCH_DAYS = 366
+BATCH_READ_WORKERS = 8
+
+# 同步接口一次最多接受的客户端变更数
+MAX_SYNC_CHANGES = 50
+
+# 默认的AI模型
+DEFAULT_AI_MODEL = 'deepseek/deepseek-r1-0528-qwen3-8b:free'
+
+# 读取记录文件的共享线程池（首次使用时创建）
+_io_executor = None
+_io_executor_lock = threading.Lock()
+
+
+def get_io_executor():
+    """返回用于磁盘读取的共享线程池"""
+    global _io_executor
+    with _io_executor_lock:
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(
+                max_workers=BATCH_READ_WORKERS, thread_name_prefix='quirklog-io')
+        return _io_executor
+
+
+def load_settings():
+    """读取当前设置（进程级缓存的只读快照）"""
+    return settings_store.load_settings()
+
+
+def current_store():
+    """返回当前设置对应的存储"""
+    return record_store.store_from_settings(load_settings())
+
+
+def _single(query, name):
+    """读取单值查询参数，空值视为未提供"""
+    values = query.get(name)
+    return values[-1].strip() if values and values[-1].strip() else None
+
+
+def _date_options(query, names=(('from', 'date_from'), ('to', 'date_to'))):
+    """解析并校验日期类查询参数"""
+    options = {}
+    for name, key in names:
+        value = _single(query, name)
+        if value is not None:
+            datetime.strptime(value, '%Y-%m-%d')
+            options[key] = value
+    return options
+
+
+def _limit_option(query, options):
+    limit = _single(query, 'limit')
+    if limit is not None:
+        options['limit'] = int(limit)
+        if options['limit'] < 1:
+            raise ValueError("limit 必须大于0")
+    return options
+
+
+# ---- 设置 ----
+
+def save_settings(request):
+    """保存设置"""
+    settings_data = request.json
+    storage_engine = settings_data.get('storageEngine') if isinstance(settings_data, dict) else None
+    if storage_engine:
+        try:
+            record_store.check_engine(storage_engine)
+        except ValueError as e:
+            return error_response(f"保存设置失败: {e}", status=400)
+    update_settings_xml(settings_data)
+    live_events.publish(live_events.SETTINGS_CHANGED, public_settings(load_settings()))
+    return {"status": "success", "message": "设置保存成功！"}
+
+
+def public_settings(settings):
+    """可以广播给所有客户端的设置项（不含API密钥）"""
+    return {key: value for key, value in settings.items() if key != 'openrouterApiKey'}
+
+
+# ---- 每日记录 ----
+
+def save_daily_record(request):
+    """保存日记记录"""
+    record_data = request.json
+    date = record_data.get('date', '') if isinstance(record_data, dict) else ''
+    try:
+        record_store.validate_date(date)
+    except ValueError as e:
+        return error_response(f"保存日记失败: {e}", status=400)
+
+    # 获取当前设置对应的存储
+    store = current_store()
+    file_path = _save_record(store, date, record_data)
+
+    return {
+        "status": "success",
+        "message": f"文件已保存到: {file_path}",
+        "filePath": file_path
+    }
+
+
+def _save_record(store, date, record_data):
+    """保存记录并更新搜索索引、变更日志，通知实时事件订阅者，返回保存位置"""
+    # 日期无效时不能保存：按空日期查询会返回全部记录，事件和变更日志都会指向无关的记录
+    record_store.validate_date(date)
+
+    # 多进程模式下，保存与索引、变更日志的更新作为一个整体在进程间互斥；
+    # 先创建保存目录，锁文件才能放在其中（目录不存在时加锁只在进程内互斥）
+    os.makedirs(store.save_directory, exist_ok=True)
+    with process_lock.get_lock(store.save_directory):
+        # 保存记录（JSON存储同时增量更新历史索引）
+        file_path = store.save(date, record_data)
+
+        # 增量更新搜索索引和变更日志（失败不影响保存结果）
+        try:
+            search_index.get_search_index(store).record_saved(date, record_data)
+        except Exception as e:
+            print(f"⚠️ 更新搜索索引失败: {e}")
+        try:
+            change_log.get_change_log(store).record_saved(date)
+        except Exception as e:
+            print(f"⚠️ 更新变更日志失败: {e}")
+
+    # 通知订阅了实时事件的客户端（内容与历史列表中的条目一致）
+    entries, _, _ = store.query(date, date)
+    if entries:
+        live_events.publish(live_events.RECORD_SAVED, entries[0])
+
+    # 开启月度归档时，在后台打包已结束的月份
+    compression = month_archive.compression_setting(load_settings().get('archiveMonths'))
+    if compression and hasattr(store, 'maybe_pack'):
+        store.maybe_pack(compression)
+
+    return file_path
+
+
+def get_history_files(request):
+    """获取历史文件列表
+
+    支持的查询参数:
+        from / to: 日期范围（含），YYYY-MM-DD
+        limit: 每页条目数
+        cursor: 上一页返回的 nextCursor
+        fields: 逗号分隔的返回字段，如 date,filename
+    """
+    settings = load_settings()
+    save_directory = settings.get('saveDirectory', './downloads')
+
+    # 从存储读取请求的分页（已按日期倒序，目录不存在时为空列表）
+    store = record_store.store_from_settings(settings)
+    json_files, next_cursor, total = store.query(**request.options)
+
+    return {
+        "status": "success",
+        "files": json_files,
+        "total": total,
+        "nextCursor": next_cursor,
+        "saveDirectory": save_directory
+    }
+
+
+def parse_history_query(query):
+    """将历史列表的查询参数转换为索引查询选项"""
+    options = _date_options(query, (('from', 'date_from'), ('to', 'date_to'),
+                                    ('cursor', 'cursor')))
+    _limit_option(query, options)
+
+    fields = _single(query, 'fields')
+    if fields is not None:
+        options['fields'] = [field.strip() for field in fields.split(',') if field.strip()]
+
+    return options
+
+
+def load_record(request):
+    """加载指定日期的记录"""
+    date = request.params['date']
+    store = current_store()
+    record_data = store.load(date)
+
+    if record_data is None:
+        return error_response(f"文件不存在: {store.location(date)}")
+
+    return {
+        "status": "success",
+        "data": record_data,
+        "filePath": store.location(date)
+    }
+
+
+def load_records(request):
+    """批量加载多天的记录
+
+    支持的查询参数:
+        from / to: 日期范围（含），YYYY-MM-DD
+        dates: 逗号分隔的日期列表
+    缺失或读取失败的日期在结果中逐条标注，不影响其他日期。
+    """
+    store = current_store()
+
+    # 并发读取各日期的记录
+    def load_one(date):
+        try:
+            record_data = store.load(date)
+        except Exception as e:
+            return {"date": date, "status": "error", "message": str(e)}
+        if record_data is None:
+            return {"date": date, "status": "missing"}
+        return {
+            "date": date,
+            "status": "success",
+            "data": record_data,
+            "filePath": store.location(date)
+        }
+
+    records = list(get_io_executor().map(load_one, request.options['dates']))
+
+    return {
+        "status": "success",
+        "records": records,
+        "found": sum(1 for record in records if record["status"] == "success"),
+        "missing": [record["date"] for record in records
+                    if record["status"] == "missing"]
+    }
+
+
+def parse_batch_query(query):
+    """批量加载的查询选项"""
+    return {'dates': parse_batch_dates(query)}
+
+
+def parse_batch_dates(query):
+    """将批量加载的查询参数展开为日期列表（升序、去重）"""
+    dates = set()
+
+    for values in query.get('dates', []):
+        for value in values.split(','):
+            if value.strip():
+                dates.add(datetime.strptime(value.strip(), '%Y-%m-%d').date())
+
+    date_from = query.get('from', [''])[-1].strip()
+    date_to = query.get('to', [''])[-1].strip()
+    if date_from or date_to:
+        if not (date_from and date_to):
+            raise ValueError("from 和 to 需要同时提供")
+        start = datetime.strptime(date_from, '%Y-%m-%d').date()
+        end = datetime.strptime(date_to, '%Y-%m-%d').date()
+        if end < start:
+            raise ValueError("to 不能早于 from")
+        if (end - start).days >= MAX_BATCH_DAYS:
+            raise ValueError(f"日期范围不能超过 {MAX_BATCH_DAYS} 天")
+        dates.update(start + timedelta(days=i) for i in range((end - start).days + 1))
+
+    if not dates:
+        raise ValueError("需要提供 dates 或 from/to")
+    if len(dates) > MAX_BATCH_DAYS:
+        raise ValueError(f"一次最多加载 {MAX_BATCH_DAYS} 天")
+
+    return [date.strftime('%Y-%m-%d') for date in sorted(dates)]
+
+
+# ---- 增量同步 ----
+
+def sync(request):
+    """增量同步：上传客户端的变更，并返回指定版本之后服务器上变化的记录
+
+    支持的查询参数:
+        since: 客户端上次同步到的版本号（默认0，即全量）
+        logId: 上次同步时服务器返回的日志ID，与当前日志不一致时按全量同步
+        records: true 时在变化条目中附带记录内容（默认只返回列表条目）
+    POST 请求体: {"changes": [{"date": "YYYY-MM-DD", "baseVersion": 3, "record": {...}}]}
+        baseVersion 为客户端修改前看到的该日期版本；服务器上的版本更新时
+        不覆盖，该日期列入 conflicts。已应用的变更列入 applied，
+        它们的新条目与其他变化一起在 changes 中返回。
+    """
+    store = current_store()
+    log = change_log.get_change_log(store)
+    options = request.options
+
+    applied, conflicts = {}, []
+    for change in parse_sync_changes(request.json):
+        date = change['date']
+        with log.lock:
+            current = log.version_of(date)
+            if current > change['baseVersion']:
+                conflicts.append({"date": date, "version": current})
+                continue
+            _save_record(store, date, change['record'])
+            applied[date] = log.version_of(date)
+
+    # 日志ID不一致（日志重建或切换了保存目录）或版本超前时按全量同步
+    since = options['since']
+    if since and (options['log_id'] != log.log_id or since > log.version):
+        since = 0
+    items, version = log.changes_since(since)
+
+    changes = []
+    for item in items:
+        date = item['date']
+        if item.get('deleted'):
+            # 全量同步时客户端会丢弃本地列表，不需要删除标记
+            if since:
+                changes.append({"date": date, "version": item['version'], "deleted": True})
+            continue
+        entries, _, _ = store.query(date, date)
+        if not entries:
+            continue
+        entry = dict(entries[0], version=item['version'])
+        if options['records']:
+            entry['data'] = store.load(date)
+        changes.append(entry)
+
+    return {
+        "status": "success",
+        "logId": log.log_id,
+        "version": version,
+        "reset": since == 0,
+        "changes": changes,
+        "applied": [{"date": date, "version": version} for date, version in applied.items()],
+        "conflicts": conflicts
+    }
+
+
+def parse_sync_query(query):
+    """同步接口的查询选项"""
+    since = int(_single(query, 'since') or 0)
+    if since < 0:
+        raise ValueError("since 不能小于0")
+    records = (_single(query, 'records') or 'false').lower()
+    if records not in ('true', 'false'):
+        raise ValueError("records 只能为 true 或 false")
+    return {'since': since, 'log_id': _single(query, 'logId'), 'records': records == 'true'}
+
+
+def parse_sync_changes(body):
+    """校验客户端上传的变更（全部有效才会应用），GET 请求没有请求体时返回空列表"""
+    if body is None:
+        return []
+    changes = body.get('changes', []) if isinstance(body, dict) else None
+    if not isinstance(changes, list):
+        raise ValueError("changes 必须是数组")
+    if len(changes) > MAX_SYNC_CHANGES:
+        raise ValueError(f"一次最多同步 {MAX_SYNC_CHANGES} 条变更")
+
+    parsed = []
+    for change in changes:
+        record = change.get('record') if isinstance(change, dict) else None
+        if not isinstance(record, dict):
+            raise ValueError("每条变更都需要 record 对象")
+        date = record_store.validate_date(change.get('date') or record.get('date') or '')
+        if record.get('date', date) != date:
+            raise ValueError(f"记录日期与变更日期不一致: {date}")
+        base_version = int(change.get('baseVersion') or 0)
+        parsed.append({'date': date, 'baseVersion': base_version, 'record': dict(record, date=date)})
+    return parsed
+
+
+# ---- 查询与导出 ----
+
+def query_plans(request):
+    """按条件查询计划
+
+    支持的查询参数:
+        from / to: 日期范围（含），YYYY-MM-DD
+        completed: true / false
+        importance / urgency: 逗号分隔的取值，如 十分重要,重要
+        limit: 最多返回的计划数
+    SQLite存储走索引查询，其他存储逐天读取记录后筛选。
+    """
+    plans = current_store().query_plans(**request.options)
+    return {
+        "status": "success",
+        "plans": plans,
+        "total": len(plans)
+    }
+
+
+def parse_plan_query(query):
+    """将计划查询参数转换为存储查询选项"""
+    options = _date_options(query)
+
+    completed = _single(query, 'completed')
+    if completed is not None:
+        if completed.lower() not in ('true', 'false'):
+            raise ValueError("completed 只能为 true 或 false")
+        options['completed'] = completed.lower() == 'true'
+
+    for name in ('importance', 'urgency'):
+        value = _single(query, name)
+        if value is not None:
+            options[name] = [item.strip() for item in value.split(',') if item.strip()]
+
+    return _limit_option(query, options)
+
+
+def search(request):
+    """全文搜索计划和反思内容
+
+    支持的查询参数:
+        q: 搜索词（中文按字序匹配，多个词用空格分隔）
+        from / to: 日期范围（含），YYYY-MM-DD
+        limit: 最多返回的记录数
+    """
+    options = dict(request.options)
+    text = options.pop('text')
+    results, total = search_index.get_search_index(current_store()).search(text, **options)
+    return {
+        "status": "success",
+        "query": text,
+        "results": results,
+        "total": total
+    }
+
+
+def parse_search_query(query):
+    """将搜索参数转换为搜索选项（搜索词存于 text）"""
+    text = _single(query, 'q')
+    if text is None:
+        raise ValueError("缺少搜索词 q")
+    options = _date_options(query)
+    limit = int(_single(query, 'limit') or search_index.DEFAULT_RESULT_LIMIT)
+    if limit < 1:
+        raise ValueError("limit 必须大于0")
+    options['limit'] = min(limit, search_index.MAX_RESULT_LIMIT)
+    options['text'] = text
+    return options
+
+
+def export(request):
+    """流式导出全部记录
+
+    支持的查询参数:
+        format: ndjson（默认）或 csv
+        from / to: 日期范围（含），YYYY-MM-DD
+    """
+    options = dict(request.options)
+    export_format = options.pop('format')
+    return ApiResponse(
+        stream=export_records.iter_export(current_store(), export_format, **options),
+        content_type=export_records.EXPORT_FORMATS[export_format][0],
+        filename=export_records.export_filename(export_format, **options)
+    )
+
+
+def parse_export_query(query):
+    """将导出参数转换为导出选项（格式存于 format）"""
+    export_format = _single(query, 'format') or 'ndjson'
+    options = _date_options(query)
+    if export_format not in export_records.EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {export_format}")
+    options['format'] = export_format
+    return options
+
+
+# ---- AI ----
+
+def test_ai_connection(request):
+    """测试AI连接，服务器未提供 ai_tester 时使用 test_openrouter_connection"""
+    test_data = request.json
+    api_key = test_data.get('apiKey', '')
+    base_url = test_data.get('baseUrl', 'https://openrouter.ai/api/v1')
+    model = test_data.get('model', DEFAULT_AI_MODEL)
+
+    tester = request.ai_tester or test_openrouter_connection
+    success, message = tester(api_key, base_url, model)
+    return {"status": "success" if success else "error", "message": message}
+
+
+def test_openrouter_connection(api_key, base_url, model=None):
+    """测试OpenRouter API连接（后台执行、限时等待，结果短时间缓存）"""
+    return ai_connection.tester.test(api_key, base_url, model or DEFAULT_AI_MODEL)
+
+
+# ---- settings.xml ----
+
+def update_settings_xml(settings_data):
+    """更新settings.xml文件"""
+    with settings_store.settings_cache.write_lock:
+        _update_settings_xml(settings_data)
+
+
+def _update_settings_xml(settings_data):
+    """更新settings.xml文件（调用方需持有写锁）"""
+    xml_file = settings_store.settings_path()
+
+    # 如果XML文件不存在，创建一个默认的
+    if not xml_file.exists():
+        create_default_settings_xml()
+
+    # 解析现有XML
+    tree = ET.parse(xml_file)
+    root = tree.getroot()
+
+    # 更新基础设置值
+    general = root.find('general')
+    if general is not None:
+        save_dir = general.find('saveDirectory')
+        if save_dir is not None:
+            save_dir.text = settings_data.get('saveDirectory', './downloads')
+
+        auto_save = general.find('autoSave')
+        if auto_save is not None:
+            auto_save.text = str(settings_data.get('autoSave', True)).lower()
+
+        # 存储引擎（仅在提供时更新）
+        storage_engine = settings_data.get('storageEngine')
+        if storage_engine:
+            record_store.check_engine(storage_engine)
+            engine_elem = general.find('storageEngine')
+            if engine_elem is None:
+                engine_elem = ET.SubElement(general, 'storageEngine')
+            engine_elem.text = storage_engine
+
+    export_section = root.find('export')
+    if export_section is not None:
+        file_naming = export_section.find('fileNaming')
+        if file_naming is not None:
+            file_naming.text = settings_data.get('fileNaming', '每日记录_{date}')
+
+    # 更新或创建AI设置
+    ai_section = root.find('ai')
+    if ai_section is None:
+        ai_section = ET.SubElement(root, 'ai')
+
+    # 更新AI enabled设置
+    enabled_elem = ai_section.find('enabled')
+    if enabled_elem is None:
+        enabled_elem = ET.SubElement(ai_section, 'enabled')
+    enabled_elem.text = str(settings_data.get('aiEnabled', False)).lower()
+
+    # 更新API密钥（仅在提供时保存）
+    api_key = settings_data.get('openrouterApiKey', '')
+    if api_key:  # 只有在提供了API密钥时才保存
+        api_key_elem = ai_section.find('openrouterApiKey')
+        if api_key_elem is None:
+            api_key_elem = ET.SubElement(ai_section, 'openrouterApiKey')
+        api_key_elem.text = api_key
+
+    # 更新Base URL
+    base_url_elem = ai_section.find('openrouterBaseUrl')
+    if base_url_elem is None:
+        base_url_elem = ET.SubElement(ai_section, 'openrouterBaseUrl')
+    base_url_elem.text = settings_data.get('openrouterBaseUrl', 'https://openrouter.ai/api/v1')
+
+    # 更新模型
+    model_elem = ai_section.find('openrouterModel')
+    if model_elem is None:
+        model_elem = ET.SubElement(ai_section, 'openrouterModel')
+    model_elem.text = settings_data.get('openrouterModel', 'deepseek/deepseek-r1-0528-qwen3-8b:free')
+
+    # 添加更新时间
+    last_updated = root.find('lastUpdated')
+    if last_updated is None:
+        last_updated = ET.SubElement(root, 'lastUpdated')
+    last_updated.text = settings_data.get('updatedAt', '')
+
+    # 保存XML文件，并直接刷新进程级设置缓存
+    tree.write(xml_file, encoding='utf-8', xml_declaration=True)
+    settings_store.settings_cache.store(root, xml_file)
+
+
+def create_default_settings_xml():
+    """创建默认的settings.xml文件"""
+    root = ET.Element("settings")
+
+    general = ET.SubElement(root, "general")
+    ET.SubElement(general, "saveDirectory").text = "./downloads"
+    ET.SubElement(general, "autoSave").text = "true"
+    ET.SubElement(general, "dateFormat").text = "YYYY-MM-DD"
+    ET.SubElement(general, "storageEngine").text = "json"
+
+    export_section = ET.SubElement(root, "export")
+    ET.SubElement(export_section, "includeStatistics").text = "true"
+    ET.SubElement(export_section, "includeTimestamp").text = "true"
+    ET.SubElement(export_section, "fileNaming").text = "每日记录_{date}"
+
+    # 添加AI设置
+    ai_section = ET.SubElement(root, "ai")
+    ET.SubElement(ai_section, "enabled").text = "false"
+    ET.SubElement(ai_section, "openrouterApiKey").text = ""
+    ET.SubElement(ai_section, "openrouterBaseUrl").text = "https://openrouter.ai/api/v1"
+    ET.SubElement(ai_section, "openrouterModel").text = "deepseek/deepseek-r1-0528-qwen3-8b:free"
+
+    ui = ET.SubElement(root, "ui")
+    ET.SubElement(ui, "theme").text = "light"
+    ET.SubElement(ui, "language").text = "zh-CN"
+
+    tree = ET.ElementTree(root)
+    xml_file = settings_store.settings_path()
+    tree.write(xml_file, encoding='utf-8', xml_declaration=True)
+    settings_store.settings_cache.store(root, xml_file)
+
+
+def events(request):
+    """Server-Sent Events：推送记录保存、设置修改和每周洞察生成事件
+
+    断线重连时浏览器自动携带 Last-Event-ID 请求头，也可用 lastEventId 查询参数指定。
+    """
+    last_event_id = live_events.parse_last_event_id(
+        request.headers.get('Last-Event-ID') or _single(request.query, 'lastEventId'))
+    stream = live_events.bus.subscribe(last_event_id)
+    if stream is None:
+        return error_response("实时事件连接数已达上限", status=503)
+    return ApiResponse(stream=stream, content_type=live_events.EVENT_STREAM_CONTENT_TYPE,
+                       headers=[('Cache-Control', 'no-cache'), ('X-Accel-Buffering', 'no')])
+
+
+def metrics(request):
+    """以 Prometheus 文本格式导出服务器指标，统计关闭时返回None（404）"""
+    if not server_metrics.metrics.enabled:
+        return None
+    return ApiResponse(server_metrics.metrics.render().encode('utf-8'),
+                       content_type=server_metrics.PROMETHEUS_CONTENT_TYPE)
+
+
+# ---- 路由 ----
+
+ROUTES = (
+    Route('POST', '/api/save-settings', save_settings,
+          error="保存设置失败", error_status=500, json_body=True),
+    Route('POST', '/api/save-daily-record', save_daily_record,
+          error="保存日记失败", error_status=500, json_body=True),
+    Route('POST', '/api/test-ai-connection', test_ai_connection,
+          error="测试连接失败", error_status=500, json_body=True, slow=True),
+    Route('GET', '/api/history-files', get_history_files,
+          error="获取历史文件失败", query_parser=parse_history_query),
+    Route('GET', '/api/load-records', load_records,
+          error="批量加载记录失败", query_parser=parse_batch_query),
+    Route('GET', '/api/load-record/{date}', load_record, error="加载记录失败"),
+    Route('GET', '/api/plans', query_plans,
+          error="查询计划失败", query_parser=parse_plan_query),
+    Route('GET', '/api/search', search,
+          error="搜索失败", query_parser=parse_search_query),
+    Route('GET', '/api/export', export,
+          error="导出失败", query_parser=parse_export_query),
+    Route('GET', '/api/sync', sync,
+          error="同步失败", query_parser=parse_sync_query),
+    Route('POST', '/api/sync', sync,
+          error="同步失败", json_body=True, query_parser=parse_sync_query),
+    Route('GET', '/api/events', events, error="订阅实时事件失败"),
+    Route('GET', '/api/metrics', metrics, error="导出指标失败"),
+)
+
+router = Router(ROUTES)
+
+# 属于AI调用的路由（耗时长，服务器可放到独立的线程池中执行）
+SLOW_ROUTES = router.slow_paths
+
+
+def is_api_path(path):
+    return path.startswith('/api/')
+
+
+def route_label(path):
+    """把请求路径归一化为指标的路由标签（路径参数和未知路由合并，静态文件统一为 static）"""
+    if not is_api_path(path):
+        return 'static'
+    return router.label(path) or '/api/other'
+
+
+def dispatch(method, path, query_string='', body=b'', ai_tester=None, headers=None):
+    """把请求分派到对应的处理函数
+
+    Returns:
+        ApiResponse，或者 None（路由不存在）
+    """
+    return router.dispatch(method, path, query_string, body, ai_tester=ai_tester,
+                           headers=headers)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog API 路由表
+把 (方法, 路径模式) 编译成查找表，并在每个路由外层套上中间件链：
+计时、异常转错误响应、请求体大小限制、JSON解码、查询参数解析和响应编码。
+处理函数只需接收 Request 并返回字典或 ApiResponse，不再重复这些样板代码。
+
+路由查找只依赖路径深度：固定路径直接查字典，带参数的路径（如
+/api/load-record/{date}）按参数前的固定前缀查字典，与路由数量无关。
+"""
+
+import functools
+import json
+import re
+import time
+from urllib.parse import parse_qs
+
+
+# 请求体的默认大小上限（字节），路由可单独指定
+DEFAULT_MAX_BODY = 2 * 1024 * 1024
+
+PARAM_RE = re.compile(r'\{(\w+)\}')
+
+
+class ApiResponse:
+    """API处理结果：JSON数据，或者待流式发送的字节块生成器"""
+
+    def __init__(self, payload=None, status=200, stream=None,
+                 content_type='application/json', filename=None, headers=None):
+        self.payload = payload
+        self.status = status
+        self.stream = stream
+        self.content_type = content_type
+        self.filename = filename
+        self.headers = list(headers or [])
+
+    @property
+    def is_stream(self):
+        return self.stream is not None
+
+    def body(self):
+        """返回响应体（字节）：payload 已是字节时原样返回，否则编码为JSON"""
+        if isinstance(self.payload, bytes):
+            return self.payload
+        return json.dumps(self.payload, ensure_ascii=False).encode('utf-8')
+
+
+def error_response(message, status=200):
+    """构造错误响应（多数接口沿用HTTP 200 + status=error 的约定）"""
+    return ApiResponse({"status": "error", "message": message}, status=status)
+
+
+class Request:
+    """传给处理函数的请求对象"""
+
+    __slots__ = ('method', 'path', 'query_string', 'body', 'params', 'ai_tester',
+                 'headers', 'json', 'options', '_query')
+
+    def __init__(self, method, path, query_string='', body=b'', params=None, ai_tester=None,
+                 headers=None):
+        self.method = method
+        self.path = path
+        self.query_string = query_string
+        self.body = body
+        self.params = params or {}
+        self.ai_tester = ai_tester
+        self.headers = headers if headers is not None else {}
+        self.json = None
+        self.options = {}
+        self._query = None
+
+    @property
+    def query(self):
+        """解析后的查询参数（首次访问时解析）"""
+        if self._query is None:
+            self._query = parse_qs(self.query_string)
+        return self._query
+
+
+class Route:
+    """一条路由及其选项
+
+    Args:
+        method / pattern: 请求方法和路径模式，路径参数写作 {name}，须占据完整的路径段
+        handler: 处理函数，接收 Request，返回字典、ApiResponse 或 None（404）
+        error: 处理函数抛出异常时的错误消息前缀
+        error_status: 异常时的HTTP状态码（多数接口沿用200）
+        json_body: 是否把请求体解码为JSON（存入 request.json）
+        query_parser: 查询参数解析函数，结果存入 request.options，抛出 ValueError 时返回参数错误
+        max_body: 请求体大小上限
+        slow: 是否为耗时长的路由（服务器可放到独立的线程池中执行）
+    """
+
+    def __init__(self, method, pattern, handler, error=None, error_status=200,
+                 json_body=False, query_parser=None, max_body=DEFAULT_MAX_BODY, slow=False):
+        self.method = method
+        self.pattern = pattern
+        self.handler = handler
+        self.error = error or "请求处理失败"
+        self.error_status = error_status
+        self.json_body = json_body
+        self.query_parser = query_parser
+        self.max_body = max_body
+        self.slow = slow
+        self.param_names = PARAM_RE.findall(pattern)
+        self.regex = None
+        self.prefix = pattern
+        if self.param_names:
+            self.prefix = pattern[:pattern.index('{')]
+            parts = PARAM_RE.split(pattern)
+            # split 结果中偶数位置是固定文本，奇数位置是参数名
+            self.regex = re.compile('^' + ''.join(
+                re.escape(part) if i % 2 == 0 else f'(?P<{part}>[^/]+)'
+                for i, part in enumerate(parts)) + '$')
+        self.call = None
+
+    def match(self, path):
+        """匹配路径，成功时返回路径参数字典，否则返回None"""
+        if self.regex is None:
+            return {} if path == self.pattern else None
+        match = self.regex.match(path)
+        return match.groupdict() if match else None
+
+
+# ---- 中间件 ----
+# 中间件签名为 middleware(request, route, call_next)，返回 ApiResponse 或 None
+
+def timing(request, route, call_next):
+    """记录处理函数耗时，通过 Server-Timing 响应头告知客户端"""
+    started = time.perf_counter()
+    response = call_next(request)
+    if response is not None:
+        elapsed = (time.perf_counter() - started) * 1000
+        response.headers.append(('Server-Timing', f'app;dur={elapsed:.1f}'))
+    return response
+
+
+def encode_response(request, route, call_next):
+    """把处理函数返回的字典包装为 ApiResponse"""
+    response = call_next(request)
+    if isinstance(response, dict):
+        return ApiResponse(response)
+    return response
+
+
+def catch_errors(request, route, call_next):
+    """处理函数抛出的异常统一转为错误响应"""
+    try:
+        return call_next(request)
+    except Exception as e:
+        return error_response(f"{route.error}: {str(e)}", status=route.error_status)
+
+
+def limit_body(request, route, call_next):
+    """拒绝超过路由上限的请求体"""
+    if len(request.body) > route.max_body:
+        return error_response(f"请求体过大（上限 {route.max_body} 字节）", status=413)
+    return call_next(request)
+
+
+def decode_json(request, route, call_next):
+    """按需把请求体解码为JSON"""
+    if route.json_body:
+        request.json = json.loads(request.body.decode('utf-8'))
+    return call_next(request)
+
+
+def parse_query(request, route, call_next):
+    """按需解析查询参数，参数无效时返回错误响应"""
+    if route.query_parser is not None:
+        try:
+            request.options = route.query_parser(request.query)
+        except ValueError as e:
+            return error_response(f"无效的查询参数: {str(e)}")
+    return call_next(request)
+
+
+# 由外到内的默认中间件链
+DEFAULT_MIDDLEWARE = (timing, encode_response, catch_errors, limit_body, decode_json, parse_query)
+
+
+def _chain(route, middleware):
+    """把中间件和处理函数组合成一个可调用对象（构建路由表时执行一次）"""
+    call = route.handler
+    for layer in reversed(middleware):
+        call = functools.partial(layer, route=route, call_next=call)
+    return call
+
+
+class Router:
+    """编译后的路由表"""
+
+    def __init__(self, routes, middleware=DEFAULT_MIDDLEWARE):
+        self.routes = list(routes)
+        self._exact = {}
+        self._prefixed = {}
+        for route in self.routes:
+            route.call = _chain(route, middleware)
+            if route.regex is None:
+                self._exact.setdefault(route.pattern, {})[route.method] = route
+            else:
+                self._prefixed.setdefault(route.prefix, []).append(route)
+        self.slow_paths = tuple(route.pattern for route in self.routes
+                                if route.slow and route.regex is None)
+
+    def _prefixed_candidates(self, path):
+        """按参数前的固定前缀查找可能匹配的路由（从最长的前缀开始）"""
+        position = path.rfind('/')
+        while position >= 0:
+            routes = self._prefixed.get(path[:position + 1])
+            if routes:
+                return routes
+            position = path.rfind('/', 0, position)
+        return []
+
+    def match(self, method, path):
+        """查找路由，返回 (Route, 路径参数) 或 (None, None)"""
+        exact = self._exact.get(path)
+        if exact is not None:
+            route = exact.get(method)
+            return (route, {}) if route is not None else (None, None)
+        for route in self._prefixed_candidates(path):
+            if route.method != method:
+                continue
+            params = route.match(path)
+            if params is not None:
+                return route, params
+        return None, None
+
+    def label(self, path):
+        """返回路径对应的路由模式（不区分方法），未知路径返回None"""
+        if path in self._exact:
+            return path
+        for route in self._prefixed_candidates(path):
+            if route.match(path) is not None:
+                return route.pattern
+        return None
+
+    def dispatch(self, method, path, query_string='', body=b'', ai_tester=None, headers=None):
+        """分派请求，路由不存在时返回None"""
+        route, params = self.match(method, path)
+        if route is None:
+            return None
+        return route.call(Request(method, path, query_string, body, params, ai_tester, headers))
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog asyncio 服务器
+与 web_server.py 提供相同的路由（API 由 api_handlers 统一处理），但使用单线程事件循环：
+空闲的 keep-alive 连接不占用线程，磁盘读写和AI调用分别放到独立的线程池中执行，
+慢的AI请求不会阻塞其他请求。实时事件流等待新事件时会阻塞线程，使用单独的线程池。
+
+用法:
+    python web_server.py --engine asyncio [端口]
+    python launcher.py --engine asyncio
+"""
+
+import asyncio
+import errno
+import functools
+import http.client
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.utils import formatdate
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import api_handlers
+import history_index
+import live_events
+import server_metrics
+import settings_store
+import wsgi_app
+
+
+# 等待下一个请求的空闲超时（秒）
+DEFAULT_KEEPALIVE_TIMEOUT = 75
+
+# 请求头的大小上限（请求体的上限为 wsgi_app.MAX_REQUEST_BODY）
+MAX_HEADER_SIZE = 64 * 1024
+
+# 磁盘读写与AI调用的线程数
+DISK_WORKERS = 16
+AI_WORKERS = 8
+
+SERVER_NAME = 'QuirkLogAsync/1.0'
+
+
+class AsyncQuirkLogServer:
+    """基于 asyncio 的 QuirkLog 服务器"""
+
+    def __init__(self, directory, keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+                 ai_tester=None, disk_workers=DISK_WORKERS, ai_workers=AI_WORKERS,
+                 event_workers=live_events.MAX_SUBSCRIBERS):
+        self.directory = os.fspath(directory)
+        self.keepalive_timeout = keepalive_timeout
+        self.ai_tester = ai_tester
+        self.app = wsgi_app.QuirkLogApp(directory, ai_tester=ai_tester, record_metrics=False)
+        self.disk_executor = ThreadPoolExecutor(
+            max_workers=disk_workers, thread_name_prefix='quirklog-async-disk')
+        self.ai_executor = ThreadPoolExecutor(
+            max_workers=ai_workers, thread_name_prefix='quirklog-async-ai')
+        # 事件总线限制了同时订阅的连接数，每个事件流都有自己的线程，不会互相等待
+        self.event_executor = ThreadPoolExecutor(
+            max_workers=event_workers, thread_name_prefix='quirklog-async-events')
+        self.server = None
+
+    async def start(self, host='', port=8000):
+        """开始监听，返回 asyncio.Server"""
+        self.server = await asyncio.start_server(
+            self.handle_connection, host or None, port, limit=MAX_HEADER_SIZE)
+        return self.server
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        self.disk_executor.shutdown(wait=False)
+        self.ai_executor.shutdown(wait=False)
+        self.event_executor.shutdown(wait=False)
+
+    # ---- 连接处理 ----
+
+    async def handle_connection(self, reader, writer):
+        """处理一个连接上的全部请求（keep-alive）"""
+        writer = server_metrics.CountingWriter(writer)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(
+                        self._read_request(reader), self.keepalive_timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except wsgi_app.BadRequest as e:
+                    await self._send_response(writer, self.app.error(e.status, str(e)),
+                                              'HTTP/1.0', keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                writer.reset()
+                started = time.perf_counter()
+                keep_alive = await self.handle_request(writer, *request)
+                self._record_metrics(writer, request, started)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            print(f"❌ 处理连接时出错: {e}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _record_metrics(writer, request, started):
+        if not server_metrics.metrics.enabled:
+            return
+        method, target, _, _, body = request
+        server_metrics.metrics.observe(
+            method, api_handlers.route_label(urlsplit(target).path), writer.status,
+            time.perf_counter() - started, len(body), writer.bytes_written)
+
+    async def _read_request(self, reader):
+        """读取请求行、请求头和请求体，连接已关闭时返回None"""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.LimitOverrunError:
+            raise wsgi_app.BadRequest(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "请求头过大")
+        except asyncio.IncompleteReadError as e:
+            if not e.partial.strip():
+                return None
+            raise
+
+        request_line, _, header_bytes = head.partition(b'\r\n')
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise wsgi_app.BadRequest(HTTPStatus.BAD_REQUEST, "无效的请求行")
+        if not version.startswith('HTTP/1.'):
+            raise wsgi_app.BadRequest(HTTPStatus.HTTP_VERSION_NOT_SUPPORTED, "不支持的HTTP版本")
+        headers = http.client.parse_headers(io.BytesIO(header_bytes))
+
+        body = b''
+        length = headers.get('Content-Length')
+        if length:
+            try:
+                length = int(length)
+            except ValueError:
+                raise wsgi_app.BadRequest(HTTPStatus.BAD_REQUEST, "无效的 Content-Length")
+            if length > wsgi_app.MAX_REQUEST_BODY:
+                raise wsgi_app.BadRequest(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "请求体过大")
+            body = await reader.readexactly(length)
+        return method.upper(), target, version, headers, body
+
+    @staticmethod
+    def _wants_keep_alive(version, headers):
+        connection = (headers.get('Connection') or '').lower()
+        if version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    async def handle_request(self, writer, method, target, version, headers, body):
+        """处理单个请求，返回连接是否可以继续使用
+
+        API响应、静态文件（ETag、压缩协商、缓存头）和错误页都由 wsgi_app 中与
+        WSGI 应用相同的实现生成，本服务器只负责连接和线程池的选择。
+        """
+        keep_alive = self._wants_keep_alive(version, headers)
+        parts = urlsplit(target)
+        path = wsgi_app.decode_path(unquote(parts.path, 'iso-8859-1'))
+        loop = asyncio.get_running_loop()
+
+        if method == 'OPTIONS':
+            response = 200, wsgi_app.CORS_HEADERS + [('Content-Length', '0')], []
+            return await self._send_response(writer, response, version, keep_alive)
+
+        if api_handlers.is_api_path(path) and method in ('GET', 'POST'):
+            executor = (self.ai_executor if path in api_handlers.SLOW_ROUTES
+                        else self.disk_executor)
+            response = await loop.run_in_executor(
+                executor, functools.partial(api_handlers.dispatch, method, path,
+                                            parts.query, body, ai_tester=self.ai_tester,
+                                            headers=headers))
+            if response is not None:
+                # 事件流每次取下一块最多阻塞一个心跳间隔，不能占用磁盘读写的线程
+                executor = (self.event_executor
+                            if response.content_type == live_events.EVENT_STREAM_CONTENT_TYPE
+                            else self.disk_executor)
+                return await self._send_response(writer, self.app.api_response(response),
+                                                 version, keep_alive, executor)
+
+        if method in ('GET', 'HEAD'):
+            response = await loop.run_in_executor(
+                self.disk_executor, self.app.serve_static, path, headers, method == 'GET')
+            return await self._send_response(writer, response, version, keep_alive)
+
+        if method == 'POST':
+            return await self._send_response(writer, self.app.error(404, "Not Found"),
+                                             version, keep_alive)
+        return await self._send_response(
+            writer, self.app.error(501, f"Unsupported method ({method})"), version, keep_alive)
+
+    # ---- 响应 ----
+
+    async def _write_head(self, writer, status, version, keep_alive, headers):
+        status = HTTPStatus(status)
+        writer.status = status.value
+        lines = [f"{version if version == 'HTTP/1.0' else 'HTTP/1.1'} "
+                 f"{status.value} {status.phrase}",
+                 f"Server: {SERVER_NAME}",
+                 f"Date: {formatdate(usegmt=True)}"]
+        lines.extend(f"{name}: {value}" for name, value in headers)
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1', 'replace'))
+        await writer.drain()
+
+    async def _send_response(self, writer, response, version, keep_alive, executor=None):
+        """发送 wsgi_app 格式的响应 (状态码, 响应头列表, 响应体可迭代对象)
+
+        有 Content-Length 时直接写出；否则 HTTP/1.1 使用分块传输编码，HTTP/1.0 结束后关闭连接。
+        响应体不是列表时（流式API响应、大文件）在 executor（默认磁盘线程池）中逐块读取。
+        """
+        status, headers, chunks = response
+        has_length = any(name.lower() == 'content-length' for name, _ in headers)
+        chunked = not has_length and version != 'HTTP/1.0'
+        if not has_length:
+            keep_alive = keep_alive and chunked
+            if chunked:
+                headers = headers + [('Transfer-Encoding', 'chunked')]
+
+        loop = asyncio.get_running_loop()
+        iterator = iter(chunks)
+        try:
+            await self._write_head(writer, status, version, keep_alive, headers)
+            while True:
+                if isinstance(chunks, list):
+                    chunk = next(iterator, None)
+                else:
+                    chunk = await loop.run_in_executor(executor or self.disk_executor,
+                                                       next, iterator, None)
+                if chunk is None:
+                    break
+                if not chunk:
+                    continue
+                if chunked:
+                    writer.write(f"{len(chunk):X}\r\n".encode('ascii') + chunk + b"\r\n")
+                else:
+                    writer.write(chunk)
+                await writer.drain()
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+        except ConnectionError:
+            return False
+        except Exception as e:
+            print(f"❌ 流式响应中断: {e}")
+            return False
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+        return keep_alive
+
+
+def start_server(port=8000, keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT):
+    """启动asyncio服务器"""
+
+    # 确保在正确的目录中
+    script_dir = Path(__file__).parent
+    os.chdir(script_dir)
+
+    # 检查index.html是否存在
+    if not Path('index.html').exists():
+        print("❌ 错误: 找不到 index.html 文件")
+        print("请确保在正确的目录中运行此脚本")
+        return
+
+    # 启动时核对历史索引，保存目录被外部修改过时重建
+    try:
+        settings = settings_store.load_settings()
+        history_index.get_index(
+            settings.get('saveDirectory', './downloads'),
+            settings.get('fileNaming', '每日记录_{date}')
+        ).ensure_fresh()
+    except Exception as e:
+        print(f"⚠️ 历史索引初始化失败: {e}")
+
+    async def serve():
+        app = AsyncQuirkLogServer(script_dir, keepalive_timeout=keepalive_timeout)
+        server = await app.start('', port)
+        print("🌐 每日计划与总结Web应用已启动")
+        print(f"📍 服务器地址: http://localhost:{port}")
+        print(f"📂 服务目录: {script_dir}")
+        print(f"⚡ asyncio模式: keep-alive 空闲超时 {keepalive_timeout} 秒")
+        print("🔄 按 Ctrl+C 停止服务器")
+        print("-" * 50)
+
+        # 自动打开浏览器
+        try:
+            import webbrowser
+            webbrowser.open(f'http://localhost:{port}')
+            print("🚀 正在打开浏览器...")
+        except Exception as e:
+            print(f"⚠️ 无法自动打开浏览器: {e}")
+            print(f"请手动打开浏览器并访问: http://localhost:{port}")
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            app.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("\n👋 服务器已停止")
+    except OSError as e:
+        if e.errno in (errno.EADDRINUSE, 48):
+            print(f"❌ 端口 {port} 已被占用")
+            print("尝试使用其他端口...")
+            start_server(port + 1, keepalive_timeout=keepalive_timeout)
+        else:
+            print(f"❌ 启动服务器失败: {e}")
+
+
+def main():
+    """主函数"""
+    import web_server
+
+    args = web_server.parse_args(sys.argv[1:])
+    try:
+        port = int(args.port)
+    except ValueError:
+        print("❌ 无效的端口号，使用默认端口 8000")
+        port = 8000
+
+    today = datetime.now().strftime("%Y年%m月%d日")
+    print(f"🌟 {today} 计划与总结Web应用启动器（asyncio）")
+    print("=" * 40)
+    start_server(port)
+
+
+if __name__ == "__main__":
+    main()
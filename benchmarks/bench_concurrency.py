@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发服务基准测试
+对比单线程 TCPServer 与多线程 ThreadedHTTPServer 在 50 个并发客户端下的延迟
+
+用法:
+    python benchmarks/bench_concurrency.py
+    python benchmarks/bench_concurrency.py --clients 50 --requests 10 --ai-delay 0.2
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import web_server
+
+
+def make_handler(ai_delay):
+    """构造一个用固定延迟模拟AI往返的处理器，避免真实网络请求"""
+
+    class BenchHandler(web_server.SettingsHandler):
+        def test_openrouter_connection(self, api_key, base_url, model=None):
+            time.sleep(ai_delay)
+            return True, "benchmark"
+
+        def log_message(self, format, *args):
+            pass
+
+    return BenchHandler
+
+
+def percentile(values, pct):
+    """计算百分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def client_session(base_url, requests_per_client, ai_every):
+    """单个客户端依次发送请求，返回 (类别, 延迟秒数) 列表；失败的请求延迟记为 None"""
+    samples = []
+    for i in range(requests_per_client):
+        start = time.perf_counter()
+        if ai_every and i % ai_every == 0:
+            kind = 'ai'
+            body = json.dumps({"apiKey": "bench", "model": "bench"}).encode('utf-8')
+            request = urllib.request.Request(
+                f"{base_url}/api/test-ai-connection", data=body,
+                headers={'Content-Type': 'application/json'})
+        elif i % 2:
+            kind = 'static'
+            request = urllib.request.Request(f"{base_url}/style.css")
+        else:
+            kind = 'api'
+            request = urllib.request.Request(f"{base_url}/api/history-files")
+        try:
+            with urllib.request.urlopen(request, timeout=120) as response:
+                response.read()
+        except OSError:
+            # 单线程模式下监听队列溢出会导致连接被重置
+            samples.append((kind, None))
+            continue
+        samples.append((kind, time.perf_counter() - start))
+    return samples
+
+
+def run_mode(concurrent, args):
+    """在指定模式下启动服务器并施加负载"""
+    server = web_server.create_server(
+        0, handler_class=make_handler(args.ai_delay), concurrent=concurrent,
+        max_workers=args.threads, queue_size=args.queue_size)
+    port = server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            futures = [pool.submit(client_session, base_url, args.requests, args.ai_every)
+                       for _ in range(args.clients)]
+            samples = [sample for future in futures for sample in future.result()]
+    finally:
+        server.shutdown()
+        server.server_close()
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "mode": "threaded" if concurrent else "serial",
+        "requests": len(samples),
+        "errors": sum(1 for _, lat in samples if lat is None),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+    }
+    for kind in ('all', 'static', 'api', 'ai'):
+        latencies = [lat for k, lat in samples
+                     if lat is not None and (kind == 'all' or k == kind)]
+        if latencies:
+            result[kind] = {
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QuirkLog 并发服务基准测试")
+    parser.add_argument('--clients', type=int, default=50, help="并发客户端数")
+    parser.add_argument('--requests', type=int, default=10, help="每个客户端的请求数")
+    parser.add_argument('--ai-every', type=int, default=10,
+                        help="每隔多少个请求发送一次AI连接测试 (0 表示不发送)")
+    parser.add_argument('--ai-delay', type=float, default=0.2, help="模拟AI往返耗时（秒）")
+    parser.add_argument('--threads', type=int, default=web_server.DEFAULT_MAX_WORKERS)
+    parser.add_argument('--queue-size', type=int, default=web_server.DEFAULT_QUEUE_SIZE)
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)
+
+    results = [run_mode(False, args), run_mode(True, args)]
+
+    print(f"{'模式':<10}{'类别':<8}{'p50(ms)':>12}{'p99(ms)':>12}")
+    for result in results:
+        if result['errors']:
+            print(f"{result['mode']:<10}失败请求: {result['errors']}")
+        for kind in ('all', 'static', 'api', 'ai'):
+            if kind in result:
+                print(f"{result['mode']:<10}{kind:<8}"
+                      f"{result[kind]['p50_ms']:>12}{result[kind]['p99_ms']:>12}")
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
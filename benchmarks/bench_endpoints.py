@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+接口负载基准测试
+在临时目录中生成指定数量的日记记录，以子进程启动 web_server（随机端口），
+对历史列表、读取记录、保存记录和静态文件分别施加并发负载，
+输出每个接口的吞吐量和延迟百分位（JSON）。
+
+固定随机种子、记录数、并发数和请求数时，不同提交的结果可以直接对比；
+指定 --baseline 时与之前保存的结果比较，--check 在性能退化超过容差时返回非零退出码。
+
+用法:
+    python benchmarks/bench_endpoints.py
+    python benchmarks/bench_endpoints.py --records 1000 10000 100000 --output results.json
+    python benchmarks/bench_endpoints.py --baseline results.json --check
+"""
+
+import argparse
+import datetime
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from bench_startup import PROJECT_ROOT, child_env
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import sample_data
+from bench_concurrency import percentile
+
+# 在子进程中启动服务器（workers 大于1时为多进程模式）并输出端口
+SERVER_SNIPPET = (
+    "import sys, prefork, web_server\n"
+    "class Quiet(web_server.SettingsHandler):\n"
+    "    def log_message(self, *args): pass\n"
+    "workers = int(sys.argv[1])\n"
+    "if workers > 1:\n"
+    "    httpd = prefork.PreforkServer(0, workers, lambda sock: web_server.create_server(\n"
+    "        sock=sock, handler_class=Quiet))\n"
+    "else:\n"
+    "    httpd = web_server.create_server(0, handler_class=Quiet)\n"
+    "print(httpd.server_address[1], flush=True)\n"
+    "httpd.serve_forever()\n"
+)
+
+# 生成的记录以该日期为最后一天向前连续排列（使用设置中的默认命名格式）
+LAST_DATE = sample_data.DEFAULT_END_DATE
+
+STATIC_PATHS = ('/index.html', '/style.css', '/script.js')
+ENDPOINTS = ('history-files', 'history-files-all', 'load-record', 'save-daily-record', 'static')
+
+# 与基线比较的指标及方向（1 表示越大越好）
+COMPARED_METRICS = (('throughput_rps', 1), ('p50_ms', -1), ('p99_ms', -1))
+
+
+def build_dataset(data_dir, records, seed):
+    """在数据目录中生成以 LAST_DATE 结束的 records 条连续记录，返回日期列表"""
+    start = LAST_DATE - datetime.timedelta(days=records - 1)
+    return sample_data.generate(data_dir, start, LAST_DATE, seed=seed)
+
+
+def endpoint_request(endpoint, i, rng, dates):
+    """返回第 i 个请求的 (方法, 路径, 请求体)"""
+    if endpoint == 'history-files':
+        return 'GET', '/api/history-files?limit=50', None
+    if endpoint == 'history-files-all':
+        return 'GET', '/api/history-files?fields=date,filename', None
+    if endpoint == 'load-record':
+        return 'GET', f'/api/load-record/{rng.choice(dates)}', None
+    if endpoint == 'save-daily-record':
+        date = rng.choice(dates)
+        record = sample_data.generate_record(date, seed=rng.randrange(2 ** 31))
+        body = json.dumps(record, ensure_ascii=False).encode('utf-8')
+        return 'POST', '/api/save-daily-record', body
+    return 'GET', STATIC_PATHS[i % len(STATIC_PATHS)], None
+
+
+def client_session(port, endpoint, requests_per_client, seed, dates):
+    """单个客户端在一条持久连接上依次发送请求，返回延迟秒数列表；失败的请求记为 None"""
+    rng = random.Random(seed)
+    samples = []
+    connection = None
+    for i in range(requests_per_client):
+        method, path, body = endpoint_request(endpoint, i, rng, dates)
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        start = time.perf_counter()
+        try:
+            if connection is None:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.will_close:
+                connection.close()
+                connection = None
+        except OSError:
+            if connection is not None:
+                connection.close()
+                connection = None
+            samples.append(None)
+            continue
+        samples.append(time.perf_counter() - start if response.status < 400 else None)
+    if connection is not None:
+        connection.close()
+    return samples
+
+
+def run_endpoint(port, endpoint, dates, args):
+    """对单个接口预热后施加并发负载"""
+    client_session(port, endpoint, args.warmup, args.seed, dates)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        futures = [pool.submit(client_session, port, endpoint, args.requests,
+                               args.seed + n, dates)
+                   for n in range(args.clients)]
+        samples = [sample for future in futures for sample in future.result()]
+    elapsed = time.perf_counter() - started
+
+    latencies = [lat for lat in samples if lat is not None]
+    return {
+        "endpoint": endpoint,
+        "requests": len(samples),
+        "errors": len(samples) - len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 3),
+    }
+
+
+def start_server(env, workers):
+    process = subprocess.Popen([sys.executable, '-c', SERVER_SNIPPET, str(workers)],
+                               cwd=PROJECT_ROOT, env=env, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.strip():
+        process.wait()
+        raise RuntimeError(f"服务器启动失败（退出码 {process.returncode}）")
+    return process, int(line)
+
+
+def stop_server(process):
+    # SIGTERM 让多进程模式的监督者先停止工作进程
+    process.terminate()
+    try:
+        process.wait(15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def run_size(records, args):
+    """生成指定数量的记录，启动服务器并依次测试各接口"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env = child_env(temp_dir)
+        started = time.perf_counter()
+        dates = build_dataset(Path(temp_dir) / 'data', records, args.seed)
+        generate_s = time.perf_counter() - started
+
+        process, port = start_server(env, args.workers)
+        try:
+            # 第一个请求需要从磁盘建立历史索引
+            started = time.perf_counter()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+            connection.request('GET', '/api/history-files?limit=1')
+            connection.getresponse().read()
+            connection.close()
+            cold_index_ms = (time.perf_counter() - started) * 1000
+
+            results = [run_endpoint(port, endpoint, dates, args) for endpoint in args.endpoints]
+        finally:
+            stop_server(process)
+
+    return {
+        "records": records,
+        "generate_s": round(generate_s, 3),
+        "cold_index_ms": round(cold_index_ms, 3),
+        "endpoints": results,
+    }
+
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, tolerance):
+    """与基线逐项比较，返回超出容差的退化描述列表"""
+    previous = {(size['records'], item['endpoint']): item
+                for size in baseline.get('sizes', []) for item in size['endpoints']}
+    regressions = []
+    for size in report['sizes']:
+        for item in size['endpoints']:
+            old = previous.get((size['records'], item['endpoint']))
+            if old is None:
+                continue
+            for metric, direction in COMPARED_METRICS:
+                before, after = old.get(metric), item[metric]
+                if not before:
+                    continue
+                change = (after - before) / before * direction
+                if change < -tolerance:
+                    regressions.append(
+                        f"{size['records']} 条 {item['endpoint']} {metric}: "
+                        f"{before} → {after} ({change * direction:+.0%})")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="QuirkLog 接口负载基准测试")
+    parser.add_argument('--records', type=int, nargs='+', default=[1000],
+                        help="生成的记录数，可指定多个（如 1000 10000 100000）")
+    parser.add_argument('--clients', type=int, default=8, help="并发客户端数")
+    parser.add_argument('--requests', type=int, default=200, help="每个客户端对每个接口的请求数")
+    parser.add_argument('--warmup', type=int, default=20, help="每个接口正式测量前的预热请求数")
+    parser.add_argument('--workers', type=int, default=1, help="服务器工作进程数")
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=list(ENDPOINTS),
+                        help="要测试的接口")
+    parser.add_argument('--seed', type=int, default=1, help="随机种子")
+    parser.add_argument('--output', help="把结果写入JSON文件")
+    parser.add_argument('--baseline', help="与之前保存的结果比较")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="允许的退化比例（默认 0.2 即 20%%）")
+    parser.add_argument('--check', action='store_true', help="有超出容差的退化时以非零状态退出")
+    args = parser.parse_args()
+    if any(records < 1 for records in args.records):
+        parser.error("--records 必须大于0")
+    return args
+
+
+def main():
+    args = parse_args()
+
+    report = {
+        "benchmark": "endpoints",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {"clients": args.clients, "requests": args.requests,
+                   "warmup": args.warmup, "workers": args.workers, "seed": args.seed},
+        "sizes": [run_size(records, args) for records in args.records],
+    }
+
+    print(f"{'记录数':<10}{'接口':<20}{'吞吐(req/s)':>14}{'p50(ms)':>12}{'p99(ms)':>12}")
+    for size in report['sizes']:
+        for item in size['endpoints']:
+            if item['errors']:
+                print(f"{size['records']:<10}{item['endpoint']:<20}失败请求: {item['errors']}")
+            print(f"{size['records']:<10}{item['endpoint']:<20}{item['throughput_rps']:>14}"
+                  f"{item['p50_ms']:>12}{item['p99_ms']:>12}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('config') != report['config']:
+            print("⚠️ 基线的测试参数与本次不同，结果可能不可比")
+        regressions = compare(report, baseline, args.tolerance)
+        report['baseline_commit'] = baseline.get('commit')
+        report['regressions'] = regressions
+        for regression in regressions:
+            print(f"❌ 性能退化: {regression}")
+        if not regressions:
+            print(f"✅ 与基线 {baseline.get('commit')} 相比没有超出容差的退化")
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + '\n', encoding='utf-8')
+
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持久连接基准测试
+对比每个请求新建TCP连接与 HTTP/1.1 keep-alive 复用连接时的延迟和吞吐量
+
+用法:
+    python benchmarks/bench_keepalive.py
+    python benchmarks/bench_keepalive.py --clients 8 --requests 500
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import web_server
+from bench_concurrency import percentile
+
+# 每个客户端轮流请求的路径（小型API响应与静态文件）
+BENCH_PATHS = ('/api/history-files', '/style.css')
+
+
+class QuietHandler(web_server.SettingsHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def client_session(port, requests_per_client, keepalive):
+    """单个客户端依次发送请求，返回延迟秒数列表；失败的请求记为 None"""
+    samples = []
+    connection = None
+    for i in range(requests_per_client):
+        path = BENCH_PATHS[i % len(BENCH_PATHS)]
+        start = time.perf_counter()
+        try:
+            if connection is None:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            headers = {} if keepalive else {'Connection': 'close'}
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if not keepalive or response.will_close:
+                connection.close()
+                connection = None
+        except OSError:
+            if connection is not None:
+                connection.close()
+                connection = None
+            samples.append(None)
+            continue
+        samples.append(time.perf_counter() - start)
+    if connection is not None:
+        connection.close()
+    return samples
+
+
+def run_mode(keepalive, args):
+    """启动服务器并以指定连接方式施加负载"""
+    server = web_server.create_server(
+        0, handler_class=QuietHandler,
+        max_workers=max(args.clients, web_server.DEFAULT_MAX_WORKERS),
+        max_keepalive_requests=args.max_keepalive_requests)
+    port = server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            futures = [pool.submit(client_session, port, args.requests, keepalive)
+                       for _ in range(args.clients)]
+            samples = [sample for future in futures for sample in future.result()]
+    finally:
+        server.shutdown()
+        server.server_close()
+    elapsed = time.perf_counter() - started
+
+    latencies = [lat for lat in samples if lat is not None]
+    return {
+        "mode": "keep-alive" if keepalive else "close",
+        "requests": len(samples),
+        "errors": len(samples) - len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QuirkLog 持久连接基准测试")
+    parser.add_argument('--clients', type=int, default=8, help="并发客户端数")
+    parser.add_argument('--requests', type=int, default=300, help="每个客户端的请求数")
+    parser.add_argument('--max-keepalive-requests', type=int,
+                        default=web_server.DEFAULT_MAX_KEEPALIVE_REQUESTS,
+                        help="服务器单连接最多处理的请求数")
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)
+
+    results = [run_mode(False, args), run_mode(True, args)]
+
+    print(f"{'模式':<12}{'吞吐(req/s)':>14}{'p50(ms)':>12}{'p99(ms)':>12}")
+    for result in results:
+        if result['errors']:
+            print(f"{result['mode']:<12}失败请求: {result['errors']}")
+        print(f"{result['mode']:<12}{result['throughput_rps']:>14}"
+              f"{result['p50_ms']:>12}{result['p99_ms']:>12}")
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时基准测试
+用 python -X importtime 测量各入口模块的累计导入耗时，并测量从启动进程到
+第一个API请求返回的时间，与 startup_budget.json 中的预算对比。
+同时检查启动Web服务时没有导入 openai / schedule 等只在AI功能中用到的重量级依赖。
+
+用法:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 7 --check   # 超出预算时返回非零退出码
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+# 子进程在项目根目录中运行
+PROJECT_ROOT = Path(__file__).parent.parent
+BUDGET_FILE = Path(__file__).parent / 'startup_budget.json'
+
+# 在子进程中启动服务器并输出端口
+SERVER_SNIPPET = (
+    "import web_server\n"
+    "class Quiet(web_server.SettingsHandler):\n"
+    "    def log_message(self, *args): pass\n"
+    "httpd = web_server.create_server(0, handler_class=Quiet)\n"
+    "print(httpd.server_address[1], flush=True)\n"
+    "httpd.serve_forever()\n"
+)
+
+
+def load_budget(path=BUDGET_FILE):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def child_env(temp_dir):
+    """子进程环境：使用临时设置文件，避免读写项目目录中的 settings.xml"""
+    xml_file = Path(temp_dir) / 'settings.xml'
+    xml_file.write_text(
+        '<?xml version="1.0" encoding="utf-8"?><settings><general>'
+        f'<saveDirectory>{temp_dir}/data</saveDirectory></general></settings>',
+        encoding='utf-8')
+    env = dict(os.environ, QUIRKLOG_SETTINGS_FILE=str(xml_file))
+    env.pop('PYTHONPROFILEIMPORTTIME', None)
+    return env
+
+
+def import_time_ms(module, env):
+    """返回一次 `import module` 的累计导入耗时（毫秒）"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True)
+    for line in result.stderr.splitlines():
+        # 格式: "import time:  self [us] | cumulative | imported package"
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].rstrip() == f' {module}':
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"未在 -X importtime 输出中找到模块 {module}")
+
+
+def first_request_ms(env):
+    """启动服务器子进程，返回到第一个API请求成功的耗时（毫秒）"""
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', SERVER_SNIPPET], cwd=PROJECT_ROOT,
+                               env=env, stdout=subprocess.PIPE, text=True)
+    try:
+        port = int(process.stdout.readline())
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/history-files",
+                                    timeout=30) as response:
+            response.read()
+        return (time.perf_counter() - started) * 1000
+    finally:
+        process.kill()
+        process.wait()
+
+
+def loaded_modules(modules, candidates, env):
+    """导入入口模块后，返回 candidates 中已被导入的模块"""
+    code = (f"import sys\nimport {', '.join(modules)}\n"
+            f"print(','.join(m for m in {list(candidates)!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return [name for name in result.stdout.strip().split(',') if name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QuirkLog 启动耗时基准测试")
+    parser.add_argument('--runs', type=int, default=5, help="每项测量的重复次数（取中位数）")
+    parser.add_argument('--budget', default=str(BUDGET_FILE), help="预算文件路径")
+    parser.add_argument('--check', action='store_true', help="超出预算时以非零状态退出")
+    args = parser.parse_args()
+
+    budget = load_budget(args.budget)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env = child_env(temp_dir)
+
+        imports = {}
+        for module in budget['imports_ms']:
+            imports[module] = round(statistics.median(
+                import_time_ms(module, env) for _ in range(args.runs)), 2)
+        first_request = round(statistics.median(
+            first_request_ms(env) for _ in range(args.runs)), 2)
+        forbidden = loaded_modules(list(budget['imports_ms']), budget['forbidden_modules'], env)
+
+    failures = []
+    print(f"{'项目':<24}{'实测(ms)':>12}{'预算(ms)':>12}")
+    for module, elapsed in imports.items():
+        limit = budget['imports_ms'][module]
+        print(f"{'import ' + module:<24}{elapsed:>12}{limit:>12}")
+        if elapsed > limit:
+            failures.append(f"import {module}: {elapsed}ms > {limit}ms")
+    print(f"{'first request':<24}{first_request:>12}{budget['first_request_ms']:>12}")
+    if first_request > budget['first_request_ms']:
+        failures.append(f"first request: {first_request}ms > {budget['first_request_ms']}ms")
+    if forbidden:
+        failures.append(f"启动时导入了重量级依赖: {', '.join(forbidden)}")
+
+    print(json.dumps({
+        "imports_ms": imports,
+        "first_request_ms": first_request,
+        "forbidden_loaded": forbidden,
+        "within_budget": not failures,
+    }, ensure_ascii=False, indent=2))
+
+    if failures:
+        print("\n⚠️ 超出启动预算:")
+        for failure in failures:
+            print(f"   - {failure}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -38,9 +38,24 @@ def install_build_dependencies():
         print("❌ 构建依赖安装失败")
         return False
 
+def build_web_assets():
+    """构建压缩、带指纹的前端资源（web_dist/）"""
+    print("🎨 构建前端资源...")
+    try:
+        import build_assets
+        build_assets.build()
+        print("✅ 前端资源构建完成")
+        return True
+    except Exception as e:
+        print(f"⚠️ 前端资源构建失败，将直接打包源文件: {e}")
+        return False
+
 def create_simple_spec_file():
     """创建简化的 PyInstaller 规格文件（Web版本专用）"""
     
+    # 存在前端构建结果时一并打包
+    web_dist_data = "('web_dist', 'web_dist')," if Path("web_dist").exists() else ""
+    
     spec_content = f"""# -*- mode: python ; coding: utf-8 -*-
 
 a = Analysis(
@@ -55,6 +70,7 @@ a = Analysis(
         ('README.md', '.'),
         ('weekly_summary_template.md', '.'),
         ('requirements.txt', '.'),
+        {web_dist_data}
     ],
     hiddenimports=[
         'webbrowser', 'http.server', 'socketserver', 'threading',
@@ -246,6 +262,8 @@ def create_distribution_package():
         for file in resource_files:
             if Path(file).exists():
                 shutil.copy2(file, temp_dir / file)
+        if Path("web_dist").exists():
+            shutil.copytree("web_dist", temp_dir / "web_dist")
         
         # 复制安装脚本
         if system == "windows":
@@ -336,24 +354,29 @@ def main():
         
         print()
         
-        # 2. 构建可执行文件
+        # 2. 构建前端资源（失败时不影响打包）
+        build_web_assets()
+        
+        print()
+        
+        # 3. 构建可执行文件
         if not build_with_pyinstaller():
             return
         
         print()
         
-        # 3. 创建安装脚本
+        # 4. 创建安装脚本
         create_installer_scripts()
         
         print()
         
-        # 4. 创建分发包
+        # 5. 创建分发包
         if not create_distribution_package():
             return
         
         print()
         
-        # 5. 清理
+        # 6. 清理
         cleanup_build_files()
         
         print("\n🎉 打包完成！")
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog 前端资源构建脚本
+压缩 script.js / style.css，生成带内容哈希的文件名及 .gz/.br 预压缩文件，
+并改写 index.html 中的引用。构建结果输出到 web_dist/ 目录，
+Web服务器检测到有效的构建结果后会以 Cache-Control: immutable 提供这些文件。
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# 确保工作目录在项目根目录
+script_dir = Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+import static_assets
+
+# 构建输出目录及清单文件
+DIST_DIR = project_root / static_assets.BUILD_DIRNAME
+MANIFEST_NAME = static_assets.BUILD_MANIFEST
+
+# 需要指纹化的资源: 源文件 → 压缩函数名
+FINGERPRINTED_ASSETS = {
+    'script.js': 'minify_js',
+    'style.css': 'minify_css',
+}
+
+# 需要改写引用的页面
+HTML_PAGES = ['index.html']
+
+# 内容哈希长度
+HASH_LENGTH = 10
+
+# 在这些字符之后出现的 / 是正则表达式的开始，而不是除号
+REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'throw')
+
+# 与这些字符相邻的空格可以安全删除
+JS_TIGHT_CHARS = set('{}()[];,:=<>!?&|*%^~')
+CSS_TIGHT_CHARS = set('{};,>')
+
+
+def _is_identifier_char(ch):
+    return bool(ch) and (ch.isalnum() or ch in '_$')
+
+
+def _split_js(source):
+    """把JS源码切分为 (是否为代码, 文本) 片段，注释被替换为空白
+
+    字符串、模板字符串（含嵌套的 ${...}）和正则表达式字面量原样保留。
+    """
+    segments = []
+    code = []
+    i = 0
+    n = len(source)
+    # 模板字符串中 ${ 的嵌套栈，记录每层表达式内的花括号深度
+    template_stack = []
+
+    def last_significant():
+        for part in reversed(code):
+            stripped = part.rstrip()
+            if stripped:
+                return stripped
+        for is_code, text in reversed(segments):
+            stripped = text.rstrip()
+            if stripped:
+                return stripped if is_code else 'x'
+        return ''
+
+    def flush_code():
+        if code:
+            segments.append((True, ''.join(code)))
+            code.clear()
+
+    def read_template(start):
+        """读取模板字符串的一段，直到结束的反引号或 ${，返回结束位置"""
+        j = start
+        while j < n:
+            ch = source[j]
+            if ch == '\\':
+                j += 2
+                continue
+            if ch == '`':
+                return j + 1, False
+            if ch == '$' and j + 1 < n and source[j + 1] == '{':
+                return j + 2, True
+            j += 1
+        raise ValueError("未闭合的模板字符串")
+
+    while i < n:
+        ch = source[i]
+        nxt = source[i + 1] if i + 1 < n else ''
+
+        if ch in '"\'':
+            j = i + 1
+            while j < n and source[j] != ch:
+                if source[j] == '\\':
+                    j += 1
+                elif source[j] == '\n':
+                    raise ValueError(f"未闭合的字符串（第 {source.count(chr(10), 0, i) + 1} 行）")
+                j += 1
+            flush_code()
+            segments.append((False, source[i:j + 1]))
+            i = j + 1
+        elif ch == '`':
+            end, opened = read_template(i + 1)
+            flush_code()
+            segments.append((False, source[i:end]))
+            if opened:
+                template_stack.append(0)
+            i = end
+        elif ch == '}' and template_stack and template_stack[-1] == 0:
+            # 模板字符串中 ${...} 表达式结束，继续读取模板剩余部分
+            template_stack.pop()
+            end, opened = read_template(i + 1)
+            flush_code()
+            segments.append((False, source[i:end]))
+            if opened:
+                template_stack.append(0)
+            i = end
+        elif ch == '/' and nxt == '/':
+            j = source.find('\n', i)
+            i = n if j == -1 else j
+        elif ch == '/' and nxt == '*':
+            j = source.find('*/', i + 2)
+            if j == -1:
+                raise ValueError("未闭合的块注释")
+            code.append('\n' if '\n' in source[i:j] else ' ')
+            i = j + 2
+        elif ch == '/':
+            prev = last_significant()
+            is_regex = (not prev or prev[-1] in REGEX_PRECEDERS or
+                        any(prev.endswith(keyword) and
+                            not _is_identifier_char(prev[:-len(keyword)][-1:])
+                            for keyword in REGEX_KEYWORDS))
+            if not is_regex:
+                code.append(ch)
+                i += 1
+                continue
+            j = i + 1
+            in_class = False
+            while j < n:
+                c = source[j]
+                if c == '\\':
+                    j += 2
+                    continue
+                if c == '\n':
+                    raise ValueError("未闭合的正则表达式")
+                if c == '[':
+                    in_class = True
+                elif c == ']':
+                    in_class = False
+                elif c == '/' and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (source[j].isalpha()):
+                j += 1
+            flush_code()
+            segments.append((False, source[i:j]))
+            i = j
+        else:
+            if template_stack:
+                if ch == '{':
+                    template_stack[-1] += 1
+                elif ch == '}':
+                    template_stack[-1] -= 1
+            code.append(ch)
+            i += 1
+
+    flush_code()
+    return segments
+
+
+def _tighten(segments, tight_chars, keep_newlines):
+    """压缩代码片段中的空白，字面量片段以占位符参与判断、原样还原"""
+    literals = []
+    pieces = []
+    for is_code, text in segments:
+        if is_code:
+            pieces.append(text)
+        else:
+            pieces.append(f"\x00{len(literals)}\x01")
+            literals.append(text)
+    code = ''.join(pieces)
+
+    # 连续空白合并为一个：包含换行时保留换行（JS自动分号插入依赖换行）
+    def collapse(match):
+        return '\n' if keep_newlines and '\n' in match.group() else ' '
+
+    code = re.sub(r'\s+', collapse, code).strip()
+    out = []
+    for index, ch in enumerate(code):
+        if ch in ' \n':
+            before = out[-1]
+            after = code[index + 1]
+            if ch == ' ' and (before in tight_chars or after in tight_chars):
+                continue
+            if ch == '\n' and (before in '{[(,;' or after in '}]).'):
+                continue
+        out.append(ch)
+
+    return re.sub(r'\x00(\d+)\x01', lambda m: literals[int(m.group(1))], ''.join(out))
+
+
+def minify_js(source):
+    """保守地压缩JS：去除注释和多余空白，保留换行以维持自动分号插入的语义"""
+    return _tighten(_split_js(source), JS_TIGHT_CHARS, keep_newlines=True) + '\n'
+
+
+def minify_css(source):
+    """压缩CSS：去除注释和多余空白（保留选择器中 : 前的空格）"""
+    segments = []
+    i = 0
+    code_start = 0
+    n = len(source)
+    while i < n:
+        ch = source[i]
+        if ch in '"\'':
+            j = source.find(ch, i + 1)
+            j = n - 1 if j == -1 else j
+            segments.append((True, source[code_start:i]))
+            segments.append((False, source[i:j + 1]))
+            i = code_start = j + 1
+        elif source.startswith('/*', i):
+            j = source.find('*/', i + 2)
+            j = n if j == -1 else j + 2
+            segments.append((True, source[code_start:i] + ' '))
+            i = code_start = j
+        else:
+            i += 1
+    segments.append((True, source[code_start:]))
+
+    segments = [(is_code, re.sub(r':\s+', ':', text) if is_code else text)
+                for is_code, text in segments]
+    return _tighten(segments, CSS_TIGHT_CHARS, keep_newlines=False).replace(';}', '}') + '\n'
+
+
+def write_precompressed(path, data):
+    """写出 .gz（以及可用时的 .br）预压缩文件"""
+    written = []
+    gz_data = gzip.compress(data, compresslevel=9, mtime=0)
+    Path(f"{path}.gz").write_bytes(gz_data)
+    written.append(f"{path.name}.gz")
+    if static_assets.brotli is not None:
+        br_data = static_assets.brotli.compress(data)
+        Path(f"{path}.br").write_bytes(br_data)
+        written.append(f"{path.name}.br")
+    return written
+
+
+def build(dist_dir=DIST_DIR, root=project_root):
+    """执行构建，返回清单字典（root 为源文件所在目录）"""
+    root = Path(root)
+    dist_dir = Path(dist_dir)
+    if dist_dir.exists():
+        shutil.rmtree(dist_dir)
+    dist_dir.mkdir(parents=True)
+
+    manifest = {
+        'version': 1,
+        'builtAt': datetime.now().isoformat(),
+        'assets': {},
+        'sources': {},
+    }
+
+    # 1. 压缩并指纹化 JS/CSS
+    for source_name, minifier_name in FINGERPRINTED_ASSETS.items():
+        source_path = root / source_name
+        raw = source_path.read_bytes()
+        minified = globals()[minifier_name](raw.decode('utf-8')).encode('utf-8')
+        digest = hashlib.sha1(minified).hexdigest()[:HASH_LENGTH]
+        stem, suffix = os.path.splitext(source_name)
+        target_name = f"{stem}.{digest}{suffix}"
+        target_path = dist_dir / target_name
+        target_path.write_bytes(minified)
+        compressed = write_precompressed(target_path, minified)
+
+        manifest['assets'][source_name] = target_name
+        manifest['sources'][source_name] = static_assets.content_digest(raw)
+        print(f"  📄 {source_name}: {len(raw)} → {len(minified)} 字节 → {target_name} "
+              f"(+{', '.join(compressed)})")
+
+    # 2. 改写页面中的引用
+    for page_name in HTML_PAGES:
+        page_path = root / page_name
+        raw = page_path.read_bytes()
+        html = raw.decode('utf-8')
+        for source_name, target_name in manifest['assets'].items():
+            html = re.sub(r'((?:href|src)=["\'])(?:\./)?' + re.escape(source_name) + r'(["\'])',
+                          r'\g<1>' + target_name + r'\g<2>', html)
+        target_path = dist_dir / page_name
+        target_path.write_bytes(html.encode('utf-8'))
+        write_precompressed(target_path, html.encode('utf-8'))
+        manifest['sources'][page_name] = static_assets.content_digest(raw)
+        print(f"  📄 {page_name}: 已改写资源引用")
+
+    with open(dist_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    return manifest
+
+
+def main():
+    """主函数"""
+    print("🎨 QuirkLog 前端资源构建")
+    print("=" * 40)
+    try:
+        build()
+    except Exception as e:
+        print(f"❌ 前端资源构建失败: {e}")
+        return False
+    print(f"✅ 构建完成，输出目录: {DIST_DIR}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog 变更日志
+为每个存储维护一个带单调递增版本号的变更日志：每次保存（或启动对账时发现的
+新增、修改、删除）都分配一个新版本。客户端记住上次同步到的版本，
+GET /api/sync?since=<版本> 只返回此后变化的日期，同步开销取决于变化量而不是记录总数。
+
+日志文件保存在数据目录中，头部带随机的日志ID；日志被删除或重建后ID改变，
+客户端据此判断需要全量同步。
+"""
+
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import process_lock
+import record_store
+
+
+# 日志文件名（保存在数据目录中，以点开头避免被当作记录文件）
+CHANGE_LOG_FILENAME = '.quirklog_changes.jsonl'
+CHANGE_LOG_VERSION = 1
+
+# 日志行数超过有效条目数的该倍数时压缩日志文件
+COMPACT_RATIO = 2
+
+
+class ChangeLog:
+    """单个存储的变更日志
+
+    日志文件为追加写入的JSON Lines：首行为头部，其后每行是一个日期的最新版本
+    （同一日期以最后一行为准）。内存中按版本顺序保存每个日期的最新条目，
+    查询某版本之后的变化只需从末尾向前遍历变化的部分。
+
+    多进程模式下各进程共用数据目录锁（lock）分配版本号，其他进程写过日志文件后重新加载。
+    日志文件未变化时查询只持有进程内的锁；加锁顺序总是先 lock 后进程内的锁。
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.log_path = Path(store.save_directory) / CHANGE_LOG_FILENAME
+        self.lock = process_lock.get_lock(store.save_directory)
+        self._mutex = threading.RLock()
+        self._log_id = None
+        self._entries = OrderedDict()
+        self._version = 0
+        self._journal_lines = 0
+        self._file_version = None
+        self._loaded = False
+
+    @property
+    def log_id(self):
+        self.ensure_loaded()
+        with self._mutex:
+            return self._log_id
+
+    @property
+    def version(self):
+        self.ensure_loaded()
+        with self._mutex:
+            return self._version
+
+    # ---- 内存状态 ----
+
+    def _apply(self, item):
+        """应用一行日志（版本号必须递增）"""
+        self._entries.pop(item['date'], None)
+        self._entries[item['date']] = item
+        self._version = max(self._version, item['version'])
+
+    def _next(self, date, modified=None, deleted=False):
+        """为日期分配新版本，返回日志条目"""
+        item = {'date': date, 'version': self._version + 1, 'modified': modified}
+        if deleted:
+            item['deleted'] = True
+        self._apply(item)
+        return item
+
+    # ---- 持久化 ----
+
+    def _header(self):
+        return {'version': CHANGE_LOG_VERSION, 'engine': self.store.engine, 'logId': self._log_id}
+
+    def _load_from_disk(self):
+        """读取日志文件，头部不匹配或文件损坏时返回False"""
+        try:
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return False
+
+        try:
+            header = json.loads(lines[0])
+            if (header.get('version') != CHANGE_LOG_VERSION or
+                    header.get('engine') != self.store.engine or not header.get('logId')):
+                return False
+            self._log_id = header['logId']
+            self._version = header.get('baseVersion', 0)
+            for line in lines[1:]:
+                self._apply(json.loads(line))
+        except (ValueError, KeyError, IndexError):
+            self._reset()
+            return False
+
+        self._journal_lines = len(lines) - 1
+        self._file_version = process_lock.file_version(self.log_path)
+        return True
+
+    def _reset(self):
+        self._log_id = None
+        self._entries = OrderedDict()
+        self._version = 0
+        self._journal_lines = 0
+
+    def _write_snapshot(self):
+        # 压缩后仍保留当前版本号，已删除日期的墓碑也需要保留，客户端才能得知删除
+        header = dict(self._header(), baseVersion=self._version)
+        lines = [json.dumps(header)]
+        lines.extend(json.dumps(item, ensure_ascii=False) for item in self._entries.values())
+        with open(self.log_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        self._journal_lines = len(self._entries)
+        self._file_version = process_lock.file_version(self.log_path)
+
+    def _persist(self, items):
+        """追加若干行变化，日志过长时压缩"""
+        try:
+            if (not self.log_path.exists() or
+                    self._journal_lines + len(items) >= COMPACT_RATIO * max(len(self._entries), 16)):
+                self._write_snapshot()
+                return
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                for item in items:
+                    f.write(json.dumps(item, ensure_ascii=False) + '\n')
+            self._journal_lines += len(items)
+            self._file_version = process_lock.file_version(self.log_path)
+        except OSError as e:
+            print(f"⚠️ 写入变更日志失败: {e}")
+
+    def _reconcile(self, skip=None):
+        """与存储中的记录对账，为日志之外发生的新增、修改和删除分配版本
+
+        skip 为正在记录保存的日期，由 record_saved 随后分配版本，对账时跳过，
+        否则一次保存会分配两个版本。
+        """
+        entries, _, _ = self.store.query(fields=['date', 'modified'])
+        current = {entry['date']: entry['modified'] for entry in entries}
+        changes = []
+        for date, item in list(self._entries.items()):
+            if date != skip and date not in current and not item.get('deleted'):
+                changes.append(self._next(date, deleted=True))
+        for date in sorted(current):
+            if date == skip:
+                continue
+            item = self._entries.get(date)
+            if item is None or item.get('deleted') or item['modified'] != current[date]:
+                changes.append(self._next(date, current[date]))
+        if changes:
+            print(f"🔁 变更日志已记录 {len(changes)} 处变化")
+            self._persist(changes)
+
+    def _is_fresh(self):
+        return self._loaded and process_lock.file_version(self.log_path) == self._file_version
+
+    def ensure_loaded(self, saving=None):
+        """首次使用时（或其他进程写过日志文件后）加载日志文件并与存储对账
+
+        saving 为调用方（record_saved）正在记录保存的日期，对账时跳过。
+        """
+        with self._mutex:
+            if self._is_fresh():
+                return
+        with self.lock, self._mutex:
+            if self._is_fresh():
+                return
+            self._reset()
+            if not self._load_from_disk():
+                self._reset()
+                self._log_id = uuid.uuid4().hex
+                try:
+                    self.log_path.unlink()
+                except OSError:
+                    pass
+            if Path(self.store.save_directory).exists():
+                self._reconcile(skip=saving)
+            self._loaded = True
+
+    def record_saved(self, date):
+        """记录保存后分配新版本，返回版本号（日期无效时抛出 ValueError，不分配版本）"""
+        record_store.validate_date(date)
+        with self.lock, self._mutex:
+            self.ensure_loaded(saving=date)
+            entries, _, _ = self.store.query(date, date, fields=['modified'])
+            item = self._next(date, entries[0]['modified'] if entries else None)
+            self._persist([item])
+            return item['version']
+
+    # ---- 查询 ----
+
+    def version_of(self, date):
+        """返回日期的当前版本，从未出现过时返回0"""
+        self.ensure_loaded()
+        with self._mutex:
+            item = self._entries.get(date)
+            return item['version'] if item else 0
+
+    def changes_since(self, since):
+        """返回版本号大于 since 的条目（每个日期只返回最新版本，按版本升序）
+
+        Returns:
+            tuple: (条目列表, 当前版本号)
+        """
+        self.ensure_loaded()
+        with self._mutex:
+            changes = []
+            for item in reversed(self._entries.values()):
+                if item['version'] <= since:
+                    break
+                changes.append(dict(item))
+            return changes[::-1], self._version
+
+
+# 进程级日志注册表，每个存储实例对应一个变更日志
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_change_log(store):
+    """获取（必要时创建）指定存储的变更日志"""
+    with _logs_lock:
+        log = _logs.get(id(store))
+        if log is None or log.store is not store:
+            log = ChangeLog(store)
+            _logs[id(store)] = log
+        return log
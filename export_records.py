@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog 记录导出工具
+以 NDJSON（每行一条完整记录）或 CSV（每行一个计划或反思条目）流式导出全部记录，
+内存占用与记录数量无关。Web服务器的 /api/export 接口也使用这里的生成器。
+
+用法:
+    python export_records.py                          # NDJSON 输出到标准输出
+    python export_records.py --format csv -o all.csv  # CSV 写入文件
+    python export_records.py --from 2025-01-01 --to 2025-12-31 -o 2025.ndjson
+"""
+
+import csv
+import io
+import json
+import sys
+from datetime import datetime
+
+import record_store
+import settings_store
+
+
+# 支持的导出格式: 格式 → (Content-Type, 文件扩展名)
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson; charset=utf-8', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+}
+
+# 每个输出块累积到该大小后再写出，减少系统调用次数
+CHUNK_SIZE = 64 * 1024
+
+# CSV 列
+CSV_COLUMNS = ['date', 'kind', 'position', 'event', 'importance', 'urgency',
+               'startTime', 'duration', 'completed', 'content']
+
+
+def iter_ndjson(records):
+    """把 (日期, 记录) 序列转换为NDJSON行"""
+    for _, record in records:
+        yield json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def iter_csv_rows(date, record):
+    """把一条记录展开为CSV行：每个计划、每条反思各占一行"""
+    for plan in record_store.iter_plans(date, record):
+        yield {
+            'date': date,
+            'kind': 'plan',
+            'position': plan['position'],
+            'event': plan.get('event', ''),
+            'importance': plan.get('importance', ''),
+            'urgency': plan.get('urgency', ''),
+            'startTime': plan.get('startTime', ''),
+            'duration': plan.get('duration', ''),
+            'completed': 'true' if plan.get('completed') else 'false',
+        }
+
+    reflection = record.get('reflection') or {}
+    for kind in ('progress', 'improvements', 'gratitude'):
+        for position, content in enumerate(reflection.get(kind) or []):
+            if content:
+                yield {'date': date, 'kind': kind, 'position': position, 'content': content}
+    if reflection.get('dailyThoughts'):
+        yield {'date': date, 'kind': 'dailyThoughts', 'position': 0,
+               'content': reflection['dailyThoughts']}
+
+
+def iter_csv(records):
+    """把 (日期, 记录) 序列转换为CSV文本（带BOM，便于Excel识别UTF-8）"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+    buffer.write('\ufeff')
+    writer.writeheader()
+    for date, record in records:
+        for row in iter_csv_rows(date, record):
+            writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def iter_export(store, export_format='ndjson', date_from=None, date_to=None,
+                chunk_size=CHUNK_SIZE):
+    """按指定格式流式产出导出内容（UTF-8字节块）"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {export_format}")
+    records = store.iter_records(date_from, date_to)
+    lines = iter_ndjson(records) if export_format == 'ndjson' else iter_csv(records)
+
+    pending = []
+    pending_size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        pending.append(data)
+        pending_size += len(data)
+        if pending_size >= chunk_size:
+            yield b''.join(pending)
+            pending = []
+            pending_size = 0
+    if pending:
+        yield b''.join(pending)
+
+
+def export_filename(export_format, date_from=None, date_to=None):
+    """生成下载文件名"""
+    span = '_'.join(part for part in (date_from, date_to) if part) or 'all'
+    return f"quirklog_export_{span}.{EXPORT_FORMATS[export_format][1]}"
+
+
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='QuirkLog 记录导出工具')
+    parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ndjson',
+                        help='导出格式（默认 ndjson）')
+    parser.add_argument('--from', dest='date_from', help='起始日期（含），YYYY-MM-DD')
+    parser.add_argument('--to', dest='date_to', help='结束日期（含），YYYY-MM-DD')
+    parser.add_argument('-o', '--output', help='输出文件，默认写到标准输出')
+    args = parser.parse_args(argv)
+    for value in (args.date_from, args.date_to):
+        if value:
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                parser.error(f"无效的日期: {value}")
+    return args
+
+
+def main(argv=None):
+    """主函数"""
+    args = parse_args(argv)
+    store = record_store.store_from_settings(settings_store.load_settings())
+    chunks = iter_export(store, args.format, args.date_from, args.date_to)
+
+    if args.output:
+        written = 0
+        with open(args.output, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        print(f"✅ 已导出到 {args.output}（{written} 字节）", file=sys.stderr)
+    else:
+        for chunk in chunks:
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog 历史记录索引
+在保存目录中维护一个 日期 → 文件 的持久化索引，避免每次列出历史时扫描整个目录。
+同时支持平铺布局和按 YYYY/MM/ 分片的布局。
+"""
+
+import bisect
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import month_archive
+import process_lock
+
+
+# 索引文件名（保存在数据目录中，以点开头避免被当作记录文件）
+INDEX_FILENAME = '.quirklog_index.jsonl'
+INDEX_VERSION = 2
+
+# 记录文件的目录布局：flat 直接放在保存目录中，sharded 按 YYYY/MM/ 分目录存放
+LAYOUTS = ('flat', 'sharded')
+DEFAULT_LAYOUT = 'flat'
+
+# 分片布局中的年、月目录名
+YEAR_DIR_RE = re.compile(r'^\d{4}$')
+MONTH_DIR_RE = re.compile(r'^\d{2}$')
+
+# 日志行数超过有效条目数的该倍数时压缩索引文件
+COMPACT_RATIO = 2
+
+
+def extract_date_from_filename(filename, naming_pattern):
+    """从文件名中提取日期"""
+    try:
+        # 移除模式中的 {date} 部分，获取前缀和后缀
+        if '{date}' not in naming_pattern:
+            return None
+
+        prefix, suffix = naming_pattern.split('{date}', 1)
+
+        # 从文件名中提取日期部分
+        if prefix and not filename.startswith(prefix):
+            return None
+        if suffix and not filename.endswith(suffix):
+            return None
+
+        # 提取日期字符串
+        start_pos = len(prefix)
+        end_pos = len(filename) - len(suffix) if suffix else len(filename)
+        date_str = filename[start_pos:end_pos]
+
+        # 验证日期格式 (YYYY-MM-DD)
+        if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
+            # 尝试解析日期以验证有效性
+            datetime.strptime(date_str, '%Y-%m-%d')
+            return date_str
+
+        return None
+
+    except Exception:
+        return None
+
+
+def shard_dir(date):
+    """返回日期在分片布局中的相对目录 YYYY/MM，日期无效时返回None"""
+    try:
+        datetime.strptime(date, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None
+    return f"{date[:4]}/{date[5:7]}"
+
+
+def shard_of(filename):
+    """返回相对文件名所在的分片（保存目录本身为空字符串）"""
+    return filename.rpartition('/')[0]
+
+
+def shard_parents(shard):
+    """返回分片及其各级上级分片，如 2025/01 → ['', '2025', '2025/01']"""
+    parents = ['']
+    parts = shard.split('/') if shard else []
+    for i in range(len(parts)):
+        parents.append('/'.join(parts[:i + 1]))
+    return parents
+
+
+def paginate_dates(dates, date_from=None, date_to=None, limit=None, cursor=None):
+    """在升序排列的日期列表上做范围过滤和倒序分页
+
+    Returns:
+        tuple: (本页日期列表（倒序）, 下一页游标或None, 日期范围内的条目总数)
+    """
+    lo = bisect.bisect_left(dates, date_from) if date_from else 0
+    hi = bisect.bisect_right(dates, date_to) if date_to else len(dates)
+    total = max(0, hi - lo)
+
+    if cursor:
+        hi = min(hi, bisect.bisect_left(dates, cursor))
+    start = lo if limit is None else max(lo, hi - limit)
+
+    page = dates[start:hi][::-1] if hi > start else []
+    next_cursor = dates[start] if start > lo else None
+    return page, next_cursor, total
+
+
+def project_fields(entry, fields):
+    """只保留指定字段，fields 为空时返回原条目"""
+    if fields:
+        return {key: entry[key] for key in fields if key in entry}
+    return entry
+
+
+class HistoryIndex:
+    """单个保存目录的历史记录索引
+
+    记录文件可以直接放在保存目录中（flat 布局），也可以按 YYYY/MM/ 分片存放
+    （sharded 布局），两种布局可以同时存在。保存目录、每个年目录和月目录都是
+    一个"分片"，索引记录每个分片的mtime：查询时只检查与日期范围相交的分片，
+    mtime 变化的分片单独重新扫描，其余分片不受影响。
+
+    索引文件为追加写入的JSON Lines：首行为头部（含各分片的mtime），其后每行是
+    一个条目的最新状态（同一文件以最后一行为准），并带有写入时更新的分片mtime。
+    追加和原地覆盖都不会改变目录mtime，所以索引文件自身的写入不会
+    导致下次启动时误判。
+
+    lock 是数据目录的进程间锁（见 process_lock），写入、重新加载和重新扫描时持有；
+    只读的查询通过 stat 检查索引文件和分片目录是否变化，仍然有效时只持有进程内的锁，
+    多个工作进程的读取互不阻塞。加锁顺序总是先 lock 后进程内的锁。
+    """
+
+    def __init__(self, save_directory, file_naming):
+        self.save_path = Path(save_directory)
+        self.file_naming = file_naming
+        self.index_path = self.save_path / INDEX_FILENAME
+        self.lock = process_lock.get_lock(save_directory)
+        self._mutex = threading.RLock()
+        self._entries = {}
+        self._dates = []
+        self._shard_entries = {}
+        self._shard_mtimes = {}
+        self._journal_lines = 0
+        self._index_version = None
+        self._loaded = False
+
+    def _mtime(self, shard):
+        """返回分片目录的mtime，目录不存在时返回None"""
+        try:
+            return (self.save_path / shard).stat().st_mtime_ns
+        except OSError:
+            return None
+
+    # ---- 分片 ----
+
+    def _scan_shard(self, shard):
+        """扫描一个分片目录，返回 (条目, 子分片列表)"""
+        entries = {}
+        children = []
+        directory = self.save_path / shard
+        child_re = YEAR_DIR_RE if not shard else MONTH_DIR_RE
+        depth = shard.count('/') + 1 if shard else 0
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return entries, children
+
+        for name in names:
+            file_path = directory / name
+            if depth < 2 and child_re.match(name) and file_path.is_dir():
+                children.append(f"{shard}/{name}" if shard else name)
+                continue
+            if (depth == 1 or not name.endswith('.json')):
+                continue
+            try:
+                date = extract_date_from_filename(file_path.stem, self.file_naming)
+                if date:
+                    stat = file_path.stat()
+                    entries[date] = {
+                        'date': date,
+                        'filename': f"{shard}/{name}" if shard else name,
+                        'size': stat.st_size,
+                        'modified': stat.st_mtime
+                    }
+            except Exception as e:
+                print(f"处理文件 {file_path} 时出错: {e}")
+                continue
+
+        # 月度归档位于保存目录中（同一日期的JSON文件更新，优先使用）
+        if not shard:
+            for month, archive_path in sorted(month_archive.list_archives(directory).items()):
+                try:
+                    for date, size, modified in month_archive.read_entries(archive_path):
+                        entries.setdefault(date, {
+                            'date': date,
+                            'filename': archive_path.name,
+                            'size': size,
+                            'modified': modified
+                        })
+                except Exception as e:
+                    print(f"处理归档 {archive_path} 时出错: {e}")
+        return entries, children
+
+    def _refresh_shard(self, shard):
+        """重新扫描分片，新出现的子分片一并扫描，消失的子分片连同其下级移除"""
+        mtime = self._mtime(shard)
+        if mtime is None:
+            self._drop_shard(shard)
+            return
+        entries, children = self._scan_shard(shard)
+        self._shard_entries[shard] = entries
+        self._shard_mtimes[shard] = mtime
+
+        prefix = f"{shard}/" if shard else ''
+        for known in [known for known in self._shard_mtimes
+                      if known != shard and known.startswith(prefix) and
+                      known.count('/') == prefix.count('/') and known not in children]:
+            self._drop_shard(known)
+        for child in children:
+            if child not in self._shard_mtimes:
+                self._refresh_shard(child)
+
+    def _drop_shard(self, shard):
+        prefix = f"{shard}/"
+        for known in [known for known in self._shard_mtimes
+                      if known == shard or known.startswith(prefix)]:
+            self._shard_mtimes.pop(known, None)
+            self._shard_entries.pop(known, None)
+
+    def _stale_shards(self, date_from=None, date_to=None):
+        """返回与日期范围相交且mtime已变化的分片（保存目录总是检查）"""
+        stale = []
+        if self._mtime('') != self._shard_mtimes.get(''):
+            stale.append('')
+        low = date_from or ''
+        high = date_to or '9999-99-99'
+        for shard in sorted(self._shard_mtimes):
+            if not shard or not (low[:len(shard)] <= shard.replace('/', '-') <= high[:len(shard)]):
+                continue
+            if self._mtime(shard) != self._shard_mtimes[shard]:
+                stale.append(shard)
+        return stale
+
+    # ---- 合并 ----
+
+    @staticmethod
+    def _preferred(current, candidate):
+        """同一日期出现在多处时的取舍：JSON文件优先于归档，多个JSON文件取较新的"""
+        if current is None:
+            return candidate
+        current_archived = month_archive.archive_month(current['filename']) is not None
+        candidate_archived = month_archive.archive_month(candidate['filename']) is not None
+        if current_archived != candidate_archived:
+            return current if candidate_archived else candidate
+        return candidate if candidate['modified'] > current['modified'] else current
+
+    def _merge(self):
+        """由各分片的条目重建按日期的索引"""
+        entries = {}
+        for shard_entries in self._shard_entries.values():
+            for date, item in shard_entries.items():
+                entries[date] = self._preferred(entries.get(date), item)
+        self._entries = entries
+        self._dates = sorted(entries)
+
+    def _merge_date(self, date):
+        """重新选出单个日期的条目"""
+        best = None
+        for shard_entries in self._shard_entries.values():
+            item = shard_entries.get(date)
+            if item is not None:
+                best = self._preferred(best, item)
+        if best is None:
+            if self._entries.pop(date, None) is not None:
+                del self._dates[bisect.bisect_left(self._dates, date)]
+            return
+        if date not in self._entries:
+            bisect.insort(self._dates, date)
+        self._entries[date] = best
+
+    # ---- 持久化 ----
+
+    def _load_from_disk(self):
+        """尝试读取持久化索引，成功时返回True（与目录的对账由调用方完成）"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return False
+
+        try:
+            header = json.loads(lines[0])
+            if (header.get('version') != INDEX_VERSION or
+                    header.get('fileNaming') != self.file_naming):
+                return False
+
+            shard_entries = {}
+            shard_mtimes = dict(header['shards'])
+            for line in lines[1:]:
+                item = json.loads(line)
+                shard_mtimes.update(item.pop('shards', {}))
+                entries = shard_entries.setdefault(shard_of(item['filename']), {})
+                if item.pop('deleted', False):
+                    entries.pop(item['date'], None)
+                else:
+                    entries[item['date']] = item
+        except (ValueError, KeyError, IndexError, TypeError):
+            # 索引文件损坏（例如写入中途退出），重新扫描即可
+            return False
+
+        self._shard_entries = {shard: shard_entries.get(shard, {}) for shard in shard_mtimes}
+        self._shard_mtimes = shard_mtimes
+        self._journal_lines = len(lines) - 1
+        self._index_version = process_lock.file_version(self.index_path)
+        return True
+
+    def _write_snapshot(self):
+        """原地重写整个索引文件"""
+        # 首次创建文件会改变保存目录的mtime，因此先创建再读取mtime
+        if not self.index_path.exists():
+            self.index_path.touch()
+            self._shard_mtimes[''] = self._mtime('')
+
+        header = {
+            'version': INDEX_VERSION,
+            'fileNaming': self.file_naming,
+            'shards': self._shard_mtimes
+        }
+        lines = [json.dumps(header, ensure_ascii=False)]
+        count = 0
+        for shard in sorted(self._shard_entries):
+            for date in sorted(self._shard_entries[shard]):
+                lines.append(json.dumps(self._shard_entries[shard][date], ensure_ascii=False))
+                count += 1
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        self._journal_lines = count
+        self._index_version = process_lock.file_version(self.index_path)
+
+    def _persist_change(self, items, shard_mtimes):
+        """持久化若干条目的变化（最后一行附带更新的分片mtime），日志过长时压缩"""
+        try:
+            if (not self.index_path.exists() or
+                    self._journal_lines >= COMPACT_RATIO * max(len(self._dates), 16)):
+                self._write_snapshot()
+                return
+            lines = [dict(item) for item in items]
+            lines[-1]['shards'] = shard_mtimes
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                for line in lines:
+                    f.write(json.dumps(line, ensure_ascii=False) + '\n')
+            self._journal_lines += len(lines)
+            self._index_version = process_lock.file_version(self.index_path)
+        except OSError as e:
+            print(f"⚠️ 写入历史索引失败: {e}")
+            # 下次查询时重新扫描保存目录
+            self._shard_mtimes.pop('', None)
+
+    def rebuild(self):
+        """重新扫描全部分片并重写索引"""
+        with self.lock, self._mutex:
+            self._shard_entries = {}
+            self._shard_mtimes = {}
+            self._refresh_shard('')
+            self._merge()
+            self._save_snapshot()
+            self._loaded = True
+
+    def _save_snapshot(self):
+        if '' not in self._shard_mtimes:
+            return
+        try:
+            self._write_snapshot()
+        except OSError as e:
+            print(f"⚠️ 写入历史索引失败: {e}")
+            self._shard_mtimes.pop('', None)
+
+    def _is_fresh(self, date_from=None, date_to=None):
+        return (self._loaded and
+                process_lock.file_version(self.index_path) == self._index_version and
+                not self._stale_shards(date_from, date_to))
+
+    def ensure_fresh(self, date_from=None, date_to=None):
+        """保证内存索引与目录一致：首次使用时加载，只重新扫描与日期范围相交且被修改过的分片
+
+        索引仍然有效时不获取进程间锁；需要加载或扫描时先获取进程间锁，
+        避免读到其他进程写了一半的索引文件。
+        """
+        with self._mutex:
+            if self._is_fresh(date_from, date_to):
+                return
+        with self.lock, self._mutex:
+            # 首次使用，或其他进程更新了索引文件
+            if (not self._loaded or
+                    process_lock.file_version(self.index_path) != self._index_version):
+                self._loaded = True
+                if not self._load_from_disk():
+                    self.rebuild()
+                    return
+                self._merge()
+            stale = self._stale_shards(date_from, date_to)
+            if not stale:
+                return
+            for shard in stale:
+                self._refresh_shard(shard)
+            self._merge()
+            self._save_snapshot()
+
+    def record_saved(self, date, file_path):
+        """记录文件保存后更新索引
+
+        调用方应持有 lock，并在写文件前调用 ensure_fresh()，
+        这样本次写入引起的目录mtime变化不会触发分片重新扫描。
+        """
+        with self.lock, self._mutex:
+            if not self._loaded:
+                self.ensure_fresh()
+            file_path = Path(file_path)
+            filename = file_path.relative_to(self.save_path).as_posix()
+            shard = shard_of(filename)
+            stat = file_path.stat()
+            item = {
+                'date': date,
+                'filename': filename,
+                'size': stat.st_size,
+                'modified': stat.st_mtime
+            }
+
+            # 另一种布局下的同日文件已被移除
+            items = []
+            touched = {shard}
+            for other, entries in self._shard_entries.items():
+                old = entries.get(date)
+                if (other != shard and old is not None and
+                        not month_archive.archive_month(old['filename']) and
+                        not (self.save_path / old['filename']).exists()):
+                    del entries[date]
+                    items.append({'date': date, 'filename': old['filename'], 'deleted': True})
+                    touched.add(other)
+            items.append(item)
+
+            self._shard_entries.setdefault(shard, {})[date] = item
+            shard_mtimes = {}
+            for touched_shard in touched:
+                for parent in shard_parents(touched_shard):
+                    shard_mtimes[parent] = self._mtime(parent)
+                    self._shard_entries.setdefault(parent, {})
+            self._shard_mtimes.update(shard_mtimes)
+            self._merge_date(date)
+            self._persist_change(items, shard_mtimes)
+
+    def list_entries(self):
+        """按日期倒序返回全部条目"""
+        self.ensure_fresh()
+        with self._mutex:
+            return [self._entry_view(self._entries[date])
+                    for date in reversed(self._dates)]
+
+    def query(self, date_from=None, date_to=None, limit=None, cursor=None, fields=None):
+        """按日期倒序查询条目
+
+        Args:
+            date_from: 起始日期（含），YYYY-MM-DD
+            date_to: 结束日期（含），YYYY-MM-DD
+            limit: 最多返回的条目数，None 表示不限
+            cursor: 上一页返回的 nextCursor，只返回早于该日期的条目
+            fields: 需要返回的字段列表，None 表示全部字段
+
+        Returns:
+            tuple: (条目列表, 下一页游标或None, 日期范围内的条目总数)
+        """
+        self.ensure_fresh(date_from, date_to)
+        with self._mutex:
+            page_dates, next_cursor, total = paginate_dates(
+                self._dates, date_from, date_to, limit, cursor)
+            page = [self._entry_view(self._entries[date], fields) for date in page_dates]
+            return page, next_cursor, total
+
+    def _entry_view(self, item, fields=None):
+        """返回带完整路径的条目副本，可只保留指定字段"""
+        entry = dict(item)
+        entry['path'] = str(self.save_path / item['filename'])
+        return project_fields(entry, fields)
+
+
+# 进程级索引注册表，按 (保存目录, 命名格式) 区分
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(save_directory, file_naming):
+    """获取（必要时创建）指定保存目录的索引"""
+    key = (os.path.abspath(save_directory), file_naming)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = HistoryIndex(save_directory, file_naming)
+            _indexes[key] = index
+        return index
@@ -9,12 +9,12 @@ import sys
 from datetime import datetime
 
 
-def run_web_version():
-    """运行Web版本"""
+def run_web_version(background_task=None):
+    """运行Web版本（background_task 在服务器启动时于处理请求的进程中运行）"""
     print("🌐 启动Web版本...")
     try:
         import web_server
-        web_server.main()
+        web_server.main(background_task)
     except Exception as e:
         print(f"❌ Web版本启动失败: {e}")
         return False
@@ -41,9 +41,9 @@ def main():
     # 检查命令行参数
     if len(sys.argv) > 1:
         if sys.argv[1] == "--web" or sys.argv[1] == "-w":
-            if run_web_version():
-                # 启动后在后台运行定时任务
-                start_weekly_task_background()
+            # Web服务器会一直阻塞，定时任务由服务器启动时在后台运行
+            # （多进程模式下在第一个工作进程中，洞察事件才能推送给客户端）
+            run_web_version(start_weekly_task_background)
             return
         elif sys.argv[1] == "--task" or sys.argv[1] == "-t":
             print("⏰ 启动定时任务管理器...")
@@ -58,17 +58,20 @@ def main():
             print("  python launcher.py         # 启动Web版本")
             print("  python launcher.py --web   # 启动Web版本")
             print("  python launcher.py --task  # 启动定时任务管理器")
+            print("  python launcher.py --web --engine asyncio  # 使用asyncio服务器启动Web版本")
+            print("  python launcher.py --web --workers 4       # 以4个工作进程启动Web版本")
             print("  python launcher.py --help  # 显示帮助信息")
             print("\n功能说明:")
             print("  - Web版本: 现代化浏览器界面，支持计划管理和总结功能")
             print("  - 定时任务: AI每周洞察自动生成，需要配置OpenRouter API")
+            print("  - asyncio服务器: 单线程事件循环，适合大量空闲连接和耗时的AI请求")
+            print("  - 多进程模式: 多个工作进程共享端口，CPU密集的请求可同时用满多个核心")
             return
     
     # 默认启动Web版本
     print("🚀 正在启动应用程序...")
-    if run_web_version():
-        # 在后台启动定时任务
-        start_weekly_task_background()
+    # 定时任务只在执行时才导入openai，启动时不会拖慢Web服务
+    run_web_version(start_weekly_task_background)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog 实时事件
+进程内的事件总线：保存记录、修改设置、生成每周洞察时发布一条小事件，
+前端通过 GET /api/events（Server-Sent Events）订阅，增量更新侧边栏，
+不需要轮询或重新下载完整的历史列表。
+
+每个事件带单调递增的编号；断线重连的客户端通过 Last-Event-ID 补发
+缓冲区中错过的事件，缓冲区已覆盖不到时收到 resync 事件并自行全量刷新。
+"""
+
+import json
+import threading
+import time
+from collections import deque
+
+
+# 事件类型
+RECORD_SAVED = 'record-saved'
+SETTINGS_CHANGED = 'settings-changed'
+WEEKLY_INSIGHT = 'weekly-insight'
+RESYNC = 'resync'
+
+# 保留最近的事件数，用于断线重连后补发
+EVENT_BUFFER_SIZE = 256
+
+# 心跳间隔（秒）：没有事件时发送注释行，保持连接并及时发现断开的客户端
+HEARTBEAT_INTERVAL = 15
+
+# 单个连接的最长持续时间（秒），到期后由客户端自动重连，避免长期占用服务器线程
+MAX_STREAM_SECONDS = 300
+
+# 同时订阅的连接数上限（每个连接占用一个服务器线程）
+MAX_SUBSCRIBERS = 8
+
+# 建议客户端的重连间隔（毫秒）
+RETRY_MS = 3000
+
+EVENT_STREAM_CONTENT_TYPE = 'text/event-stream; charset=utf-8'
+
+
+def format_event(event_type, data, event_id=None):
+    """编码为一条SSE消息"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event_type}')
+    lines.append(f'data: {json.dumps(data, ensure_ascii=False)}')
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+class EventBus:
+    """线程安全的事件总线"""
+
+    def __init__(self, buffer_size=EVENT_BUFFER_SIZE, max_subscribers=MAX_SUBSCRIBERS):
+        self.max_subscribers = max_subscribers
+        self._condition = threading.Condition()
+        self._events = deque(maxlen=buffer_size)
+        self._last_id = 0
+        self._subscribers = 0
+
+    @property
+    def last_id(self):
+        with self._condition:
+            return self._last_id
+
+    @property
+    def subscribers(self):
+        with self._condition:
+            return self._subscribers
+
+    def publish(self, event_type, data):
+        """发布事件，返回事件编号"""
+        with self._condition:
+            self._last_id += 1
+            self._events.append((self._last_id, event_type, data))
+            self._condition.notify_all()
+            return self._last_id
+
+    def _events_after(self, event_id):
+        """返回编号大于 event_id 的事件；缓冲区已不包含全部错过的事件时返回None"""
+        if event_id >= self._last_id:
+            return []
+        if not self._events or self._events[0][0] > event_id + 1:
+            return None
+        return [event for event in self._events if event[0] > event_id]
+
+    def wait(self, event_id, timeout):
+        """等待编号大于 event_id 的事件，超时返回空列表，事件已丢失时返回None"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._last_id > event_id, timeout)
+            return self._events_after(event_id)
+
+    def subscribe(self, last_event_id=None, heartbeat=HEARTBEAT_INTERVAL,
+                  max_seconds=MAX_STREAM_SECONDS):
+        """开始订阅，返回 EventStream；连接数已达上限时返回None"""
+        with self._condition:
+            if self._subscribers >= self.max_subscribers:
+                return None
+            self._subscribers += 1
+        return EventStream(self, last_event_id, heartbeat, max_seconds)
+
+    def _release(self):
+        with self._condition:
+            self._subscribers -= 1
+
+
+class EventStream:
+    """单个订阅连接的字节流（可迭代），结束或 close() 时释放订阅名额"""
+
+    def __init__(self, bus, last_event_id, heartbeat, max_seconds):
+        self.bus = bus
+        self.heartbeat = heartbeat
+        self.max_seconds = max_seconds
+        self._closed = False
+        # 在订阅时（而不是第一次读取时）确定起点，之间发布的事件不会丢失
+        self._start_id = bus.last_id
+        self._chunks = self._generate(last_event_id)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            self.close()
+            raise
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            try:
+                self._chunks.close()
+            except ValueError:
+                # 生成器正在其他线程中等待事件，等待结束后自然退出
+                pass
+            self.bus._release()
+
+    def _generate(self, last_event_id):
+        current = self._start_id
+        yield f'retry: {RETRY_MS}\n\n'.encode('ascii')
+
+        # 没有 Last-Event-ID 的新连接只接收此后的事件；编号超前说明服务器重启过
+        cursor = current if last_event_id is None else last_event_id
+        if cursor > current:
+            yield format_event(RESYNC, {"reason": "restarted"}, current)
+            cursor = current
+
+        deadline = time.monotonic() + self.max_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            events = self.bus.wait(cursor, min(self.heartbeat, remaining))
+            if events is None:
+                cursor = self.bus.last_id
+                yield format_event(RESYNC, {"reason": "missed"}, cursor)
+            elif not events:
+                yield b': ping\n\n'
+            else:
+                for event_id, event_type, data in events:
+                    yield format_event(event_type, data, event_id)
+                cursor = events[-1][0]
+
+
+def parse_last_event_id(value):
+    """解析 Last-Event-ID 请求头，无效时返回None"""
+    try:
+        event_id = int((value or '').strip())
+    except ValueError:
+        return None
+    return event_id if event_id >= 0 else None
+
+
+# 进程级事件总线
+bus = EventBus()
+
+
+def publish(event_type, data):
+    """发布事件（失败不影响调用方）"""
+    try:
+        return bus.publish(event_type, data)
+    except Exception as e:
+        print(f"⚠️ 发布实时事件失败: {e}")
+        return None
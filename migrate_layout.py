@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog 目录布局迁移工具
+在平铺布局（记录文件直接放在保存目录中）和分片布局（按 YYYY/MM/ 分目录存放）
+之间移动记录文件，并更新 settings.xml 中的 general/directoryLayout。
+
+迁移只重命名文件，不改变内容和修改时间，变更日志和搜索索引不会因此产生新版本。
+迁移前后读取都兼容两种布局，迁移中途中断也不会丢失记录，重新运行即可完成。
+
+用法:
+    python migrate_layout.py --to sharded     # 迁移到 YYYY/MM/ 分片布局
+    python migrate_layout.py --to flat        # 迁移回平铺布局
+    python migrate_layout.py --to sharded --dry-run
+"""
+
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import history_index
+import month_archive
+import record_store
+import settings_store
+
+
+def plan_files(store, layout):
+    """返回每个JSON记录文件的 (日期, 当前路径, 目标路径)（按日期升序，不含已归档的日期）"""
+    files = []
+    entries, _, _ = store.query(fields=['date', 'filename'])
+    for entry in reversed(entries):
+        if month_archive.archive_month(entry['filename']):
+            continue
+        files.append((entry['date'], store.save_path / entry['filename'],
+                      store.file_path(entry['date'], layout)))
+    return files
+
+
+def plan_moves(store, layout):
+    """返回迁移到 layout 需要移动的文件 [(原路径, 新路径)]（按日期升序）"""
+    return [(source, target) for _, source, target in plan_files(store, layout)
+            if source != target]
+
+
+def _remove_empty_dirs(store, directories):
+    """删除迁移后变空的分片目录（先月目录后年目录，不空时忽略）"""
+    shards = set()
+    for directory in directories:
+        if directory != store.save_path:
+            shards.update((directory, directory.parent))
+    for directory in sorted(shards, key=lambda path: len(path.parts), reverse=True):
+        try:
+            directory.rmdir()
+        except OSError:
+            continue
+
+
+def migrate(store, layout):
+    """把JSON存储中的记录文件迁移到指定布局，返回移动的文件数
+
+    迁移期间持有历史索引的锁，同一存储的保存会等待迁移完成；
+    同一日期在两种布局下都有文件时保留较新的一个。
+    """
+    if layout not in history_index.LAYOUTS:
+        raise ValueError(f"未知的目录布局: {layout}")
+
+    index = store.index
+    with index.lock:
+        index.ensure_fresh()
+        moved = 0
+        emptied = set()
+        for date, source, target in plan_files(store, layout):
+            # 索引中的文件是较新的一个，另一种布局下的同日文件直接删除
+            for old_path in store.candidate_paths(date):
+                if old_path not in (source, target) and old_path.exists():
+                    old_path.unlink()
+                    emptied.add(old_path.parent)
+            if source == target:
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, target)
+            emptied.add(source.parent)
+            moved += 1
+
+        _remove_empty_dirs(store, emptied)
+        store.layout = layout
+        index.rebuild()
+    return moved
+
+
+def save_layout_setting(layout):
+    """把目录布局写入 settings.xml（只修改 general/directoryLayout）"""
+    with settings_store.settings_cache.write_lock:
+        xml_file = settings_store.settings_path()
+        if not xml_file.exists():
+            import api_handlers
+            api_handlers.create_default_settings_xml()
+
+        tree = ET.parse(xml_file)
+        root = tree.getroot()
+        general = root.find('general')
+        if general is None:
+            general = ET.SubElement(root, 'general')
+        layout_elem = general.find('directoryLayout')
+        if layout_elem is None:
+            layout_elem = ET.SubElement(general, 'directoryLayout')
+        layout_elem.text = layout
+
+        tree.write(xml_file, encoding='utf-8', xml_declaration=True)
+        settings_store.settings_cache.store(root, xml_file)
+
+
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='QuirkLog 目录布局迁移工具')
+    parser.add_argument('--to', dest='layout', required=True, choices=history_index.LAYOUTS,
+                        help='目标布局: flat（平铺）或 sharded（YYYY/MM/ 分片）')
+    parser.add_argument('--dry-run', action='store_true', help='只列出将要移动的文件')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """主函数"""
+    args = parse_args(argv)
+    store = record_store.store_from_settings(settings_store.load_settings())
+    if store.engine != record_store.DEFAULT_ENGINE:
+        print(f"❌ 目录布局只适用于JSON存储，当前存储引擎为 {store.engine}", file=sys.stderr)
+        return False
+
+    if args.dry_run:
+        for source, target in plan_moves(store, args.layout):
+            print(f"{source} -> {target}")
+        return True
+
+    count = migrate(store, args.layout)
+    save_layout_setting(args.layout)
+    print(f"✅ 已迁移 {count} 个记录文件，目录布局已设置为 {args.layout}", file=sys.stderr)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog 月度归档
+把已结束月份的每日JSON文件打包为一个归档文件 records_YYYY-MM.qpack，
+减少数据目录中的文件数和逐个打开文件的开销。
+
+归档文件开头是固定大小的索引：头部（魔数、压缩方式、月份）加31个槽位，
+第 N 天的记录位于第 N 个槽位，保存 (偏移, 长度, 原始长度, CRC32, 修改时间)。
+读取时通过 mmap 映射整个文件，单日读取只需按槽位切片，与归档大小无关。
+记录体可选不压缩、gzip 或 zstd（需要安装 zstandard）。
+
+JSON存储读取时优先使用JSON文件，找不到时再查归档；修改已归档的日期会
+重新写出该天的JSON文件，下次打包时合并回归档。
+
+用法:
+    python month_archive.py                       # 打包所有已结束月份（gzip）
+    python month_archive.py --compression zstd    # 使用 zstd 压缩
+    python month_archive.py --month 2025-01       # 只打包指定月份
+    python month_archive.py --dry-run             # 只列出将要打包的月份
+"""
+
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+
+ARCHIVE_PREFIX = 'records_'
+ARCHIVE_SUFFIX = '.qpack'
+ARCHIVE_RE = re.compile(r'^records_(\d{4}-\d{2})\.qpack$')
+
+MAGIC = b'QPK1'
+HEADER = struct.Struct('>4sB7s')
+SLOT = struct.Struct('>QIIId')
+DAYS = 31
+INDEX_SIZE = HEADER.size + DAYS * SLOT.size
+
+# 压缩方式 ↔ 头部中的编码
+COMPRESSION_CODES = {'none': 0, 'gzip': 1, 'zstd': 2}
+COMPRESSION_NAMES = {code: name for name, code in COMPRESSION_CODES.items()}
+DEFAULT_COMPRESSION = 'gzip'
+
+# gzip 格式的 zlib 窗口参数
+GZIP_WBITS = 31
+
+
+def compression_setting(value):
+    """把 general/archiveMonths 设置转换为压缩方式，未开启时返回None"""
+    if value == 'true':
+        return DEFAULT_COMPRESSION
+    return value if value in COMPRESSION_CODES else None
+
+
+def archive_filename(month):
+    """返回月份（YYYY-MM）对应的归档文件名"""
+    return f"{ARCHIVE_PREFIX}{month}{ARCHIVE_SUFFIX}"
+
+
+def archive_month(filename):
+    """从归档文件名中解析月份，不是归档文件时返回None"""
+    match = ARCHIVE_RE.match(filename)
+    return match.group(1) if match else None
+
+
+def list_archives(directory):
+    """返回目录中的归档 {月份: 路径}"""
+    archives = {}
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return archives
+    for name in names:
+        month = archive_month(name)
+        if month:
+            archives[month] = Path(directory) / name
+    return archives
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("未安装zstandard库，请运行: pip install zstandard")
+    return zstandard
+
+
+def compress(data, compression):
+    """按压缩方式编码记录体"""
+    if compression == 'gzip':
+        compressor = zlib.compressobj(6, zlib.DEFLATED, GZIP_WBITS)
+        return compressor.compress(data) + compressor.flush()
+    if compression == 'zstd':
+        return _zstd().ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def decompress(data, compression, raw_length):
+    """解码记录体"""
+    if compression == 'gzip':
+        return zlib.decompress(data, GZIP_WBITS)
+    if compression == 'zstd':
+        return _zstd().ZstdDecompressor().decompress(data, max_output_size=raw_length)
+    return data
+
+
+def write_archive(path, month, records, compression=DEFAULT_COMPRESSION):
+    """写出归档文件（先写临时文件，fsync 后原子替换）
+
+    Args:
+        records: {日期: (JSON字节, 修改时间)}，日期须属于 month
+    """
+    if compression not in COMPRESSION_CODES:
+        raise ValueError(f"未知的压缩方式: {compression}")
+    slots = [(0, 0, 0, 0, 0.0)] * DAYS
+    bodies = []
+    offset = INDEX_SIZE
+    for date in sorted(records):
+        if date[:7] != month:
+            raise ValueError(f"{date} 不属于 {month}")
+        raw, modified = records[date]
+        body = compress(raw, compression)
+        slots[int(date[8:10]) - 1] = (offset, len(body), len(raw), zlib.crc32(body), modified)
+        bodies.append(body)
+        offset += len(body)
+
+    header = HEADER.pack(MAGIC, COMPRESSION_CODES[compression], month.encode('ascii'))
+    temp_path = Path(f"{path}.tmp")
+    with open(temp_path, 'wb') as f:
+        f.write(header + b''.join(SLOT.pack(*slot) for slot in slots))
+        for body in bodies:
+            f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return offset
+
+
+class MonthArchive:
+    """只读的月度归档，通过 mmap 访问"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < INDEX_SIZE:
+                raise ValueError(f"归档文件不完整: {self.path}")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.version = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+        magic, code, month = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or code not in COMPRESSION_NAMES:
+            self.close()
+            raise ValueError(f"不是有效的归档文件: {self.path}")
+        self.compression = COMPRESSION_NAMES[code]
+        self.month = month.decode('ascii')
+
+    def _slot(self, day):
+        return SLOT.unpack_from(self._map, HEADER.size + (day - 1) * SLOT.size)
+
+    def entries(self):
+        """按日期升序返回 (日期, 原始长度, 修改时间)"""
+        entries = []
+        for day in range(1, DAYS + 1):
+            _, length, raw_length, _, modified = self._slot(day)
+            if length:
+                entries.append((f"{self.month}-{day:02d}", raw_length, modified))
+        return entries
+
+    def read(self, date):
+        """返回指定日期的JSON字节，不存在时返回None"""
+        if date[:7] != self.month:
+            return None
+        offset, length, raw_length, crc, _ = self._slot(int(date[8:10]))
+        if not length:
+            return None
+        body = self._map[offset:offset + length]
+        if zlib.crc32(body) != crc:
+            raise ValueError(f"归档中 {date} 的记录已损坏: {self.path}")
+        return decompress(body, self.compression, raw_length)
+
+    def close(self):
+        self._map.close()
+
+
+class ArchiveReader:
+    """一个数据目录中全部归档的读取器，缓存已映射的归档
+
+    每次读取前比对归档文件的 (mtime, 大小, inode)，归档被重新打包后自动重新映射。
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.lock = threading.Lock()
+        self._archives = {}
+
+    def _get(self, month):
+        path = self.directory / archive_filename(month)
+        try:
+            stat = path.stat()
+        except OSError:
+            self._drop(month)
+            return None
+        archive = self._archives.get(month)
+        if archive is not None and archive.version == (stat.st_mtime_ns, stat.st_size,
+                                                       stat.st_ino):
+            return archive
+        self._drop(month)
+        archive = MonthArchive(path)
+        self._archives[month] = archive
+        return archive
+
+    def _drop(self, month):
+        archive = self._archives.pop(month, None)
+        if archive is not None:
+            archive.close()
+
+    def read(self, date):
+        """返回指定日期的JSON字节，没有归档或归档中没有该日期时返回None"""
+        with self.lock:
+            archive = self._get(date[:7])
+            return archive.read(date) if archive is not None else None
+
+    def location(self, date):
+        """返回已归档日期的保存位置，未归档时返回None"""
+        path = self.directory / archive_filename(date[:7])
+        return f"{path}#{date}" if path.exists() else None
+
+    def release(self, month):
+        """释放归档的映射（替换归档文件前调用，Windows 不允许替换已映射的文件）"""
+        with self.lock:
+            self._drop(month)
+
+    def close(self):
+        with self.lock:
+            for month in list(self._archives):
+                self._drop(month)
+
+
+def read_entries(path):
+    """读取归档索引，返回 (日期, 原始长度, 修改时间) 列表"""
+    archive = MonthArchive(path)
+    try:
+        return archive.entries()
+    finally:
+        archive.close()
+
+
+# ---- 打包 ----
+
+def closed_months(store, today=None):
+    """返回存在未打包JSON文件的已结束月份（升序）"""
+    current = (today or datetime.now()).strftime('%Y-%m')
+    entries, _, _ = store.query(fields=['date', 'filename'])
+    return sorted({entry['date'][:7] for entry in entries
+                   if entry['date'][:7] < current and not archive_month(entry['filename'])})
+
+
+def pack_month(store, month, compression=DEFAULT_COMPRESSION):
+    """把一个月的JSON文件合并进该月的归档，返回打包的记录数
+
+    打包期间持有历史索引的锁，同一存储的保存会等待打包完成；
+    归档原子替换之后才删除JSON文件，任何时刻读取都能找到记录。
+    """
+    path = store.save_path / archive_filename(month)
+    index = store.index
+    with index.lock:
+        index.ensure_fresh()
+        records = {}
+        if path.exists():
+            archive = MonthArchive(path)
+            try:
+                for date, _, modified in archive.entries():
+                    records[date] = (archive.read(date), modified)
+            finally:
+                archive.close()
+
+        files = []
+        entries, _, _ = store.query(f"{month}-01", f"{month}-31", fields=['date', 'filename'])
+        for entry in entries:
+            if archive_month(entry['filename']):
+                continue
+            file_path = store.save_path / entry['filename']
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+                modified = os.fstat(f.fileno()).st_mtime
+            records[entry['date']] = (raw, modified)
+            files.append(file_path)
+        if not files:
+            return 0
+
+        store.archives.release(month)
+        write_archive(path, month, records, compression)
+        for file_path in files:
+            file_path.unlink()
+        _remove_empty_shards(store.save_path, month)
+        index.rebuild()
+    return len(files)
+
+
+def _remove_empty_shards(save_path, month):
+    """删除打包后变空的 YYYY/MM 分片目录（目录不空或不存在时忽略）"""
+    year_dir = save_path / month[:4]
+    for directory in (year_dir / month[5:7], year_dir):
+        try:
+            directory.rmdir()
+        except OSError:
+            return
+
+
+def pack_closed_months(store, compression=DEFAULT_COMPRESSION, today=None):
+    """打包所有已结束月份，返回 {月份: 记录数}"""
+    packed = {}
+    for month in closed_months(store, today):
+        count = pack_month(store, month, compression)
+        if count:
+            packed[month] = count
+            print(f"🗜️ 已将 {month} 的 {count} 个记录文件打包到 {archive_filename(month)}")
+    return packed
+
+
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='QuirkLog 月度归档工具')
+    parser.add_argument('--compression', choices=sorted(COMPRESSION_CODES),
+                        default=DEFAULT_COMPRESSION, help='记录体压缩方式（默认 gzip）')
+    parser.add_argument('--month', help='只打包指定月份，YYYY-MM')
+    parser.add_argument('--dry-run', action='store_true', help='只列出将要打包的月份')
+    args = parser.parse_args(argv)
+    if args.month:
+        try:
+            datetime.strptime(args.month, '%Y-%m')
+        except ValueError:
+            parser.error(f"无效的月份: {args.month}")
+    return args
+
+
+def main(argv=None):
+    """主函数"""
+    import record_store
+    import settings_store
+
+    args = parse_args(argv)
+    store = record_store.store_from_settings(settings_store.load_settings())
+    if store.engine != record_store.DEFAULT_ENGINE:
+        print(f"❌ 月度归档只适用于JSON存储，当前存储引擎为 {store.engine}", file=sys.stderr)
+        return False
+    if args.compression == 'zstd':
+        try:
+            _zstd()
+        except RuntimeError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return False
+
+    months = [args.month] if args.month else closed_months(store)
+    if args.dry_run:
+        for month in months:
+            print(month)
+        return True
+    for month in months:
+        count = pack_month(store, month, args.compression)
+        print(f"✅ {month}: 打包了 {count} 个记录文件", file=sys.stderr)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog 多进程（pre-fork）服务模式
+主进程绑定监听端口后 fork 出 N 个工作进程，每个工作进程运行一个完整的多线程服务器。
+工作进程共享继承来的监听socket；reuse_port=True 时改为各自以 SO_REUSEPORT 绑定同一端口，
+由内核按连接分配。JSON编解码等CPU密集的请求因此可以同时用满多个CPU核心。
+
+主进程作为监督者：工作进程意外退出时重新启动（刚启动就退出时逐渐延长重启间隔），
+收到 Ctrl+C 或 SIGTERM 时通知所有工作进程停止并等待它们退出。
+同一数据目录的写入由 process_lock 的文件锁在进程间互斥。
+
+每个工作进程有各自的实时事件总线和请求指标：/api/events 只推送本进程处理的保存，
+客户端通过 /api/sync 补齐其他进程上的变化；/api/metrics 只统计本进程的请求。
+追加日志存储引擎只能由一个进程写入：启动时退回单进程，运行中切换到该引擎会被拒绝。
+仅支持提供 os.fork 的平台（Linux、macOS）。
+"""
+
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+
+# 工作进程运行不足该秒数就退出时视为启动失败，推迟重启
+MIN_WORKER_UPTIME = 1.0
+MAX_RESTART_DELAY = 30.0
+
+# 监督循环的检查间隔与停止时等待工作进程退出的秒数
+POLL_INTERVAL = 0.2
+SHUTDOWN_TIMEOUT = 10.0
+
+# 当前进程作为工作进程时的槽位和工作进程总数（监督者和单进程模式下为 None 和 0）
+worker_slot = None
+worker_count = 0
+
+
+def is_supported():
+    """当前平台是否支持多进程模式"""
+    return hasattr(os, 'fork')
+
+
+def multiple_workers():
+    """当前进程是否是多个同时运行的工作进程之一"""
+    return worker_slot is not None and worker_count > 1
+
+
+def reuse_port_supported():
+    return hasattr(socket, 'SO_REUSEPORT')
+
+
+def listen_socket(port, queue_size, reuse_port=False, listen=True):
+    """创建绑定到所有地址的TCP socket
+
+    reuse_port 模式下主进程只绑定（不监听）以占住端口，
+    未监听的socket不参与连接分配，连接全部交给工作进程。
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(('', port))
+        if listen:
+            sock.listen(queue_size)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class PreforkServer:
+    """多进程服务器的监督者，接口与单进程服务器一致（serve_forever / shutdown / server_close）
+
+    Args:
+        port: 监听端口，0 表示由系统分配
+        workers: 工作进程数
+        server_factory: 在工作进程中调用，参数为监听socket，返回服务器对象
+        queue_size: 监听队列深度
+        reuse_port: 使用 SO_REUSEPORT 让每个工作进程各自监听
+    """
+
+    def __init__(self, port, workers, server_factory, queue_size=64, reuse_port=False):
+        if not is_supported():
+            raise RuntimeError("当前平台不支持多进程模式（需要 os.fork）")
+        if reuse_port and not reuse_port_supported():
+            raise RuntimeError("当前平台不支持 SO_REUSEPORT")
+        self.workers = max(1, int(workers))
+        self.server_factory = server_factory
+        self.queue_size = queue_size
+        self.reuse_port = reuse_port
+        self.socket = listen_socket(port, queue_size, reuse_port, listen=not reuse_port)
+        self.server_address = self.socket.getsockname()
+        self._children = {}          # pid → 槽位
+        self._started = {}           # 槽位 → 启动时间
+        self._failures = {}          # 槽位 → 连续启动失败次数
+        self._restart_at = {}        # 槽位 → 计划重启的时间
+        self._stop = threading.Event()
+        self._stopped = threading.Event()
+
+    # ---- 工作进程 ----
+
+    def _worker_main(self, slot):
+        """工作进程入口（fork 之后执行，不返回）"""
+        global worker_slot, worker_count
+        worker_slot, worker_count = slot, self.workers
+        status = 1
+        try:
+            # Ctrl+C 会发给整个进程组，由监督者统一通知停止
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            if self.reuse_port:
+                self.socket.close()
+                sock = listen_socket(self.server_address[1], self.queue_size, reuse_port=True)
+            else:
+                sock = self.socket
+            httpd = self.server_factory(sock)
+            # serve_forever 所在线程之外才能调用 shutdown
+            signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(
+                target=httpd.shutdown, daemon=True).start())
+            try:
+                httpd.serve_forever()
+            finally:
+                httpd.server_close()
+            status = 0
+        except Exception as e:
+            print(f"❌ 工作进程 {os.getpid()} 异常退出: {e}", file=sys.stderr)
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    def _spawn(self, slot):
+        # 先写出缓冲区，避免子进程退出时重复输出主进程尚未写出的内容
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            self._worker_main(slot)
+        self._children[pid] = slot
+        self._started[slot] = time.monotonic()
+        self._restart_at.pop(slot, None)
+
+    def worker_pids(self):
+        """当前工作进程的PID列表（按槽位排序）"""
+        return [pid for pid, _ in sorted(list(self._children.items()), key=lambda item: item[1])]
+
+    def _reap(self):
+        """回收已退出的工作进程，为需要重启的槽位安排重启时间"""
+        # 只等待自己的工作进程，不影响同一进程中其他代码创建的子进程
+        for pid in list(self._children):
+            try:
+                done, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done, status = pid, None
+            if done == 0:
+                continue
+            slot = self._children.pop(pid)
+            if self._stop.is_set():
+                continue
+            uptime = time.monotonic() - self._started.get(slot, 0)
+            if uptime < MIN_WORKER_UPTIME:
+                self._failures[slot] = self._failures.get(slot, 0) + 1
+            else:
+                self._failures[slot] = 0
+            delay = min(MAX_RESTART_DELAY, 2 ** self._failures[slot] - 1)
+            print(f"⚠️ 工作进程 {pid} 已退出（状态 {status}），"
+                  f"{delay:.0f} 秒后重新启动", file=sys.stderr)
+            self._restart_at[slot] = time.monotonic() + delay
+
+    # ---- 监督 ----
+
+    def serve_forever(self):
+        """启动全部工作进程并持续监督，直到 shutdown() 或收到停止信号"""
+        previous = None
+        if threading.current_thread() is threading.main_thread():
+            previous = signal.signal(signal.SIGTERM, lambda signum, frame: self._stop.set())
+        try:
+            for slot in range(self.workers):
+                self._spawn(slot)
+            while not self._stop.is_set():
+                self._reap()
+                now = time.monotonic()
+                for slot, restart_at in list(self._restart_at.items()):
+                    if restart_at <= now:
+                        self._spawn(slot)
+                self._stop.wait(POLL_INTERVAL)
+        finally:
+            self._stop.set()
+            self._stop_workers()
+            if previous is not None:
+                signal.signal(signal.SIGTERM, previous)
+            self._stopped.set()
+
+    def _stop_workers(self):
+        """通知工作进程停止，超时未退出的强制结束"""
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        while self._children and time.monotonic() < deadline:
+            self._reap()
+            if self._children:
+                time.sleep(0.05)
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self._children.pop(pid, None)
+
+    def shutdown(self):
+        """停止监督循环并等待工作进程退出（从其他线程调用）"""
+        self._stop.set()
+        self._stopped.wait()
+
+    def server_close(self):
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server_close()
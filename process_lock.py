@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog 数据目录锁
+多进程模式（web_server --workers N）下多个工作进程共享同一个数据目录。
+每个数据目录对应一把可重入的锁：进程内用 RLock 互斥，最外层加锁时再对
+数据目录中的 .quirklog.lock 加 flock，使同一天的保存、历史索引、搜索索引和
+变更日志的更新在进程之间也不会交错。命令行工具（月度归档、布局迁移）
+与服务器同时运行时同样受保护。
+
+没有 fcntl 的平台（Windows）不支持多进程模式，只使用进程内的锁。
+"""
+
+import os
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# 锁文件名（保存在数据目录中，以点开头避免被当作记录文件）
+LOCK_FILENAME = '.quirklog.lock'
+
+
+def file_version(path):
+    """返回文件的 (mtime, 大小, inode)，文件不存在时返回None
+
+    进程内缓存（历史索引、搜索索引、变更日志）据此判断其他进程是否写过文件。
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class DirectoryLock:
+    """数据目录的可重入锁（进程内 + 进程间）"""
+
+    def __init__(self, directory):
+        self.path = Path(directory) / LOCK_FILENAME
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def _lock_file(self):
+        """对锁文件加排他锁，数据目录尚不存在时返回None（此时没有需要保护的数据）"""
+        if fcntl is None:
+            return None
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            return None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except OSError:
+            os.close(fd)
+            raise
+        return fd
+
+    def acquire(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            try:
+                self._fd = self._lock_file()
+            except Exception:
+                self._lock.release()
+                raise
+        self._depth += 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            # 关闭文件描述符即释放 flock
+            fd, self._fd = self._fd, None
+            os.close(fd)
+        self._lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+# 进程级锁注册表，同一数据目录的历史索引、搜索索引和变更日志共用一把锁
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def get_lock(directory):
+    """获取（必要时创建）指定数据目录的锁"""
+    key = os.path.abspath(directory)
+    with _locks_lock:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = DirectoryLock(directory)
+            _locks[key] = lock
+        return lock
@@ -0,0 +1,748 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog 每日记录存储
+提供可替换的存储引擎：
+    json   - 每天一个JSON文件（默认，与历史版本完全兼容），已结束的月份可打包为月度归档
+    log    - 追加写入的日志结构存储，保存为一次顺序追加，读取为一次 pread
+    sqlite - SQLite数据库，计划和反思条目拆分到带索引的表中，支持按条件查询
+"""
+
+import bisect
+import contextlib
+import json
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+import history_index
+import month_archive
+import prefork
+
+
+# 默认存储引擎
+DEFAULT_ENGINE = 'json'
+
+
+def validate_date(date):
+    """校验日期格式为 YYYY-MM-DD（月、日补零），返回日期字符串，无效时抛出 ValueError"""
+    if not isinstance(date, str) or len(date) != 10:
+        raise ValueError(f"无效的日期: {date!r}")
+    datetime.strptime(date, '%Y-%m-%d')
+    return date
+
+
+def iter_plans(date, record):
+    """展开一条记录中的计划，返回带日期和序号的计划字典"""
+    for position, plan in enumerate(record.get('plans') or []):
+        if isinstance(plan, dict):
+            yield dict(plan, date=date, position=position)
+
+
+def plan_matches(plan, completed=None, importance=None, urgency=None):
+    """判断计划是否满足筛选条件（importance / urgency 为可选值列表）"""
+    if completed is not None and bool(plan.get('completed')) != completed:
+        return False
+    if importance and plan.get('importance') not in importance:
+        return False
+    if urgency and plan.get('urgency') not in urgency:
+        return False
+    return True
+
+
+class RecordStore:
+    """存储引擎的公共接口
+
+    子类实现 save / load / location / query，这里提供基于它们的通用实现。
+    """
+
+    engine = None
+
+    def query_plans(self, date_from=None, date_to=None, completed=None,
+                    importance=None, urgency=None, limit=None):
+        """按日期倒序查询满足条件的计划（逐天读取记录后筛选）"""
+        entries, _, _ = self.query(date_from, date_to, fields=['date'])
+        plans = []
+        for entry in entries:
+            record = self.load(entry['date']) or {}
+            for plan in iter_plans(entry['date'], record):
+                if plan_matches(plan, completed, importance, urgency):
+                    plans.append(plan)
+                    if limit is not None and len(plans) >= limit:
+                        return plans
+        return plans
+
+    def iter_records(self, date_from=None, date_to=None):
+        """按日期升序逐条产出 (日期, 记录)，同一时刻只在内存中保留一条记录"""
+        entries, _, _ = self.query(date_from, date_to, fields=['date'])
+        for entry in reversed(entries):
+            record = self.load(entry['date'])
+            if record is not None:
+                yield entry['date'], record
+
+    def close(self):
+        """释放存储占用的文件句柄等资源"""
+
+
+class JsonFileStore(RecordStore):
+    """每天一个JSON文件的存储（默认引擎）
+
+    layout 决定新记录写到保存目录中（flat）还是 YYYY/MM/ 分片目录中（sharded）；
+    读取总是兼容两种布局，找不到JSON文件时再查月度归档（见 month_archive）。
+    """
+
+    engine = 'json'
+
+    def __init__(self, save_directory, file_naming, layout=history_index.DEFAULT_LAYOUT):
+        self.save_directory = save_directory
+        self.file_naming = file_naming
+        self.save_path = Path(save_directory)
+        self.layout = layout
+        self.archives = month_archive.ArchiveReader(save_directory)
+        self._pack_lock = threading.Lock()
+        self._pack_checked = None
+
+    @property
+    def index(self):
+        return history_index.get_index(self.save_directory, self.file_naming)
+
+    def file_path(self, date, layout=None):
+        """返回指定日期的记录文件路径（默认按当前布局）"""
+        file_name = f"{self.file_naming.replace('{date}', date)}.json"
+        if (layout or self.layout) == 'sharded':
+            shard = history_index.shard_dir(date)
+            if shard is None:
+                raise ValueError(f"无效的日期: {date}")
+            return self.save_path / shard / file_name
+        return self.save_path / file_name
+
+    def candidate_paths(self, date):
+        """返回指定日期可能的记录文件路径，当前布局在前"""
+        paths = []
+        for layout in sorted(history_index.LAYOUTS, key=lambda name: name != self.layout):
+            try:
+                paths.append(self.file_path(date, layout))
+            except ValueError:
+                continue
+        return paths
+
+    def location(self, date):
+        """返回指定日期记录的保存位置（用于提示用户）"""
+        paths = self.candidate_paths(date)
+        for file_path in paths:
+            if file_path.exists():
+                return str(file_path)
+        return self.archives.location(date) or str(paths[0])
+
+    def save(self, date, record):
+        """保存记录并增量更新历史索引，返回保存位置
+
+        同一天在另一种布局下的旧文件会被删除，保证每天只有一个JSON文件。
+        写入期间持有数据目录的进程间锁；先写临时文件再原子替换，
+        其他进程不加锁读取时也不会读到写了一半的文件。
+        """
+        file_path = self.file_path(validate_date(date))
+        # 先创建保存目录，锁文件才能放在其中
+        self.save_path.mkdir(parents=True, exist_ok=True)
+
+        index = self.index
+        with index.lock:
+            index.ensure_fresh(date, date)
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = file_path.with_name(f".{file_path.name}.tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, file_path)
+            for old_path in self.candidate_paths(date)[1:]:
+                try:
+                    old_path.unlink()
+                except FileNotFoundError:
+                    pass
+            indexed_date = history_index.extract_date_from_filename(
+                file_path.stem, self.file_naming)
+            if indexed_date:
+                index.record_saved(indexed_date, file_path)
+
+        return str(file_path)
+
+    def load(self, date):
+        """读取指定日期的记录，不存在时返回None（只打开该日期可能所在的文件）"""
+        for file_path in self.candidate_paths(date):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                continue
+
+        try:
+            validate_date(date)
+        except ValueError:
+            return None
+        payload = self.archives.read(date)
+        return json.loads(payload.decode('utf-8')) if payload is not None else None
+
+    def query(self, date_from=None, date_to=None, limit=None, cursor=None, fields=None):
+        """按日期倒序分页列出记录，返回值同 HistoryIndex.query"""
+        if not self.save_path.exists():
+            return [], None, 0
+        return self.index.query(date_from, date_to, limit, cursor, fields)
+
+    def maybe_pack(self, compression=month_archive.DEFAULT_COMPRESSION):
+        """在后台线程中把已结束月份的JSON文件打包为月度归档（每个自然月最多检查一次）"""
+        month = datetime.now().strftime('%Y-%m')
+        with self._pack_lock:
+            if self._pack_checked == month:
+                return
+            self._pack_checked = month
+        threading.Thread(target=self._pack, args=(compression,),
+                         name='quirklog-month-pack', daemon=True).start()
+
+    def _pack(self, compression):
+        try:
+            month_archive.pack_closed_months(self, compression)
+        except Exception as e:
+            print(f"❌ 月度归档打包失败: {e}")
+
+    def close(self):
+        self.archives.close()
+
+
+class LogStructuredStore(RecordStore):
+    """追加写入的日志结构存储
+
+    所有版本依次追加到保存目录下的 records.qlog 中，每条为
+    固定长度的头部（魔数、CRC32、长度、保存时间、日期）加紧凑JSON。
+    内存中维护 日期 → (偏移, 长度) 的索引，读取时一次 pread 即可。
+    失效版本占比过高时在后台线程中压缩日志，只保留每天的最新版本。
+    """
+
+    engine = 'log'
+
+    LOG_FILENAME = 'records.qlog'
+    MAGIC = b'QLR1'
+    HEADER = struct.Struct('>4sIId10s')
+
+    # 失效数据超过该字节数且占比超过该比例时触发后台压缩
+    COMPACT_MIN_DEAD_BYTES = 1024 * 1024
+    COMPACT_DEAD_RATIO = 0.5
+
+    def __init__(self, save_directory, file_naming=None):
+        self.save_directory = save_directory
+        self.save_path = Path(save_directory)
+        self.log_path = self.save_path / self.LOG_FILENAME
+        self.lock = threading.RLock()
+        self._fd = None
+        self._entries = {}
+        self._dates = []
+        self._size = 0
+        self._live_bytes = 0
+        self._compacting = False
+        self._file_naming = file_naming
+
+    # ---- 打开与恢复 ----
+
+    def _open(self):
+        """首次使用时打开日志并重建内存索引"""
+        if self._fd is not None:
+            return
+        self.save_path.mkdir(parents=True, exist_ok=True)
+        is_new = not self.log_path.exists()
+        self._fd = os.open(str(self.log_path), os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+        entries, valid_size = self._scan(self._fd, 0, os.fstat(self._fd).st_size)
+        if valid_size < os.fstat(self._fd).st_size:
+            # 尾部是写入中途中断的半条记录，截掉
+            print(f"⚠️ 日志尾部存在不完整的记录，已截断到 {valid_size} 字节")
+            os.ftruncate(self._fd, valid_size)
+        self._set_entries(entries, valid_size)
+
+        if is_new and self._file_naming:
+            self._import_json_files()
+
+    def _scan(self, fd, start, end, entries=None):
+        """从 start 扫描到 end，返回 (索引, 最后一条完整记录的结束位置)"""
+        entries = {} if entries is None else entries
+        offset = start
+        header_size = self.HEADER.size
+        while offset + header_size <= end:
+            header = _pread(fd, header_size, offset)
+            magic, crc, length, saved_at, date = self.HEADER.unpack(header)
+            payload_offset = offset + header_size
+            if magic != self.MAGIC or payload_offset + length > end:
+                break
+            payload = _pread(fd, length, payload_offset)
+            if zlib.crc32(payload) != crc:
+                break
+            entries[date.decode('ascii')] = (payload_offset, length, saved_at)
+            offset = payload_offset + length
+        return entries, offset
+
+    def _set_entries(self, entries, size):
+        self._entries = entries
+        self._dates = sorted(entries)
+        self._size = size
+        self._live_bytes = sum(self.HEADER.size + length for _, length, _ in entries.values())
+
+    def _import_json_files(self):
+        """新建日志时导入目录中已有的JSON记录，切换引擎后历史数据仍然可见"""
+        json_store = JsonFileStore(self.save_directory, self._file_naming)
+        entries, _, _ = json_store.query()
+        for entry in reversed(entries):
+            record = json_store.load(entry['date'])
+            if record is not None:
+                self._append(entry['date'], record, entry.get('modified'))
+        if entries:
+            print(f"📥 已将 {len(entries)} 条JSON记录导入日志存储")
+
+    # ---- 读写 ----
+
+    def _encode(self, date, record, saved_at=None):
+        payload = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        saved_at = time.time() if saved_at is None else saved_at
+        header = self.HEADER.pack(self.MAGIC, zlib.crc32(payload), len(payload),
+                                  saved_at, date.encode('ascii'))
+        return header + payload, len(payload), saved_at
+
+    def _append(self, date, record, saved_at=None):
+        """追加一条记录（调用方持有锁）"""
+        data, length, saved_at = self._encode(date, record, saved_at)
+        _pwrite_all(self._fd, data, self._size)
+        payload_offset = self._size + self.HEADER.size
+
+        previous = self._entries.get(date)
+        if previous is None:
+            bisect.insort(self._dates, date)
+        else:
+            self._live_bytes -= self.HEADER.size + previous[1]
+        self._entries[date] = (payload_offset, length, saved_at)
+        self._size += len(data)
+        self._live_bytes += len(data)
+
+    def location(self, date):
+        """返回指定日期记录的保存位置（用于提示用户）"""
+        return f"{self.log_path}#{date}"
+
+    def save(self, date, record):
+        """追加保存一条记录，返回保存位置"""
+        validate_date(date)
+        with self.lock:
+            self._open()
+            self._append(date, record)
+            self._maybe_compact()
+        return self.location(date)
+
+    def load(self, date):
+        """读取指定日期的最新记录，不存在时返回None"""
+        with self.lock:
+            self._open()
+            entry = self._entries.get(date)
+            if entry is None:
+                return None
+            offset, length, _ = entry
+            payload = _pread(self._fd, length, offset)
+        return json.loads(payload.decode('utf-8'))
+
+    def query(self, date_from=None, date_to=None, limit=None, cursor=None, fields=None):
+        """按日期倒序分页列出记录，返回值同 HistoryIndex.query"""
+        with self.lock:
+            self._open()
+            page_dates, next_cursor, total = history_index.paginate_dates(
+                self._dates, date_from, date_to, limit, cursor)
+            page = []
+            for date in page_dates:
+                _, length, saved_at = self._entries[date]
+                page.append(history_index.project_fields({
+                    'date': date,
+                    'filename': self.LOG_FILENAME,
+                    'path': self.location(date),
+                    'size': length,
+                    'modified': saved_at
+                }, fields))
+        return page, next_cursor, total
+
+    # ---- 压缩 ----
+
+    def _maybe_compact(self):
+        """失效数据过多时在后台线程中压缩（调用方持有锁）"""
+        dead = self._size - self._live_bytes
+        if (self._compacting or dead < self.COMPACT_MIN_DEAD_BYTES or
+                dead < self._size * self.COMPACT_DEAD_RATIO):
+            return
+        self._compacting = True
+        threading.Thread(target=self.compact, name='quirklog-log-compact', daemon=True).start()
+
+    def compact(self):
+        """只保留每天的最新版本，重写日志文件"""
+        temp_path = self.log_path.with_suffix('.qlog.compact')
+        try:
+            with self.lock:
+                self._open()
+                snapshot = dict(self._entries)
+                snapshot_end = self._size
+                fd = self._fd
+
+            # 复制快照中的有效记录（不持有锁，保存可以继续追加）
+            new_fd = os.open(str(temp_path), os.O_RDWR | os.O_CREAT | os.O_TRUNC |
+                             getattr(os, 'O_BINARY', 0))
+            new_entries = {}
+            new_size = 0
+            for date in sorted(snapshot):
+                offset, length, saved_at = snapshot[date]
+                block = _pread(fd, self.HEADER.size + length, offset - self.HEADER.size)
+                _pwrite_all(new_fd, block, new_size)
+                new_entries[date] = (new_size + self.HEADER.size, length, saved_at)
+                new_size += len(block)
+
+            with self.lock:
+                # 追上压缩期间新追加的记录
+                if self._size > snapshot_end:
+                    tail = _pread(self._fd, self._size - snapshot_end, snapshot_end)
+                    _pwrite_all(new_fd, tail, new_size)
+                    new_entries, new_size = self._scan(new_fd, new_size,
+                                                       new_size + len(tail), new_entries)
+                os.fsync(new_fd)
+                os.replace(str(temp_path), str(self.log_path))
+                os.close(self._fd)
+                self._fd = new_fd
+                before = self._size
+                self._set_entries(new_entries, new_size)
+            print(f"🗜️ 日志存储压缩完成: {before} → {new_size} 字节")
+        except Exception as e:
+            print(f"❌ 日志存储压缩失败: {e}")
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+        finally:
+            with self.lock:
+                self._compacting = False
+
+    def close(self):
+        with self.lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+def _pread(fd, length, offset):
+    """按偏移读取，平台不支持 os.pread 时退回 lseek+read（调用方持有锁）"""
+    if hasattr(os, 'pread'):
+        return os.pread(fd, length, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, length)
+
+
+def _pwrite_all(fd, data, offset):
+    """在指定偏移写入全部数据"""
+    view = memoryview(data)
+    while view:
+        if hasattr(os, 'pwrite'):
+            written = os.pwrite(fd, view, offset)
+        else:
+            os.lseek(fd, offset, os.SEEK_SET)
+            written = os.write(fd, view)
+        view = view[written:]
+        offset += written
+
+
+class SqliteStore(RecordStore):
+    """SQLite存储
+
+    完整记录保存在 records 表中，计划和反思条目另外拆分到
+    plans / reflection_items 表，并在日期、完成状态、重要性和紧急程度上
+    建立索引，"上周"或"本季度未完成的十分重要计划"这类查询都走索引。
+    数据库使用WAL模式，每次操作从连接池借出一个连接、用完归还，读操作互不阻塞；
+    池中最多保留 POOL_SIZE 个空闲连接，多出的归还时关闭（多线程服务器为每个
+    客户端连接新开线程，连接不能与线程绑定，否则会随线程数无限增长）。
+    """
+
+    engine = 'sqlite'
+
+    DB_FILENAME = 'quirklog.db'
+    SCHEMA_VERSION = 1
+    REFLECTION_KINDS = ('progress', 'improvements', 'gratitude')
+    POOL_SIZE = 8
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS records (
+            date TEXT PRIMARY KEY,
+            body TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            saved_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS plans (
+            date TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            event TEXT,
+            importance TEXT,
+            urgency TEXT,
+            start_time TEXT,
+            duration TEXT,
+            completed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, position)
+        );
+        CREATE INDEX IF NOT EXISTS idx_plans_filter
+            ON plans (completed, importance, urgency, date);
+        CREATE INDEX IF NOT EXISTS idx_plans_importance
+            ON plans (importance, date);
+        CREATE TABLE IF NOT EXISTS reflection_items (
+            date TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            PRIMARY KEY (date, kind, position)
+        );
+        CREATE INDEX IF NOT EXISTS idx_reflection_kind
+            ON reflection_items (kind, date);
+    """
+
+    def __init__(self, save_directory, file_naming=None):
+        self.save_directory = save_directory
+        self.save_path = Path(save_directory)
+        self.db_path = self.save_path / self.DB_FILENAME
+        self.write_lock = threading.Lock()
+        self._idle = []              # 空闲连接
+        self._open_connections = 0   # 已打开（含借出中）的连接数
+        self._pool_lock = threading.Lock()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        self._file_naming = file_naming
+
+    @contextlib.contextmanager
+    def _connection(self):
+        """从连接池借出一个连接，用完归还；空闲连接已满时关闭"""
+        with self._pool_lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open()
+        try:
+            yield conn
+        finally:
+            with self._pool_lock:
+                if len(self._idle) < self.POOL_SIZE:
+                    self._idle.append(conn)
+                    conn = None
+                else:
+                    self._open_connections -= 1
+            if conn is not None:
+                conn.close()
+
+    def _open(self):
+        """打开一个新的数据库连接，首次使用时建表并导入已有JSON记录"""
+        with self._init_lock:
+            self.save_path.mkdir(parents=True, exist_ok=True)
+            is_new = not self.db_path.exists()
+            conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            if not self._initialized:
+                conn.executescript(self.SCHEMA)
+                conn.execute(f'PRAGMA user_version={self.SCHEMA_VERSION}')
+                self._initialized = True
+                if is_new and self._file_naming:
+                    self._import_json_files(conn)
+
+        with self._pool_lock:
+            self._open_connections += 1
+        return conn
+
+    def _import_json_files(self, conn):
+        """新建数据库时导入目录中已有的JSON记录"""
+        json_store = JsonFileStore(self.save_directory, self._file_naming)
+        entries, _, _ = json_store.query()
+        with conn:
+            for entry in entries:
+                record = json_store.load(entry['date'])
+                if record is not None:
+                    self._write(conn, entry['date'], record, entry.get('modified'))
+        if entries:
+            print(f"📥 已将 {len(entries)} 条JSON记录导入SQLite存储")
+
+    def _write(self, conn, date, record, saved_at=None):
+        """在当前事务中写入一条记录及其拆分出的计划和反思条目"""
+        body = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        saved_at = time.time() if saved_at is None else saved_at
+        conn.execute(
+            'INSERT OR REPLACE INTO records (date, body, size, saved_at) VALUES (?, ?, ?, ?)',
+            (date, body, len(body.encode('utf-8')), saved_at))
+
+        conn.execute('DELETE FROM plans WHERE date = ?', (date,))
+        conn.executemany(
+            'INSERT INTO plans (date, position, event, importance, urgency, '
+            'start_time, duration, completed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [(date, plan['position'], plan.get('event'), plan.get('importance'),
+              plan.get('urgency'), _as_text(plan.get('startTime')),
+              _as_text(plan.get('duration')), 1 if plan.get('completed') else 0)
+             for plan in iter_plans(date, record)])
+
+        conn.execute('DELETE FROM reflection_items WHERE date = ?', (date,))
+        reflection = record.get('reflection') or {}
+        items = []
+        for kind in self.REFLECTION_KINDS:
+            for position, content in enumerate(reflection.get(kind) or []):
+                if content:
+                    items.append((date, kind, position, str(content)))
+        if reflection.get('dailyThoughts'):
+            items.append((date, 'dailyThoughts', 0, str(reflection['dailyThoughts'])))
+        conn.executemany(
+            'INSERT INTO reflection_items (date, kind, position, content) VALUES (?, ?, ?, ?)',
+            items)
+
+    def location(self, date):
+        """返回指定日期记录的保存位置（用于提示用户）"""
+        return f"{self.db_path}#{date}"
+
+    def save(self, date, record):
+        """在一个事务中保存记录，返回保存位置"""
+        validate_date(date)
+        with self._connection() as conn, self.write_lock, conn:
+            self._write(conn, date, record)
+        return self.location(date)
+
+    def load(self, date):
+        """读取指定日期的记录，不存在时返回None"""
+        with self._connection() as conn:
+            row = conn.execute('SELECT body FROM records WHERE date = ?', (date,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(self, date_from=None, date_to=None, limit=None, cursor=None, fields=None):
+        """按日期倒序分页列出记录，返回值同 HistoryIndex.query"""
+        conditions, params = _date_conditions(date_from, date_to)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        with self._connection() as conn:
+            total = conn.execute(f'SELECT COUNT(*) FROM records {where}', params).fetchone()[0]
+
+            if cursor:
+                conditions.append('date < ?')
+                params.append(cursor)
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+            sql = f'SELECT date, size, saved_at FROM records {where} ORDER BY date DESC'
+            if limit is not None:
+                sql += ' LIMIT ?'
+                params.append(limit + 1)
+            rows = conn.execute(sql, params).fetchall()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1][0]
+        page = [history_index.project_fields({
+            'date': date,
+            'filename': self.DB_FILENAME,
+            'path': self.location(date),
+            'size': size,
+            'modified': saved_at
+        }, fields) for date, size, saved_at in rows]
+        return page, next_cursor, total
+
+    def query_plans(self, date_from=None, date_to=None, completed=None,
+                    importance=None, urgency=None, limit=None):
+        """按日期倒序查询满足条件的计划（走 plans 表索引）"""
+        conditions, params = _date_conditions(date_from, date_to)
+        if completed is not None:
+            conditions.append('completed = ?')
+            params.append(1 if completed else 0)
+        for column, values in (('importance', importance), ('urgency', urgency)):
+            if values:
+                conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        sql = (f'SELECT date, position, event, importance, urgency, start_time, duration, '
+               f'completed FROM plans {where} ORDER BY date DESC, position')
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        with self._connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [{
+            'date': date,
+            'position': position,
+            'event': event,
+            'importance': importance_value,
+            'urgency': urgency_value,
+            'startTime': start_time,
+            'duration': duration,
+            'completed': bool(done)
+        } for (date, position, event, importance_value, urgency_value,
+               start_time, duration, done) in rows]
+
+    def close(self):
+        """关闭空闲连接（借出中的连接归还后仍留在池中，之后的操作可继续使用）"""
+        with self._pool_lock:
+            idle, self._idle = self._idle, []
+            self._open_connections -= len(idle)
+        for conn in idle:
+            conn.close()
+
+
+def _as_text(value):
+    return None if value is None else str(value)
+
+
+def _date_conditions(date_from, date_to):
+    """生成日期范围的SQL条件和参数"""
+    conditions, params = [], []
+    if date_from:
+        conditions.append('date >= ?')
+        params.append(date_from)
+    if date_to:
+        conditions.append('date <= ?')
+        params.append(date_to)
+    return conditions, params
+
+
+# 存储引擎注册表
+STORAGE_ENGINES = {
+    JsonFileStore.engine: JsonFileStore,
+    LogStructuredStore.engine: LogStructuredStore,
+    SqliteStore.engine: SqliteStore,
+}
+
+# 进程级存储实例，按 (引擎, 保存目录, 命名格式) 区分
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def check_engine(engine):
+    """检查存储引擎可以在当前进程中使用，不能使用时抛出 ValueError"""
+    if engine not in STORAGE_ENGINES:
+        raise ValueError(f"未知的存储引擎: {engine}")
+    if engine == LogStructuredStore.engine and prefork.multiple_workers():
+        # 追加日志存储在进程内维护记录偏移，多个进程同时追加会损坏日志文件
+        raise ValueError("追加日志存储引擎不支持多进程模式")
+
+
+def get_store(engine, save_directory, file_naming, layout=None):
+    """获取（必要时创建）指定配置的存储实例
+
+    layout 只影响JSON存储写入新记录的位置，读取兼容两种布局，因此不单独区分实例。
+    多进程模式下运行中切换到追加日志存储（修改 settings.xml）时同样拒绝。
+    """
+    engine = engine or DEFAULT_ENGINE
+    check_engine(engine)
+    if layout is not None and layout not in history_index.LAYOUTS:
+        raise ValueError(f"未知的目录布局: {layout}")
+    key = (engine, os.path.abspath(save_directory), file_naming)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = STORAGE_ENGINES[engine](save_directory, file_naming)
+            _stores[key] = store
+        if layout is not None and isinstance(store, JsonFileStore):
+            store.layout = layout
+        return store
+
+
+def store_from_settings(settings):
+    """根据设置获取存储实例"""
+    return get_store(
+        settings.get('storageEngine', DEFAULT_ENGINE),
+        settings.get('saveDirectory', './downloads'),
+        settings.get('fileNaming', '每日记录_{date}'),
+        settings.get('directoryLayout', history_index.DEFAULT_LAYOUT)
+    )
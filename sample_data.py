@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog 合成数据生成器
+生成若干年的每日记录，结构与页面保存时（script.js 的 saveDailyRecord）相同：
+dateInfo、plans（重要性/紧急程度/开始时间/时长/完成状态）、reflection、
+completionDetails 和 statistics，用于在接近真实规模的数据上验证性能改动。
+
+- 文件命名支持 WeeklyTaskManager.get_possible_filenames 接受的全部格式，
+  --naming mixed 时每天随机使用其中一种（Web页面只列出与设置中命名格式一致的文件，
+  混合命名主要用于测试每周任务的兼容读取）
+- --text-chars 控制每条记录的自由文本量，--cjk-ratio 控制其中中文文本的比例
+- 每条记录只由随机种子和日期决定，同样的参数总是生成完全相同的文件
+
+用法:
+    python sample_data.py --output ./sample_records --years 3
+    python sample_data.py --output ./sample_records --years 10 --naming mixed --layout sharded
+    python sample_data.py --output ./sample_records --years 1 --text-chars 2000 --cjk-ratio 0.5 --seed 7
+"""
+
+import calendar
+import json
+import random
+import sys
+from datetime import date as date_type, datetime, timedelta
+from pathlib import Path
+
+import history_index
+
+
+# 页面的默认命名格式，以及每周任务兼容读取的其他格式（顺序与 get_possible_filenames 相同）
+DEFAULT_NAMING = '每日记录_{date}'
+NAMING_PATTERNS = (
+    '每日记录_{date}',
+    'daily_record_{date}',
+    '{date}_记录',
+    'daily-record-{date}',
+    '{date}',
+)
+MIXED_NAMING = 'mixed'
+
+# 默认以该日期为最后一天，保证不指定 --end 时结果也可重复
+DEFAULT_END_DATE = date_type(2024, 12, 31)
+
+DEFAULT_TEXT_CHARS = 300
+DEFAULT_CJK_RATIO = 1.0
+
+# 与页面表单中的选项一致
+IMPORTANCE_LEVELS = ('十分重要', '重要', '一般重要', '不重要')
+URGENCY_LEVELS = ('十分紧急', '紧急', '不紧急')
+DURATIONS = ('15分钟', '30分钟', '45分钟', '1小时', '1.5小时', '2小时', '3小时')
+WEEKDAY_NAMES = ('周日', '周一', '周二', '周三', '周四', '周五', '周六')
+FULL_WEEKDAY_NAMES = ('星期日', '星期一', '星期二', '星期三', '星期四', '星期五', '星期六')
+
+CJK_EVENTS = ('晨跑', '阅读', '写周报', '整理房间', '学习英语', '代码评审', '项目会议',
+              '健身', '练习书法', '复习笔记', '准备演讲', '给家人打电话', '买菜做饭', '冥想')
+ASCII_EVENTS = ('Morning run', 'Reading', 'Weekly report', 'Tidy room', 'Study English',
+                'Code review', 'Project meeting', 'Workout', 'Review notes', 'Meditation')
+CJK_PHRASES = ('今天完成了计划中的大部分任务', '上午的效率比较高', '下午被会议打断了几次',
+               '需要更早开始最重要的事情', '晚上读完了一章书', '和同事讨论了新的方案',
+               '坚持运动让精神更好', '时间安排还可以更紧凑', '感谢朋友的帮助',
+               '明天要把拖延的事情先做完', '学到了一个新的方法', '休息不足影响了状态',
+               '把大任务拆成小步骤更容易推进', '天气很好心情也不错')
+ASCII_WORDS = ('today', 'finished', 'most', 'planned', 'tasks', 'morning', 'was', 'focused',
+               'meetings', 'interrupted', 'afternoon', 'start', 'earlier', 'read', 'chapter',
+               'discussed', 'new', 'approach', 'exercise', 'helped', 'tomorrow', 'learned')
+CJK_PUNCTUATION = ('，', '。', '；', '！')
+
+# 自由文本按权重分配给各字段（反思和感恩按每个条目计，detail 为未完成原因和调整策略）
+TEXT_WEIGHTS = {'dailyThoughts': 4.0, 'progress': 1.0, 'improvements': 1.0,
+                'gratitude': 0.5, 'detail': 0.5}
+
+
+def record_filename(date, naming=DEFAULT_NAMING):
+    """返回某天记录的文件名"""
+    return f"{naming.replace('{date}', date)}.json"
+
+
+def _text(rng, length, cjk):
+    """生成约 length 个字符的文本"""
+    parts = []
+    size = 0
+    while size < length:
+        if cjk:
+            part = rng.choice(CJK_PHRASES) + rng.choice(CJK_PUNCTUATION)
+        else:
+            part = rng.choice(ASCII_WORDS) + ' '
+        parts.append(part)
+        size += len(part)
+    return ''.join(parts).strip()
+
+
+def generate_record(date, seed=0, text_chars=DEFAULT_TEXT_CHARS, cjk_ratio=DEFAULT_CJK_RATIO):
+    """生成某天的日记记录（只由种子和日期决定）
+
+    Args:
+        date: 日期字符串 YYYY-MM-DD
+        seed: 随机种子
+        text_chars: 自由文本（反思、未完成原因和调整策略）的大致总字符数
+        cjk_ratio: 自由文本中使用中文的比例（0 表示全部为英文）
+    """
+    day = datetime.strptime(date, '%Y-%m-%d').date()
+    rng = random.Random(f"{seed}:{date}")
+
+    # 少数日期没有计划（completionRate 与页面一致为数字 0）
+    plan_count = 0 if rng.random() < 0.05 else rng.randint(1, 8)
+    started_ms = calendar.timegm(day.timetuple()) * 1000
+    plans = []
+    hour, minute = rng.randint(6, 9), 0
+    for i in range(plan_count):
+        events = CJK_EVENTS if rng.random() < cjk_ratio else ASCII_EVENTS
+        plans.append({
+            'id': started_ms + rng.randint(0, 999) + i * 1000,
+            'event': rng.choice(events),
+            'importance': rng.choice(IMPORTANCE_LEVELS),
+            'urgency': rng.choice(URGENCY_LEVELS),
+            'startTime': f'{hour:02d}:{minute:02d}',
+            'duration': rng.choice(DURATIONS),
+            'completed': rng.random() < 0.65,
+        })
+        minute += rng.choice((30, 60, 90, 120))
+        hour, minute = min(23, hour + minute // 60), minute % 60
+
+    # 先确定各文本字段，再按权重把 text_chars 分配给它们，使总文本量不随条目数变化
+    incomplete = [str(plan['id']) for plan in plans
+                  if not plan['completed'] and rng.random() < 0.7]
+    counts = {'progress': rng.randint(1, 3), 'improvements': rng.randint(0, 2),
+              'gratitude': rng.randint(0, 3)}
+    total_weight = (TEXT_WEIGHTS['dailyThoughts'] + len(incomplete) * 2 * TEXT_WEIGHTS['detail']
+                    + sum(count * TEXT_WEIGHTS[key] for key, count in counts.items()))
+
+    def text(weight):
+        length = max(1, round(text_chars * weight / total_weight))
+        return _text(rng, length, rng.random() < cjk_ratio)
+
+    completion_details = {
+        plan_id: {'incompleteReason': text(TEXT_WEIGHTS['detail']),
+                  'adjustmentStrategy': text(TEXT_WEIGHTS['detail'])}
+        for plan_id in incomplete
+    }
+    reflection = {key: [text(TEXT_WEIGHTS[key]) for _ in range(count)]
+                  for key, count in counts.items()}
+    reflection['dailyThoughts'] = text(TEXT_WEIGHTS['dailyThoughts'])
+
+    completed = sum(1 for plan in plans if plan['completed'])
+    weekday = (day.weekday() + 1) % 7  # 与 JavaScript 的 getDay() 相同，周日为0
+    saved_at = datetime(day.year, day.month, day.day, rng.randint(20, 23),
+                        rng.randint(0, 59), rng.randint(0, 59))
+    return {
+        'date': date,
+        'dateInfo': {
+            'year': day.year,
+            'month': day.month,
+            'day': day.day,
+            'weekday': weekday,
+            'weekdayName': WEEKDAY_NAMES[weekday],
+            'fullDateString': f'{day.year}年{day.month}月{day.day}日{FULL_WEEKDAY_NAMES[weekday]}',
+        },
+        'plans': plans,
+        'reflection': reflection,
+        'completionDetails': completion_details,
+        'statistics': {
+            'totalPlans': len(plans),
+            'completedPlans': completed,
+            'completionRate': f'{completed / len(plans) * 100:.1f}' if plans else 0,
+        },
+        'savedAt': saved_at.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+        'version': '1.0',
+    }
+
+
+def start_of_years(end, years):
+    """返回以 end 为最后一天、共 years 年的起始日期"""
+    try:
+        start = end.replace(year=end.year - years)
+    except ValueError:  # 2月29日
+        start = end.replace(year=end.year - years, day=28)
+    return start + timedelta(days=1)
+
+
+def generate(output_dir, start, end=DEFAULT_END_DATE, naming=DEFAULT_NAMING,
+             layout=history_index.DEFAULT_LAYOUT, seed=0, text_chars=DEFAULT_TEXT_CHARS,
+             cjk_ratio=DEFAULT_CJK_RATIO, density=1.0):
+    """在 output_dir 中生成 start 到 end（含）的记录，返回写入的日期列表（升序）
+
+    Args:
+        naming: 文件命名格式（含 {date}），或 'mixed' 表示每天随机使用 NAMING_PATTERNS 之一
+        layout: 'flat' 平铺，或 'sharded' 按 YYYY/MM/ 分目录
+        density: 有记录的日期比例（真实数据中常有未记录的日子）
+    """
+    if naming != MIXED_NAMING and '{date}' not in naming:
+        raise ValueError(f"命名格式必须包含 {{date}}: {naming}")
+    if layout not in history_index.LAYOUTS:
+        raise ValueError(f"不支持的目录布局: {layout}")
+
+    output_dir = Path(output_dir)
+    rng = random.Random(seed)
+    dates = []
+    day = start
+    while day <= end:
+        date = day.isoformat()
+        day += timedelta(days=1)
+        # 每天固定取两个随机数，使某天用哪种命名不受 density 影响
+        present = rng.random() < density
+        pattern = rng.choice(NAMING_PATTERNS)
+        if not present:
+            continue
+
+        directory = output_dir
+        if layout == 'sharded':
+            directory = output_dir / history_index.shard_dir(date)
+        directory.mkdir(parents=True, exist_ok=True)
+        filename = record_filename(date, pattern if naming == MIXED_NAMING else naming)
+        record = generate_record(date, seed, text_chars, cjk_ratio)
+        (directory / filename).write_text(json.dumps(record, ensure_ascii=False, indent=2),
+                                          encoding='utf-8')
+        dates.append(date)
+    return dates
+
+
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='QuirkLog 合成数据生成器')
+    parser.add_argument('--output', required=True, help='输出目录')
+    parser.add_argument('--years', type=int, default=1, help='生成的年数')
+    parser.add_argument('--end', default=DEFAULT_END_DATE.isoformat(),
+                        help='最后一天 YYYY-MM-DD（默认 %(default)s）')
+    parser.add_argument('--naming', default=DEFAULT_NAMING,
+                        help=f"文件命名格式（含 {{date}}），或 {MIXED_NAMING} 混合使用全部兼容格式")
+    parser.add_argument('--layout', choices=history_index.LAYOUTS,
+                        default=history_index.DEFAULT_LAYOUT, help='目录布局')
+    parser.add_argument('--text-chars', type=int, default=DEFAULT_TEXT_CHARS,
+                        help='每条记录的自由文本字符数（约）')
+    parser.add_argument('--cjk-ratio', type=float, default=DEFAULT_CJK_RATIO,
+                        help='自由文本中中文的比例（0-1）')
+    parser.add_argument('--density', type=float, default=1.0, help='有记录的日期比例（0-1）')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    args = parser.parse_args(argv)
+    if args.years < 1:
+        parser.error('--years 必须大于0')
+    return args
+
+
+def main(argv=None):
+    """主函数"""
+    args = parse_args(argv)
+    try:
+        end = datetime.strptime(args.end, '%Y-%m-%d').date()
+        dates = generate(args.output, start_of_years(end, args.years), end, args.naming,
+                         args.layout, args.seed, args.text_chars, args.cjk_ratio, args.density)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return False
+    print(f"✅ 已生成 {len(dates)} 条记录到 {args.output}", file=sys.stderr)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
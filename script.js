@@ -614,6 +614,8 @@ class DailyPlanner {
         })
         .catch(error => {
             console.error('❌ 网络错误:', error);
+            // 记下这一天，下次同步时上传到服务器
+            addPendingSync(dailyRecord.date);
             this.showMessage('⚠️ 网络错误，尝试下载到本地', 'warning');
             this.downloadAsFile(dailyRecord, fileName);
         });
@@ -1455,12 +1457,17 @@ document.addEventListener('DOMContentLoaded', () => {
         loadSettings();
         setupSettingsEventListeners();
         loadRecordTree();
+        connectLiveEvents();
     }, 100);
 });
 
 // 侧边栏功能
 let isSidebarOpen = false;
 let recordTree = {};
+// 按日期索引的侧边栏记录，实时事件到达时在此基础上增量更新
+let recordIndex = new Map();
+// 侧边栏是否需要重新加载完整列表（仅本地保存等实时事件覆盖不到的变化）
+let recordTreeStale = true;
 
 function toggleSidebar() {
     const sidebar = document.getElementById('sidebar');
@@ -1468,7 +1475,12 @@ function toggleSidebar() {
     
     if (isSidebarOpen) {
         sidebar.classList.add('active');
-        loadRecordTree();
+        // 实时事件保持侧边栏最新时，无需重新下载完整列表
+        if (recordTreeStale || !isLiveEventsConnected()) {
+            loadRecordTree();
+        } else {
+            renderRecordTree();
+        }
     } else {
         sidebar.classList.remove('active');
     }
@@ -1478,52 +1490,231 @@ function loadRecordTree() {
     // 从localStorage和服务器文件系统加载所有历史记录
     const allRecords = getAllStoredRecords();
     
-    // 同时尝试从服务器加载历史文件
-    loadHistoryFromServer().then(serverRecords => {
+    // 同时从服务器增量同步历史文件
+    syncWithServer().then(serverRecords => {
         // 合并本地和服务器记录
         const mergedRecords = mergeRecords(allRecords, serverRecords);
-        recordTree = buildTreeStructure(mergedRecords);
-        renderRecordTree();
+        setRecordIndex(mergedRecords);
+        recordTreeStale = false;
     }).catch(error => {
         console.log('从服务器加载历史记录失败，使用本地记录:', error);
-        recordTree = buildTreeStructure(allRecords);
-        renderRecordTree();
+        setRecordIndex(allRecords);
+    });
+}
+
+function setRecordIndex(records) {
+    recordIndex = new Map(records.map(record => [record.date, record]));
+    recordTree = buildTreeStructure(records);
+    renderRecordTree();
+}
+
+// 增量同步：本地缓存服务器的文件列表和同步到的版本号，每次只获取此后变化的条目
+const SYNC_STATE_KEY = 'quirklog-sync-state';
+const SYNC_PENDING_KEY = 'quirklog-sync-pending';
+const SYNC_BATCH_SIZE = 20;
+let syncState = null;
+
+function getSyncState() {
+    if (!syncState) {
+        try {
+            syncState = JSON.parse(localStorage.getItem(SYNC_STATE_KEY));
+        } catch (e) {
+            syncState = null;
+        }
+        if (!syncState || !syncState.files) {
+            syncState = { logId: null, version: 0, files: {} };
+        }
+    }
+    return syncState;
+}
+
+function storeSyncState() {
+    try {
+        localStorage.setItem(SYNC_STATE_KEY, JSON.stringify(syncState));
+    } catch (e) {
+        // 超出存储配额时只保留在内存中，下次打开页面全量同步
+        console.log('同步状态未能写入本地存储:', e);
+        localStorage.removeItem(SYNC_STATE_KEY);
+    }
+}
+
+function getPendingSync() {
+    try {
+        return JSON.parse(localStorage.getItem(SYNC_PENDING_KEY)) || [];
+    } catch (e) {
+        return [];
+    }
+}
+
+function addPendingSync(date) {
+    const pending = getPendingSync();
+    if (!pending.includes(date)) {
+        pending.push(date);
+        localStorage.setItem(SYNC_PENDING_KEY, JSON.stringify(pending));
+    }
+}
+
+function removePendingSync(dates) {
+    const pending = getPendingSync().filter(date => !dates.includes(date));
+    localStorage.setItem(SYNC_PENDING_KEY, JSON.stringify(pending));
+}
+
+// 待上传的本地修改（仅自动保存到服务器时上传）
+function collectPendingChanges(state) {
+    if (!currentSettings.autoSave || !currentSettings.saveDirectory) {
+        return [];
+    }
+    
+    const changes = [];
+    const missing = [];
+    getPendingSync().slice(0, SYNC_BATCH_SIZE).forEach(date => {
+        const recordData = localStorage.getItem(`daily-record-${date}`);
+        if (!recordData) {
+            missing.push(date);
+            return;
+        }
+        changes.push({
+            date: date,
+            baseVersion: state.files[date] ? state.files[date].version : 0,
+            record: JSON.parse(recordData)
+        });
     });
+    if (missing.length > 0) {
+        removePendingSync(missing);
+    }
+    return changes;
 }
 
-function loadHistoryFromServer() {
-    return fetch('/api/history-files')
+function syncWithServer() {
+    const state = getSyncState();
+    const changes = collectPendingChanges(state);
+    const params = new URLSearchParams({ since: state.version });
+    if (state.logId) {
+        params.set('logId', state.logId);
+    }
+    
+    return fetch(`/api/sync?${params}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ changes: changes })
+    })
         .then(response => response.json())
         .then(data => {
-            if (data.status === 'success') {
-                console.log(`📂 发现 ${data.files.length} 个历史文件，保存目录: ${data.saveDirectory}`);
-                
-                // 为服务器文件创建基本记录结构，用于显示在侧边栏
-                return data.files.map(file => ({
-                    date: file.date,
-                    data: {
-                        // 为了在侧边栏显示，创建基本的数据结构
-                        plans: [], // 空数组，实际数据在点击时加载
-                        dateInfo: {
-                            year: parseInt(file.date.split('-')[0]),
-                            month: parseInt(file.date.split('-')[1]),
-                            day: parseInt(file.date.split('-')[2]),
-                            weekdayName: new Date(file.date).toLocaleDateString('zh-CN', { weekday: 'long' })
-                        }
-                    },
-                    source: 'server',
-                    filename: file.filename,
-                    path: file.path,
-                    size: file.size,
-                    modified: new Date(file.modified * 1000),
-                    lazyLoad: true // 标记为延迟加载
-                }));
-            } else {
-                throw new Error(data.message || '获取历史文件失败');
+            if (data.status !== 'success') {
+                throw new Error(data.message || '同步历史文件失败');
+            }
+            
+            if (data.reset) {
+                state.files = {};
             }
+            data.changes.forEach(file => {
+                if (file.deleted) {
+                    delete state.files[file.date];
+                } else {
+                    state.files[file.date] = file;
+                }
+            });
+            state.logId = data.logId;
+            state.version = data.version;
+            storeSyncState();
+            
+            // 已上传或与服务器冲突（服务器版本更新，以服务器为准）的日期不再重试
+            const settled = data.applied.concat(data.conflicts).map(change => change.date);
+            if (settled.length > 0) {
+                removePendingSync(settled);
+            }
+            data.conflicts.forEach(conflict => {
+                console.log(`⚠️ ${conflict.date} 的记录在服务器上已有更新版本，未上传本地修改`);
+            });
+            
+            const files = Object.values(state.files);
+            console.log(`📂 同步了 ${data.changes.length} 处变化，共 ${files.length} 个历史文件（版本 ${data.version}）`);
+            return files.map(serverFileToRecord);
         });
 }
 
+// 为服务器文件创建基本记录结构，用于显示在侧边栏
+function serverFileToRecord(file) {
+    return {
+        date: file.date,
+        data: {
+            // 为了在侧边栏显示，创建基本的数据结构
+            plans: [], // 空数组，实际数据在点击时加载
+            dateInfo: {
+                year: parseInt(file.date.split('-')[0]),
+                month: parseInt(file.date.split('-')[1]),
+                day: parseInt(file.date.split('-')[2]),
+                weekdayName: new Date(file.date).toLocaleDateString('zh-CN', { weekday: 'long' })
+            }
+        },
+        source: 'server',
+        filename: file.filename,
+        path: file.path,
+        size: file.size,
+        modified: new Date(file.modified * 1000),
+        lazyLoad: true // 标记为延迟加载
+    };
+}
+
+// 实时事件：服务器推送记录保存、设置修改和每周洞察生成，侧边栏增量更新
+let liveEvents = null;
+
+function connectLiveEvents() {
+    if (!window.EventSource || liveEvents) {
+        return;
+    }
+    
+    liveEvents = new EventSource('/api/events');
+    
+    liveEvents.addEventListener('record-saved', event => {
+        // 事件内容与 /api/history-files 中的条目一致，只更新这一天
+        const record = serverFileToRecord(JSON.parse(event.data));
+        recordIndex.set(record.date, record);
+        recordTree = buildTreeStructure(Array.from(recordIndex.values()));
+        if (isSidebarOpen) {
+            renderRecordTree();
+        }
+    });
+    
+    liveEvents.addEventListener('settings-changed', () => {
+        // 保存目录或命名格式可能已变化，重新加载完整列表
+        recordTreeStale = true;
+        if (isSidebarOpen) {
+            loadRecordTree();
+        }
+    });
+    
+    liveEvents.addEventListener('weekly-insight', event => {
+        const insight = JSON.parse(event.data);
+        console.log('🤖 每周洞察已生成:', insight.filename);
+        if (planner) {
+            planner.showMessage(`🤖 ${insight.year}年第${insight.weekNumber}周的AI洞察已生成`, 'success');
+        }
+    });
+    
+    liveEvents.addEventListener('resync', () => {
+        // 断线期间错过了事件，重新加载完整列表
+        recordTreeStale = true;
+        if (isSidebarOpen) {
+            loadRecordTree();
+        }
+    });
+    
+    liveEvents.onerror = () => {
+        // 连接数已满或服务器不支持时 EventSource 不再重连，退回保存后刷新列表的方式
+        if (liveEvents.readyState === EventSource.CLOSED) {
+            console.log('实时事件连接已关闭，改为保存后刷新侧边栏');
+            liveEvents = null;
+        }
+    };
+}
+
+function isLiveEventsConnected() {
+    return liveEvents !== null && liveEvents.readyState === EventSource.OPEN;
+}
+
 function mergeRecords(localRecords, serverRecords) {
     const merged = new Map();
     
@@ -1947,6 +2138,12 @@ function validateRecordIntegrity(record, expectedDate) {
 
 // 更新保存功能以刷新树状结构
 function updateRecordTreeAfterSave() {
+    // 保存到服务器时实时事件会推送新条目，无需重新下载完整列表
+    if (isLiveEventsConnected() && currentSettings.autoSave && currentSettings.saveDirectory) {
+        return;
+    }
+    
+    recordTreeStale = true;
     if (isSidebarOpen) {
         setTimeout(() => {
             loadRecordTree();
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog 全文搜索索引
+对计划事项和反思内容建立倒排索引，支持中文（单字+二元组）分词、BM25排序和日期过滤
+"""
+
+import bisect
+import json
+import math
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+
+import process_lock
+
+
+# 索引文件名（保存在数据目录中，以点开头避免被当作记录文件）
+SEARCH_INDEX_FILENAME = '.quirklog_search.jsonl'
+SEARCH_INDEX_VERSION = 1
+
+# 日志行数超过文档数的该倍数时压缩索引文件
+COMPACT_RATIO = 2
+
+# 搜索结果数量的默认值和上限
+DEFAULT_RESULT_LIMIT = 20
+MAX_RESULT_LIMIT = 100
+
+# 摘要中匹配位置前后保留的字符数
+SNIPPET_CONTEXT = 30
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 中日韩统一表意文字及常用扩展区
+CJK_PATTERN = r'㐀-䶿一-鿿豈-﫿'
+TOKEN_RE = re.compile(rf'[{CJK_PATTERN}]+|[0-9a-z]+')
+CJK_RE = re.compile(rf'[{CJK_PATTERN}]')
+
+# 反思中被索引的列表字段
+REFLECTION_LIST_FIELDS = ('progress', 'improvements', 'gratitude')
+
+
+def tokenize(text, for_query=False):
+    """分词：英文和数字按单词切分，中文按单字和相邻二元组切分
+
+    查询时中文连续两个字以上只使用二元组（要求字序一致），
+    单个汉字的查询使用单字。
+    """
+    tokens = []
+    for run in TOKEN_RE.findall((text or '').lower()):
+        if not CJK_RE.match(run):
+            tokens.append(run)
+            continue
+        bigrams = [run[i:i + 2] for i in range(len(run) - 1)]
+        if for_query:
+            tokens.extend(bigrams or [run])
+        else:
+            tokens.extend(run)
+            tokens.extend(bigrams)
+    return tokens
+
+
+def searchable_fields(record):
+    """返回记录中需要被索引的 (字段名, 文本) 列表"""
+    fields = []
+    for position, plan in enumerate(record.get('plans') or []):
+        if isinstance(plan, dict) and plan.get('event'):
+            fields.append((f'plans[{position}].event', str(plan['event'])))
+
+    reflection = record.get('reflection') or {}
+    for name in REFLECTION_LIST_FIELDS:
+        for position, item in enumerate(reflection.get(name) or []):
+            if item:
+                fields.append((f'reflection.{name}[{position}]', str(item)))
+    if reflection.get('dailyThoughts'):
+        fields.append(('reflection.dailyThoughts', str(reflection['dailyThoughts'])))
+    return fields
+
+
+def make_snippet(text, terms):
+    """截取文本中第一个匹配词附近的片段"""
+    lowered = text.lower()
+    positions = [lowered.find(term) for term in terms if term in lowered]
+    if not positions:
+        return None
+    start = min(positions)
+    left = max(0, start - SNIPPET_CONTEXT)
+    right = min(len(text), start + SNIPPET_CONTEXT * 2)
+    snippet = text[left:right]
+    if left > 0:
+        snippet = '…' + snippet
+    if right < len(text):
+        snippet += '…'
+    return snippet
+
+
+class SearchIndex:
+    """单个存储的全文搜索索引
+
+    索引文件为追加写入的JSON Lines：首行为头部，其后每行是一条记录的
+    词频向量（同一日期以最后一行为准）。加载时在内存中构建
+    词 → {日期: 词频} 的倒排表，查询不需要读取任何记录文件。
+    保存记录时增量追加；首次加载时按存储中各记录的修改时间对账，
+    只重新索引有变化的记录。其他进程写过索引文件后重新加载。
+
+    lock 是数据目录的进程间锁，只在写入和重新加载时持有；索引文件未变化时
+    查询只持有进程内的锁。加锁顺序总是先 lock 后进程内的锁。
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.index_path = Path(store.save_directory) / SEARCH_INDEX_FILENAME
+        self.lock = process_lock.get_lock(store.save_directory)
+        self._mutex = threading.RLock()
+        self._docs = {}
+        self._postings = {}
+        self._dates = []
+        self._total_length = 0
+        self._journal_lines = 0
+        self._file_version = None
+        self._loaded = False
+
+    # ---- 内存索引 ----
+
+    def _add_doc(self, date, modified, terms):
+        self._remove_doc(date)
+        length = sum(terms.values())
+        self._docs[date] = {'modified': modified, 'len': length, 'terms': terms}
+        self._total_length += length
+        bisect.insort(self._dates, date)
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[date] = count
+
+    def _remove_doc(self, date):
+        doc = self._docs.pop(date, None)
+        if doc is None:
+            return
+        self._total_length -= doc['len']
+        del self._dates[bisect.bisect_left(self._dates, date)]
+        for term in doc['terms']:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(date, None)
+                if not posting:
+                    del self._postings[term]
+
+    @staticmethod
+    def _term_counts(record):
+        tokens = []
+        for _, text in searchable_fields(record):
+            tokens.extend(tokenize(text))
+        return dict(Counter(tokens))
+
+    # ---- 持久化 ----
+
+    def _header(self):
+        return {'version': SEARCH_INDEX_VERSION, 'engine': self.store.engine}
+
+    def _load_from_disk(self):
+        """读取索引文件，头部不匹配或文件损坏时返回False"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return False
+
+        try:
+            if json.loads(lines[0]) != self._header():
+                return False
+            for line in lines[1:]:
+                item = json.loads(line)
+                if item.get('deleted'):
+                    self._remove_doc(item['date'])
+                else:
+                    self._add_doc(item['date'], item['modified'], item['terms'])
+        except (ValueError, KeyError, IndexError):
+            self._docs, self._postings, self._dates, self._total_length = {}, {}, [], 0
+            return False
+
+        self._journal_lines = len(lines) - 1
+        self._file_version = process_lock.file_version(self.index_path)
+        return True
+
+    def _write_snapshot(self):
+        lines = [json.dumps(self._header())]
+        lines.extend(json.dumps(dict(self._docs[date], date=date), ensure_ascii=False)
+                     for date in self._dates)
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        self._journal_lines = len(self._dates)
+        self._file_version = process_lock.file_version(self.index_path)
+
+    def _persist(self, items):
+        """追加若干行变化，日志过长时压缩"""
+        try:
+            if (not self.index_path.exists() or
+                    self._journal_lines + len(items) >= COMPACT_RATIO * max(len(self._docs), 16)):
+                self._write_snapshot()
+                return
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                for item in items:
+                    f.write(json.dumps(item, ensure_ascii=False) + '\n')
+            self._journal_lines += len(items)
+            self._file_version = process_lock.file_version(self.index_path)
+        except OSError as e:
+            print(f"⚠️ 写入搜索索引失败: {e}")
+
+    def _reconcile(self):
+        """与存储中的记录对账，重新索引新增或修改过的记录"""
+        entries, _, _ = self.store.query(fields=['date', 'modified'])
+        current = {entry['date']: entry['modified'] for entry in entries}
+        changes = []
+        for date in [date for date in self._docs if date not in current]:
+            self._remove_doc(date)
+            changes.append({'date': date, 'deleted': True})
+        for date, modified in current.items():
+            doc = self._docs.get(date)
+            if doc is not None and doc['modified'] == modified:
+                continue
+            record = self.store.load(date)
+            if record is None:
+                continue
+            terms = self._term_counts(record)
+            self._add_doc(date, modified, terms)
+            changes.append({'date': date, 'modified': modified, 'terms': terms})
+        if changes:
+            print(f"🔎 搜索索引已更新 {len(changes)} 条记录")
+            self._persist(changes)
+
+    def _is_fresh(self):
+        return (self._loaded and
+                process_lock.file_version(self.index_path) == self._file_version)
+
+    def ensure_loaded(self):
+        """首次使用时（或其他进程写过索引文件后）加载索引文件并与存储对账"""
+        with self._mutex:
+            if self._is_fresh():
+                return
+        with self.lock, self._mutex:
+            if self._is_fresh():
+                return
+            self._docs, self._postings, self._dates, self._total_length = {}, {}, [], 0
+            self._journal_lines = 0
+            if not self._load_from_disk():
+                try:
+                    self.index_path.unlink()
+                except OSError:
+                    pass
+            if Path(self.store.save_directory).exists():
+                self._reconcile()
+            self._loaded = True
+
+    def record_saved(self, date, record):
+        """记录保存后增量更新索引"""
+        with self.lock, self._mutex:
+            self.ensure_loaded()
+            entries, _, _ = self.store.query(date, date, fields=['modified'])
+            modified = entries[0]['modified'] if entries else None
+            terms = self._term_counts(record)
+            self._add_doc(date, modified, terms)
+            self._persist([{'date': date, 'modified': modified, 'terms': terms}])
+
+    # ---- 查询 ----
+
+    def search(self, text, date_from=None, date_to=None, limit=DEFAULT_RESULT_LIMIT):
+        """搜索记录，按匹配词数和BM25得分排序
+
+        Returns:
+            tuple: (结果列表, 匹配的记录总数)，结果包含 date、score 和 matches 摘要
+        """
+        terms = list(dict.fromkeys(tokenize(text, for_query=True)))
+        if not terms:
+            return [], 0
+
+        self.ensure_loaded()
+        with self._mutex:
+            doc_count = len(self._docs)
+            if not doc_count:
+                return [], 0
+            avg_length = self._total_length / doc_count or 1
+
+            scores = {}
+            matched = Counter()
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+                for date, count in posting.items():
+                    if (date_from and date < date_from) or (date_to and date > date_to):
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._docs[date]['len'] / avg_length)
+                    scores[date] = scores.get(date, 0.0) + idf * count * (BM25_K1 + 1) / (count + norm)
+                    matched[date] += 1
+
+        ranked = sorted(scores, key=lambda date: (matched[date], scores[date], date), reverse=True)
+        results = []
+        for date in ranked[:limit]:
+            results.append({
+                'date': date,
+                'score': round(scores[date], 4),
+                'matchedTerms': matched[date],
+                'matches': self._matches(date, terms)
+            })
+        return results, len(ranked)
+
+    def _matches(self, date, terms):
+        """读取记录，返回包含查询词的字段及摘要"""
+        try:
+            record = self.store.load(date) or {}
+        except Exception:
+            return []
+        matches = []
+        for field, text in searchable_fields(record):
+            snippet = make_snippet(text, terms)
+            if snippet:
+                matches.append({'field': field, 'snippet': snippet})
+        return matches
+
+
+# 进程级索引注册表，每个存储实例对应一个搜索索引
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(store):
+    """获取（必要时创建）指定存储的搜索索引"""
+    with _indexes_lock:
+        index = _indexes.get(id(store))
+        if index is None or index.store is not store:
+            index = SearchIndex(store)
+            _indexes[id(store)] = index
+        return index
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog 服务器指标
+按路由统计请求数、状态码、收发字节数和延迟直方图，并以 Prometheus 文本格式导出。
+两种服务器实现（web_server.py 和 async_server.py）共用同一个进程级注册表。
+
+设置环境变量 QUIRKLOG_METRICS=0（或启动时传入 --no-metrics）可完全关闭统计。
+"""
+
+import bisect
+import os
+import threading
+
+
+# 延迟直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+METRIC_PREFIX = 'quirklog_http'
+
+
+def metrics_enabled_from_env():
+    """读取 QUIRKLOG_METRICS 环境变量，未设置时默认开启"""
+    value = os.environ.get('QUIRKLOG_METRICS', '1').strip().lower()
+    return value not in ('0', 'false', 'no', 'off')
+
+
+class CountingWriter:
+    """包装响应输出流，统计写出的字节数并记录本次响应的状态码
+
+    其余属性和方法原样转发给被包装的流，既可包装 http.server 的 wfile，
+    也可包装 asyncio 的 StreamWriter。
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.bytes_written = 0
+        self.status = None
+
+    def write(self, data):
+        self.bytes_written += len(data)
+        return self._stream.write(data)
+
+    def reset(self):
+        """开始处理新请求前清零"""
+        self.bytes_written = 0
+        self.status = None
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class _RouteStats:
+    """单个 (方法, 路由) 的累计数据"""
+
+    __slots__ = ('statuses', 'buckets', 'duration_sum', 'count', 'bytes_in', 'bytes_out')
+
+    def __init__(self):
+        self.statuses = {}
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.duration_sum = 0.0
+        self.count = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_number(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+class MetricsRegistry:
+    """线程安全的请求指标注册表
+
+    observe() 只做一次加锁和几次整数累加；关闭后直接返回，不产生任何开销。
+    路由标签由调用方归一化（见 api_handlers.route_label），避免标签数量无限增长。
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def observe(self, method, route, status, duration, bytes_in=0, bytes_out=0):
+        """记录一次请求"""
+        if not self.enabled:
+            return
+        index = bisect.bisect_left(LATENCY_BUCKETS, duration)
+        with self._lock:
+            stats = self._routes.get((method, route))
+            if stats is None:
+                stats = self._routes[(method, route)] = _RouteStats()
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.buckets[index] += 1
+            stats.duration_sum += duration
+            stats.count += 1
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+
+    def snapshot(self):
+        """返回 {(方法, 路由): 统计字典} 的副本"""
+        with self._lock:
+            return {key: {'statuses': dict(stats.statuses),
+                          'buckets': list(stats.buckets),
+                          'sum': stats.duration_sum,
+                          'count': stats.count,
+                          'bytesIn': stats.bytes_in,
+                          'bytesOut': stats.bytes_out}
+                    for key, stats in self._routes.items()}
+
+    def render(self):
+        """生成 Prometheus 文本格式的指标"""
+        routes = sorted(self.snapshot().items())
+        lines = []
+
+        name = f'{METRIC_PREFIX}_requests_total'
+        lines.append(f'# HELP {name} 按路由和状态码统计的请求数')
+        lines.append(f'# TYPE {name} counter')
+        for (method, route), stats in routes:
+            for status, count in sorted(stats['statuses'].items(), key=lambda item: str(item[0])):
+                lines.append(f'{name}{{method="{method}",route="{_escape_label(route)}",'
+                             f'status="{status}"}} {count}')
+
+        name = f'{METRIC_PREFIX}_request_duration_seconds'
+        lines.append(f'# HELP {name} 请求处理耗时（从请求解析完成到响应写出）')
+        lines.append(f'# TYPE {name} histogram')
+        for (method, route), stats in routes:
+            labels = f'method="{method}",route="{_escape_label(route)}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {stats["count"]}')
+            lines.append(f'{name}_sum{{{labels}}} {_format_number(stats["sum"])}')
+            lines.append(f'{name}_count{{{labels}}} {stats["count"]}')
+
+        for key, metric, help_text in (('bytesIn', 'request_bytes_total', '收到的请求体字节数'),
+                                       ('bytesOut', 'response_bytes_total', '写出的响应字节数（含响应头）')):
+            name = f'{METRIC_PREFIX}_{metric}'
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for (method, route), stats in routes:
+                lines.append(f'{name}{{method="{method}",route="{_escape_label(route)}"}} '
+                             f'{stats[key]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+# 进程级注册表
+metrics = MetricsRegistry(enabled=metrics_enabled_from_env())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog 设置读取与缓存
+Web服务器和定时任务共享的 settings.xml 进程级缓存
+"""
+
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from types import MappingProxyType
+
+
+# 默认设置文件路径，可通过环境变量 QUIRKLOG_SETTINGS_FILE 覆盖
+DEFAULT_SETTINGS_FILE = 'settings.xml'
+
+# 两次检查文件版本之间的最小间隔（秒），在此期间直接返回缓存
+DEFAULT_CHECK_INTERVAL = 1.0
+
+
+def settings_path():
+    """返回当前使用的设置文件路径"""
+    return Path(os.environ.get('QUIRKLOG_SETTINGS_FILE', DEFAULT_SETTINGS_FILE))
+
+
+def parse_settings_root(root):
+    """将settings.xml的根元素解析为设置字典"""
+    settings = {}
+
+    # 读取general设置
+    general = root.find('general')
+    if general is not None:
+        save_dir = general.find('saveDirectory')
+        if save_dir is not None and save_dir.text:
+            settings['saveDirectory'] = save_dir.text
+
+        auto_save = general.find('autoSave')
+        if auto_save is not None and auto_save.text:
+            settings['autoSave'] = auto_save.text.lower() == 'true'
+
+        storage_engine = general.find('storageEngine')
+        if storage_engine is not None and storage_engine.text:
+            settings['storageEngine'] = storage_engine.text.strip()
+
+        directory_layout = general.find('directoryLayout')
+        if directory_layout is not None and directory_layout.text:
+            settings['directoryLayout'] = directory_layout.text.strip()
+
+        archive_months = general.find('archiveMonths')
+        if archive_months is not None and archive_months.text:
+            settings['archiveMonths'] = archive_months.text.strip().lower()
+
+    # 读取export设置
+    export_section = root.find('export')
+    if export_section is not None:
+        file_naming = export_section.find('fileNaming')
+        if file_naming is not None and file_naming.text:
+            settings['fileNaming'] = file_naming.text
+
+    # 读取AI设置
+    ai_section = root.find('ai')
+    if ai_section is not None:
+        enabled = ai_section.find('enabled')
+        if enabled is not None and enabled.text:
+            settings['aiEnabled'] = enabled.text.lower() == 'true'
+
+        api_key = ai_section.find('openrouterApiKey')
+        if api_key is not None and api_key.text:
+            settings['openrouterApiKey'] = api_key.text
+
+        base_url = ai_section.find('openrouterBaseUrl')
+        if base_url is not None and base_url.text:
+            settings['openrouterBaseUrl'] = base_url.text
+
+        model = ai_section.find('openrouterModel')
+        if model is not None and model.text:
+            settings['openrouterModel'] = model.text
+
+    return settings
+
+
+class SettingsCache:
+    """settings.xml 的进程级缓存
+
+    以文件的 (mtime_ns, size) 作为版本标识，文件未变化时直接返回
+    内存中的只读快照；写入方可通过 store() 直接更新缓存，无需重新解析。
+    check_interval 秒内的重复读取连 stat 也不做，外部编辑最多延迟
+    check_interval 秒生效。
+    """
+
+    def __init__(self, check_interval=DEFAULT_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._path = None
+        self._version = None
+        self._checked_at = 0.0
+        self._snapshot = MappingProxyType({})
+        # 写入settings.xml时持有，避免并发写入互相覆盖
+        self.write_lock = threading.RLock()
+
+    def _file_version(self, path):
+        """返回文件的版本标识，文件不存在时返回None"""
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self):
+        """返回当前设置的只读快照"""
+        path = settings_path()
+        now = time.monotonic()
+
+        with self._lock:
+            if path == self._path and now - self._checked_at < self.check_interval:
+                return self._snapshot
+
+        version = self._file_version(path)
+
+        with self._lock:
+            if path == self._path and version == self._version:
+                self._checked_at = now
+                return self._snapshot
+
+        if version is None:
+            snapshot = MappingProxyType({})
+        else:
+            try:
+                snapshot = MappingProxyType(parse_settings_root(ET.parse(path).getroot()))
+            except Exception as e:
+                print(f"加载设置失败: {e}")
+                return MappingProxyType({})
+
+        with self._lock:
+            self._path = path
+            self._version = version
+            self._checked_at = now
+            self._snapshot = snapshot
+        return snapshot
+
+    def store(self, root, path=None):
+        """写入settings.xml后直接用内存中的XML树刷新缓存"""
+        path = Path(path) if path is not None else settings_path()
+        snapshot = MappingProxyType(parse_settings_root(root))
+        version = self._file_version(path)
+
+        with self._lock:
+            self._path = path
+            self._version = version
+            self._checked_at = time.monotonic()
+            self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self):
+        """丢弃缓存，下次读取时重新解析文件"""
+        with self._lock:
+            self._path = None
+            self._version = None
+            self._checked_at = 0.0
+            self._snapshot = MappingProxyType({})
+
+
+# 进程级共享缓存
+settings_cache = SettingsCache()
+
+
+def load_settings():
+    """读取当前设置（只读快照）"""
+    return settings_cache.get()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog 静态资源缓存
+为 index.html、script.js、style.css 等静态文件提供内存缓存、强ETag校验和压缩协商
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+
+try:
+    import brotli  # 可选依赖: pip install brotli
+except ImportError:
+    brotli = None
+
+
+# 超过该大小的文件不进入内存缓存，交回默认的文件处理逻辑
+MAX_CACHED_FILE_SIZE = 4 * 1024 * 1024
+
+# 缓存的最大文件数（按最近使用淘汰）
+MAX_CACHED_FILES = 256
+
+# 小于该大小的文件压缩收益不明显，直接原样返回
+MIN_COMPRESS_SIZE = 256
+
+# 前端构建输出目录及清单文件（见 build_scripts/build_assets.py）
+BUILD_DIRNAME = 'web_dist'
+BUILD_MANIFEST = 'asset-manifest.json'
+
+# 带内容哈希的文件永不变化，可让浏览器长期缓存且不再校验
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# 值得压缩的内容类型
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+def content_digest(data):
+    """返回内容的摘要，用作ETag和构建清单中的源文件指纹"""
+    return hashlib.sha1(data).hexdigest()[:20]
+
+
+def _compress_gzip(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _compress_brotli(data):
+    return brotli.compress(data)
+
+
+# 支持的压缩编码，按服务端偏好排序
+ENCODERS = OrderedDict()
+if brotli is not None:
+    ENCODERS['br'] = _compress_brotli
+ENCODERS['gzip'] = _compress_gzip
+
+# 预压缩文件的后缀
+PRECOMPRESSED_SUFFIXES = OrderedDict([('br', '.br'), ('gzip', '.gz')])
+
+
+class StaticAsset:
+    """一个静态文件在某个版本（mtime_ns, size）下的内容及其压缩变体"""
+
+    def __init__(self, path, version, content_type, body):
+        self.path = path
+        self.version = version
+        self.content_type = content_type
+        self.body = body
+        self.digest = content_digest(body)
+        self.last_modified = formatdate(version[0] / 1e9, usegmt=True)
+        self.compressible = (
+            len(body) >= MIN_COMPRESS_SIZE and
+            any(content_type.startswith(prefix) for prefix in COMPRESSIBLE_TYPES)
+        )
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    def etag(self, encoding=None):
+        """返回指定编码表示的强ETag"""
+        if encoding:
+            return f'"{self.digest}-{encoding}"'
+        return f'"{self.digest}"'
+
+    def encodings(self):
+        """返回可提供的压缩编码（按偏好排序）"""
+        if not self.compressible:
+            return []
+        return [encoding for encoding in PRECOMPRESSED_SUFFIXES
+                if encoding in ENCODERS or self._precompressed_path(encoding)]
+
+    def _precompressed_path(self, encoding):
+        """返回与当前版本匹配的预压缩文件路径（构建脚本生成的 .gz/.br）"""
+        candidate = Path(self.path + PRECOMPRESSED_SUFFIXES[encoding])
+        try:
+            if candidate.stat().st_mtime_ns >= self.version[0]:
+                return candidate
+        except OSError:
+            pass
+        return None
+
+    def variant(self, encoding):
+        """返回指定编码的内容，优先读取预压缩文件，否则首次请求时压缩并缓存；
+        压缩无收益时返回None"""
+        with self._lock:
+            if encoding not in self._variants:
+                precompressed = self._precompressed_path(encoding)
+                if precompressed is not None:
+                    compressed = precompressed.read_bytes()
+                else:
+                    compressed = ENCODERS[encoding](self.body)
+                self._variants[encoding] = compressed if len(compressed) < len(self.body) else None
+            return self._variants[encoding]
+
+
+class StaticAssetCache:
+    """按文件路径缓存静态资源，文件的mtime或大小变化时自动失效"""
+
+    def __init__(self, max_files=MAX_CACHED_FILES, max_file_size=MAX_CACHED_FILE_SIZE):
+        self.max_files = max_files
+        self.max_file_size = max_file_size
+        self._assets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, content_type):
+        """返回文件的缓存资源；文件过大或无法读取时返回None"""
+        path = str(path)
+        key = (path, content_type)
+        try:
+            stat = Path(path).stat()
+        except OSError:
+            return None
+        if stat.st_size > self.max_file_size:
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            asset = self._assets.get(key)
+            if asset is not None and asset.version == version:
+                self._assets.move_to_end(key)
+                return asset
+
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+        except OSError:
+            return None
+        asset = StaticAsset(path, version, content_type, body)
+
+        with self._lock:
+            self._assets[key] = asset
+            self._assets.move_to_end(key)
+            while len(self._assets) > self.max_files:
+                self._assets.popitem(last=False)
+        return asset
+
+
+def parse_accept_encoding(header):
+    """解析 Accept-Encoding 请求头，返回 {编码: q值}"""
+    accepted = {}
+    for part in (header or '').split(','):
+        pieces = part.strip().split(';')
+        name = pieces[0].strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in pieces[1:]:
+            key, _, value = param.strip().partition('=')
+            if key.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def choose_encoding(header, asset):
+    """根据 Accept-Encoding 选择响应编码，返回编码名或None（不压缩）"""
+    encodings = asset.encodings()
+    if not encodings:
+        return None
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    if best is not None and asset.variant(best) is None:
+        return None
+    return best
+
+
+def is_not_modified(headers, asset, etag):
+    """根据 If-None-Match / If-Modified-Since 判断客户端缓存是否仍然有效"""
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match is not None:
+        if if_none_match.strip() == '*':
+            return True
+        # If-None-Match 使用弱比较
+        candidates = [tag.strip() for tag in if_none_match.split(',')]
+        return any(tag[2:] == etag if tag.startswith('W/') else tag == etag
+                   for tag in candidates)
+
+    if_modified_since = headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        return int(asset.version[0] // 1_000_000_000) <= since
+
+    return False
+
+
+class AssetBuild:
+    """前端构建结果（web_dist/），仅当源文件与构建时一致才会被使用"""
+
+    def __init__(self, dist_dir, manifest):
+        self.dist_dir = Path(dist_dir)
+        self.manifest = manifest
+        # 带指纹的文件名 → 构建目录中的路径
+        self.fingerprinted = {
+            name: self.dist_dir / name for name in manifest.get('assets', {}).values()
+        }
+
+    def is_fresh(self, root, source_digest):
+        """检查源文件内容是否与构建清单中记录的指纹一致（source_digest 返回文件的指纹）"""
+        for source_name, digest in self.manifest.get('sources', {}).items():
+            if source_digest(Path(root) / source_name) != digest:
+                return False
+        return True
+
+    def page_path(self, name):
+        """返回改写过引用的页面路径"""
+        return self.dist_dir / name
+
+
+class BuildLocator:
+    """按清单文件mtime缓存构建信息，并在源文件变化后自动停用过期构建
+
+    源文件的指纹按 (mtime_ns, size) 单独缓存，只保存摘要而不保存内容，
+    不会与 asset_cache 中按实际类型缓存的同一文件重复占用内存。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._build = None
+        self._warned = False
+        self._digests = {}  # 源文件路径 → ((mtime_ns, size), 指纹)
+
+    def source_digest(self, path):
+        """返回源文件内容的指纹，文件无法读取时返回None"""
+        path = str(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._digests.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        try:
+            with open(path, 'rb') as f:
+                digest = content_digest(f.read())
+        except OSError:
+            return None
+        with self._lock:
+            self._digests[path] = (version, digest)
+        return digest
+
+    def current(self, root):
+        """返回可用的构建，没有构建或构建已过期时返回None"""
+        manifest_path = Path(root) / BUILD_DIRNAME / BUILD_MANIFEST
+        try:
+            stat = manifest_path.stat()
+        except OSError:
+            return None
+        key = (str(manifest_path), stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            if key != self._key:
+                try:
+                    with open(manifest_path, 'r', encoding='utf-8') as f:
+                        self._build = AssetBuild(manifest_path.parent, json.load(f))
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ 读取前端构建清单失败: {e}")
+                    self._build = None
+                self._key = key
+                self._warned = False
+            build = self._build
+
+        if build is None:
+            return None
+        if not build.is_fresh(root, self.source_digest):
+            if not self._warned:
+                print("⚠️ 前端源文件已修改，构建结果已过期，改为直接提供源文件"
+                      "（重新运行 python build_scripts/build_assets.py 以更新）")
+                self._warned = True
+            return None
+        return build
+
+
+def locate(root, path):
+    """返回实际提供的文件路径及其 Cache-Control
+
+    存在有效的前端构建时，页面和带指纹的资源从构建目录提供。
+    """
+    build = build_locator.current(root)
+    if build is not None:
+        name = os.path.relpath(path, root)
+        if name in build.fingerprinted:
+            return str(build.fingerprinted[name]), IMMUTABLE_CACHE_CONTROL
+        if name == 'index.html':
+            return str(build.page_path(name)), 'no-cache'
+    return path, 'no-cache'
+
+
+# 进程级共享缓存
+asset_cache = StaticAssetCache()
+build_locator = BuildLocator()
@@ -71,7 +71,7 @@ def demonstrate_weekly_task_integration():
         # 演示配置读取
         settings = manager.load_settings_from_xml()
         if settings:
-            print(f"   读取到的设置: {json.dumps(settings, ensure_ascii=False, indent=2)}")
+            print(f"   读取到的设置: {json.dumps(dict(settings), ensure_ascii=False, indent=2)}")
         else:
             print(f"   读取到的设置: 空配置")
             
@@ -95,7 +95,7 @@ def demonstrate_web_integration():
         # 检查相关方法
         handler = SettingsHandler(None, None, None)
         methods = [
-            'handle_test_ai_connection',
+            'run_app',
             'test_openrouter_connection', 
             'update_settings_xml',
             'load_settings'
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试AI连接测试器的超时、缓存与并发合并
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ai_connection import ConnectionTester, describe_error, key_fingerprint
+
+
+def test_ai_connection():
+    """测试结果缓存、相同配置的并发请求合并以及超时返回"""
+    print("🧪 测试AI连接测试器")
+    print("=" * 50)
+
+    calls = []
+    delay = {'value': 0.0}
+
+    def fake_probe(api_key, base_url, model, timeout):
+        calls.append((api_key, base_url, model))
+        time.sleep(delay['value'])
+        if api_key == 'bad':
+            raise RuntimeError("Error code: 401 - Unauthorized")
+        return True, f"API连接测试成功！使用模型: {model}"
+
+    tester = ConnectionTester(timeout=0.5, result_ttl=60, failure_ttl=0.2, probe=fake_probe)
+
+    # 测试1: 相同配置的第二次测试命中缓存
+    print("📋 测试1: 结果缓存")
+    assert tester.test('key', 'https://a', 'm1') == (True, "API连接测试成功！使用模型: m1")
+    assert tester.test('key', 'https://a', 'm1')[0]
+    assert len(calls) == 1
+    tester.test('key', 'https://a', 'm2')
+    tester.test('other', 'https://a', 'm1')
+    assert len(calls) == 3
+    assert key_fingerprint('key') != key_fingerprint('other')
+
+    # 测试2: 失败结果转换为提示，并在较短的有效期后重新测试
+    print("📋 测试2: 失败结果")
+    assert tester.test('bad', 'https://a', 'm1') == (False, "API密钥无效或已过期")
+    tester.test('bad', 'https://a', 'm1')
+    assert len(calls) == 4
+    time.sleep(0.25)
+    tester.test('bad', 'https://a', 'm1')
+    assert len(calls) == 5
+
+    # 测试3: 同时发起的相同测试只请求一次
+    print("📋 测试3: 并发合并")
+    delay['value'] = 0.2
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(tester.test('key', 'https://b', 'm1')))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 5 and all(result[0] for result in results)
+    assert len(calls) == 6
+
+    # 测试4: 超时立即返回，后台完成后结果进入缓存
+    print("📋 测试4: 超时")
+    delay['value'] = 0.4
+    started = time.perf_counter()
+    success, message = tester.test('key', 'https://slow', 'm1', timeout=0.1)
+    assert not success and "超时" in message
+    assert time.perf_counter() - started < 0.3
+    time.sleep(0.5)
+    assert tester.test('key', 'https://slow', 'm1', timeout=0.1)[0]
+    assert len(calls) == 7
+
+    assert describe_error(Exception("Request timed out.")) == "连接超时，请检查网络"
+
+    print("\n✅ AI连接测试器测试完成！")
+
+
+if __name__ == "__main__":
+    test_ai_connection()
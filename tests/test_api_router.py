@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试API路由表与中间件
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import api_handlers
+from api_router import ApiResponse, Route, Router
+
+
+def test_api_router():
+    """测试路由匹配、路径参数、中间件链和错误处理"""
+    print("🧪 测试API路由表")
+    print("=" * 50)
+
+    def echo(request):
+        return {"status": "success", "json": request.json, "options": request.options}
+
+    def item(request):
+        return {"status": "success", "id": request.params['id']}
+
+    def broken(request):
+        raise RuntimeError("磁盘已满")
+
+    def parse_limit(query):
+        limit = int(query.get('limit', ['10'])[-1])
+        if limit < 1:
+            raise ValueError("limit 必须大于0")
+        return {'limit': limit}
+
+    router = Router([
+        Route('POST', '/api/echo', echo, error="回显失败", error_status=500,
+              json_body=True, max_body=64),
+        Route('GET', '/api/echo', echo, query_parser=parse_limit),
+        Route('GET', '/api/items/{id}', item),
+        Route('GET', '/api/broken', broken, error="读取失败"),
+        Route('POST', '/api/slow', echo, slow=True),
+    ])
+
+    # 测试1: 固定路径与路径参数，方法不匹配时返回None
+    print("📋 测试1: 路由匹配")
+    response = router.dispatch('GET', '/api/items/42')
+    assert isinstance(response, ApiResponse) and response.payload['id'] == '42'
+    assert router.dispatch('GET', '/api/items/42/extra') is None
+    assert router.dispatch('DELETE', '/api/echo') is None
+    assert router.dispatch('GET', '/api/unknown') is None
+    assert router.label('/api/items/7') == '/api/items/{id}'
+    assert router.slow_paths == ('/api/slow',)
+
+    # 测试2: JSON解码、查询参数解析和计时头
+    print("📋 测试2: 中间件链")
+    response = router.dispatch('POST', '/api/echo', body=json.dumps({"a": "中文"}).encode('utf-8'))
+    assert response.payload['json'] == {"a": "中文"}
+    assert any(name == 'Server-Timing' for name, _ in response.headers)
+    response = router.dispatch('GET', '/api/echo', 'limit=5')
+    assert response.payload['options'] == {'limit': 5}
+    response = router.dispatch('GET', '/api/echo', 'limit=0')
+    assert response.status == 200 and response.payload['message'] == "无效的查询参数: limit 必须大于0"
+
+    # 测试3: 异常、无效JSON和过大的请求体
+    print("📋 测试3: 错误处理")
+    response = router.dispatch('GET', '/api/broken')
+    assert response.status == 200 and response.payload['message'] == "读取失败: 磁盘已满"
+    response = router.dispatch('POST', '/api/echo', body=b'{bad')
+    assert response.status == 500 and response.payload['message'].startswith("回显失败: ")
+    response = router.dispatch('POST', '/api/echo', body=b'[' + b'1,' * 64 + b'1]')
+    assert response.status == 413
+
+    # 测试4: 应用路由表
+    print("📋 测试4: 应用路由表")
+    assert api_handlers.SLOW_ROUTES == ('/api/test-ai-connection',)
+    assert api_handlers.route_label('/api/load-record/2025-01-01') == '/api/load-record/{date}'
+    response = api_handlers.dispatch('POST', '/api/test-ai-connection',
+                                     body=json.dumps({"apiKey": "k"}).encode('utf-8'),
+                                     ai_tester=lambda key, url, model: (True, model))
+    assert response.payload == {"status": "success", "message": api_handlers.DEFAULT_AI_MODEL}
+
+    print("\n✅ API路由表测试完成！")
+
+
+if __name__ == "__main__":
+    test_api_router()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试asyncio服务器
+"""
+
+import asyncio
+import gzip
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import async_server
+import settings_store
+
+
+def test_async_server():
+    """测试API路由、静态文件、keep-alive 以及慢AI请求和事件流不阻塞其他请求"""
+    print("🧪 测试asyncio服务器")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        xml_file = Path(temp_dir) / 'settings.xml'
+        xml_file.write_text(
+            '<?xml version="1.0" encoding="utf-8"?><settings><general>'
+            f'<saveDirectory>{temp_dir}/data</saveDirectory></general></settings>',
+            encoding='utf-8')
+        old_env = os.environ.get('QUIRKLOG_SETTINGS_FILE')
+        os.environ['QUIRKLOG_SETTINGS_FILE'] = str(xml_file)
+        settings_store.settings_cache.invalidate()
+        
+        def slow_ai(api_key, base_url, model=None):
+            time.sleep(0.5)
+            return True, "模拟连接成功"
+        
+        app = async_server.AsyncQuirkLogServer(project_root, ai_tester=slow_ai, disk_workers=2)
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(app.start('127.0.0.1', 0))
+            ready.set()
+            loop.run_forever()
+        
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait(5)
+        
+        def request(conn, method, path, body=None):
+            data = json.dumps(body).encode('utf-8') if body is not None else None
+            conn.request(method, path, body=data)
+            response = conn.getresponse()
+            return response, response.read()
+        
+        try:
+            # 测试1: 同一连接上依次完成保存、读取和静态文件请求
+            print("📋 测试1: keep-alive 连接上的API和静态文件")
+            conn = http.client.HTTPConnection('127.0.0.1', app.port, timeout=5)
+            response, body = request(conn, 'POST', '/api/save-daily-record',
+                                     {'date': '2025-01-01', 'plans': []})
+            assert json.loads(body)['status'] == 'success'
+            response, body = request(conn, 'GET', '/api/load-record/2025-01-01')
+            assert json.loads(body)['data']['date'] == '2025-01-01'
+            response, body = request(conn, 'GET', '/index.html')
+            assert response.status == 200 and int(response.getheader('Content-Length')) == len(body)
+            response, _ = request(conn, 'GET', '/missing.js')
+            assert response.status == 404
+            
+            # 静态文件与 WSGI 应用共用同一实现：ETag、压缩协商、HEAD、目录跳转和流式响应
+            conn.request('GET', '/style.css', headers={'Accept-Encoding': 'gzip'})
+            response = conn.getresponse()
+            body = response.read()
+            response_etag = response.getheader('ETag')
+            assert response.getheader('Content-Encoding') == 'gzip'
+            assert gzip.decompress(body) == (project_root / 'style.css').read_bytes()
+            assert response.getheader('Cache-Control') == 'no-cache'
+            conn.request('GET', '/style.css', headers={'Accept-Encoding': 'gzip',
+                                                       'If-None-Match': response_etag})
+            response = conn.getresponse()
+            assert response.status == 304 and response.read() == b''
+            conn.request('HEAD', '/index.html')
+            response = conn.getresponse()
+            assert response.status == 200 and response.read() == b''
+            assert int(response.getheader('Content-Length')) > 0
+            response, _ = request(conn, 'GET', '/tests')
+            assert response.status == 301 and response.getheader('Location') == '/tests/'
+            response, body = request(conn, 'GET', '/%69ndex.html')
+            assert response.status == 200 and body == (project_root / 'index.html').read_bytes()
+            response, body = request(conn, 'GET', '/api/export?format=ndjson')
+            assert response.getheader('Transfer-Encoding') == 'chunked'
+            assert json.loads(body.decode('utf-8').splitlines()[0])['date'] == '2025-01-01'
+            response, _ = request(conn, 'PUT', '/index.html')
+            assert response.status == 501
+            
+            # 测试2: AI请求在独立线程池中执行，不阻塞其他请求
+            print("📋 测试2: 慢AI请求不阻塞其他请求")
+            results = {}
+            
+            def call_ai():
+                ai_conn = http.client.HTTPConnection('127.0.0.1', app.port, timeout=5)
+                results['ai'] = json.loads(request(ai_conn, 'POST', '/api/test-ai-connection',
+                                                   {'apiKey': 'test'})[1])
+                ai_conn.close()
+            
+            ai_thread = threading.Thread(target=call_ai)
+            ai_thread.start()
+            time.sleep(0.1)
+            start = time.perf_counter()
+            request(conn, 'GET', '/api/history-files')
+            assert time.perf_counter() - start < 0.3
+            ai_thread.join()
+            assert results['ai']['status'] == 'success'
+            
+            # 测试3: 等待事件的事件流不占用磁盘读写的线程
+            print("📋 测试3: 事件流不阻塞其他请求")
+            streams = []
+            for _ in range(3):
+                stream_conn = http.client.HTTPConnection('127.0.0.1', app.port, timeout=5)
+                stream_conn.request('GET', '/api/events')
+                response = stream_conn.getresponse()
+                assert response.getheader('Content-Type').startswith('text/event-stream')
+                streams.append(stream_conn)
+            time.sleep(0.1)
+            start = time.perf_counter()
+            response, body = request(conn, 'GET', '/api/load-record/2025-01-01')
+            assert json.loads(body)['status'] == 'success'
+            assert time.perf_counter() - start < 0.3
+            for stream_conn in streams:
+                stream_conn.close()
+            conn.close()
+        finally:
+            async def shutdown():
+                app.server.close()
+                tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+            
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(5)
+            loop.call_soon_threadsafe(loop.stop)
+            app.close()
+            if old_env is None:
+                os.environ.pop('QUIRKLOG_SETTINGS_FILE', None)
+            else:
+                os.environ['QUIRKLOG_SETTINGS_FILE'] = old_env
+            settings_store.settings_cache.invalidate()
+    
+    print("\n✅ asyncio服务器测试完成！")
+
+
+if __name__ == "__main__":
+    test_async_server()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试前端资源构建及构建结果的提供
+"""
+
+import io
+import json
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from wsgiref.util import setup_testing_defaults
+
+# 添加父目录到Python路径以导入主项目模块
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'build_scripts'))
+
+import build_assets
+import static_assets
+import wsgi_app
+
+
+def get(app, path):
+    """直接调用 WSGI 应用，返回 (状态码, 响应头字典, 响应体)"""
+    environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'wsgi.input': io.BytesIO()}
+    setup_testing_defaults(environ)
+    captured = {}
+
+    def start_response(status, headers, exc_info=None):
+        captured['status'] = int(status.split()[0])
+        captured['headers'] = dict(headers)
+
+    content = b''.join(app(environ, start_response))
+    return captured['status'], captured['headers'], content
+
+
+def test_build_assets():
+    """测试构建清单、带指纹的文件名、页面引用改写、缓存头以及源文件修改后退回源文件"""
+    print("🧪 测试前端资源构建")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        for name in ('index.html', 'script.js', 'style.css'):
+            shutil.copy(project_root / name, root / name)
+        dist_dir = root / static_assets.BUILD_DIRNAME
+
+        # 测试1: 清单记录带指纹的文件名和源文件指纹
+        print("📋 测试1: 构建清单")
+        manifest = build_assets.build(dist_dir, root)
+        saved = json.loads((dist_dir / static_assets.BUILD_MANIFEST).read_text(encoding='utf-8'))
+        assert saved['assets'] == manifest['assets']
+        assert set(manifest['assets']) == set(build_assets.FINGERPRINTED_ASSETS)
+        for source_name, target_name in manifest['assets'].items():
+            stem, suffix = source_name.rsplit('.', 1)
+            assert target_name.startswith(stem + '.') and target_name.endswith('.' + suffix)
+            assert len(target_name) == len(source_name) + build_assets.HASH_LENGTH + 1
+            target = (dist_dir / target_name).read_bytes()
+            assert len(target) < (root / source_name).stat().st_size
+            assert (dist_dir / (target_name + '.gz')).exists()
+        for source_name in ('index.html', 'script.js', 'style.css'):
+            assert manifest['sources'][source_name] == static_assets.content_digest(
+                (root / source_name).read_bytes())
+
+        # 测试2: 页面中的引用改写为带指纹的文件名
+        print("📋 测试2: 引用改写")
+        html = (dist_dir / 'index.html').read_text(encoding='utf-8')
+        assert f'href="{manifest["assets"]["style.css"]}"' in html
+        assert f'src="{manifest["assets"]["script.js"]}"' in html
+        assert 'href="style.css"' not in html and 'src="script.js"' not in html
+
+        # 测试3: 带指纹的文件长期缓存，页面每次校验
+        print("📋 测试3: 缓存头")
+        app = wsgi_app.QuirkLogApp(root)
+        script_name = manifest['assets']['script.js']
+        status, headers, content = get(app, '/' + script_name)
+        assert status == 200 and content == (dist_dir / script_name).read_bytes()
+        assert headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+        assert headers['Cache-Control'] == static_assets.IMMUTABLE_CACHE_CONTROL
+        status, headers, content = get(app, '/index.html')
+        assert status == 200 and content == (dist_dir / 'index.html').read_bytes()
+        assert headers['Cache-Control'] == 'no-cache'
+
+        # 测试4: 修改源文件后构建过期，改为直接提供源文件
+        print("📋 测试4: 构建过期")
+        with open(root / 'script.js', 'a', encoding='utf-8') as f:
+            f.write('\n// 构建之后的修改\n')
+        status, headers, content = get(app, '/index.html')
+        assert content == (root / 'index.html').read_bytes()
+        assert headers['Cache-Control'] == 'no-cache'
+        status, headers, content = get(app, '/script.js')
+        assert content == (root / 'script.js').read_bytes()
+        assert headers['Cache-Control'] == 'no-cache'
+        assert get(app, '/' + script_name)[0] == 404
+
+    print("\n✅ 前端资源构建测试完成！")
+
+
+if __name__ == "__main__":
+    test_build_assets()
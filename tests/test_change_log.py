@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试变更日志与增量同步接口
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import api_handlers
+import settings_store
+from change_log import ChangeLog
+from record_store import JsonFileStore
+
+
+def record(date, event):
+    return {"date": date, "plans": [{"event": event, "completed": False}]}
+
+
+def test_change_log():
+    """测试版本分配、重启对账、日志压缩以及 /api/sync 的上传和冲突检测"""
+    print("🧪 测试变更日志")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = Path(temp_dir) / 'data'
+        store = JsonFileStore(str(data_dir), '每日记录_{date}')
+        store.save('2025-01-01', record('2025-01-01', '写周报'))
+
+        # 测试1: 首次加载时为已有记录分配版本，保存时版本递增
+        print("📋 测试1: 版本分配")
+        log = ChangeLog(store)
+        assert log.version == 1
+        store.save('2025-01-02', record('2025-01-02', '健身'))
+        assert log.record_saved('2025-01-02') == 2
+        store.save('2025-01-01', record('2025-01-01', '改了周报'))
+        assert log.record_saved('2025-01-01') == 3
+        changes, version = log.changes_since(1)
+        assert version == 3
+        assert [(item['date'], item['version']) for item in changes] == [
+            ('2025-01-02', 2), ('2025-01-01', 3)]
+        assert log.changes_since(3) == ([], 3)
+        for date in ('', '2025-01', 'not-a-date'):
+            try:
+                log.record_saved(date)
+                raise AssertionError(f"无效日期 {date!r} 不应分配版本")
+            except ValueError:
+                pass
+        assert log.version == 3
+
+        # 测试2: 重启后沿用版本号；日志之外的新增和删除在对账时分配新版本
+        print("📋 测试2: 重启对账")
+        log_id = log.log_id
+        (data_dir / '每日记录_2025-01-02.json').unlink()
+        store.save('2025-01-05', record('2025-01-05', '读书'))
+        reloaded = ChangeLog(store)
+        assert reloaded.log_id == log_id
+        changes, version = reloaded.changes_since(3)
+        assert version == 5
+        assert {item['date']: item.get('deleted', False) for item in changes} == {
+            '2025-01-02': True, '2025-01-05': False}
+
+        # 测试3: 日志压缩后版本号和删除标记保留
+        print("📋 测试3: 日志压缩")
+        for _ in range(40):
+            reloaded.record_saved('2025-01-05')
+        lines = reloaded.log_path.read_text(encoding='utf-8').splitlines()
+        assert len(lines) < 40
+        compacted = ChangeLog(store)
+        assert compacted.version == 45 and compacted.log_id == log_id
+        assert compacted.changes_since(3)[0][0]['deleted']
+
+        # 测试4: 一次保存只分配一个版本，即使保存时需要重新加载并对账
+        # （首次使用，或另一个进程写过日志文件）
+        print("📋 测试4: 保存与对账")
+        other = ChangeLog(store)
+        store.save('2025-03-02', record('2025-03-02', '另一个进程'))
+        assert other.record_saved('2025-03-02') == 46
+        store.save('2025-03-01', record('2025-03-01', '散步'))
+        assert compacted.record_saved('2025-03-01') == 47
+        assert compacted.version == 47
+        assert [item['date'] for item in compacted.changes_since(45)[0]] == [
+            '2025-03-02', '2025-03-01']
+        store.save('2025-03-03', record('2025-03-03', '首次使用'))
+        assert ChangeLog(store).record_saved('2025-03-03') == 48
+        assert ChangeLog(store).version == 48
+
+        # 测试5: /api/sync 接口
+        print("📋 测试5: 同步接口")
+        xml_file = Path(temp_dir) / 'settings.xml'
+        xml_file.write_text(
+            '<?xml version="1.0" encoding="utf-8"?><settings><general>'
+            f'<saveDirectory>{temp_dir}/sync</saveDirectory></general></settings>',
+            encoding='utf-8')
+        old_env = os.environ.get('QUIRKLOG_SETTINGS_FILE')
+        os.environ['QUIRKLOG_SETTINGS_FILE'] = str(xml_file)
+        settings_store.settings_cache.invalidate()
+
+        def sync(query='', changes=None):
+            body = json.dumps({"changes": changes}).encode('utf-8') if changes is not None else b''
+            response = api_handlers.dispatch('POST' if changes is not None else 'GET',
+                                             '/api/sync', query, body)
+            return response.payload
+
+        try:
+            first = sync(changes=[
+                {"date": "2025-02-01", "record": record("2025-02-01", "上传一")},
+                {"date": "2025-02-02", "record": record("2025-02-02", "上传二")},
+            ])
+            assert first['status'] == 'success' and first['reset']
+            assert [item['date'] for item in first['applied']] == ['2025-02-01', '2025-02-02']
+            assert {item['date'] for item in first['changes']} == {'2025-02-01', '2025-02-02'}
+            assert first['changes'][0]['filename'].startswith('每日记录_')
+            since = f"since={first['version']}&logId={first['logId']}"
+
+            # 没有变化时返回空列表
+            assert sync(since)['changes'] == []
+
+            # 其他客户端保存后只返回这一天，可附带记录内容
+            api_handlers.dispatch('POST', '/api/save-daily-record', body=json.dumps(
+                record('2025-02-01', '另一个标签页')).encode('utf-8'))
+            second = sync(since + '&records=true')
+            assert not second['reset']
+            assert [item['date'] for item in second['changes']] == ['2025-02-01']
+            assert second['changes'][0]['data']['plans'][0]['event'] == '另一个标签页'
+
+            # 基于旧版本的修改不会覆盖服务器上更新的记录
+            stale = first['applied'][0]['version']
+            third = sync(since, changes=[
+                {"date": "2025-02-01", "baseVersion": stale, "record": record("2025-02-01", "旧")}])
+            assert third['applied'] == []
+            assert third['conflicts'] == [{"date": "2025-02-01", "version": second['version']}]
+
+            # 日志ID不一致时全量同步；无效参数不应用任何变更
+            assert sync(f"since={first['version']}&logId=other")['reset']
+            assert sync('since=-1')['status'] == 'error'
+            invalid = sync(changes=[{"date": "2025-02-03", "record": record("2025-02-03", "x")},
+                                    {"date": "2025-13-01", "record": {}}])
+            assert invalid['status'] == 'error'
+            assert api_handlers.current_store().load('2025-02-03') is None
+
+            # 空日期或格式错误的日期既不保存也不进入变更日志
+            version = sync()['version']
+            for date in ('', '2025-2-1', 'bad'):
+                response = api_handlers.dispatch('POST', '/api/save-daily-record', body=json.dumps(
+                    record(date, '无效')).encode('utf-8'))
+                assert response.status == 400
+                assert sync(changes=[{"date": date, "record": record(date, "无效")}])[
+                    'status'] == 'error'
+            after = sync(f"since={version}&logId={first['logId']}")
+            assert after['version'] == version and after['changes'] == []
+            assert not list((Path(temp_dir) / 'sync').glob('每日记录_.json'))
+        finally:
+            if old_env is None:
+                os.environ.pop('QUIRKLOG_SETTINGS_FILE', None)
+            else:
+                os.environ['QUIRKLOG_SETTINGS_FILE'] = old_env
+            settings_store.settings_cache.invalidate()
+
+    print("\n✅ 变更日志测试完成！")
+
+
+if __name__ == "__main__":
+    test_change_log()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 YYYY/MM/ 分片目录布局与布局迁移工具
+"""
+
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import migrate_layout
+import settings_store
+from history_index import HistoryIndex
+from record_store import JsonFileStore
+from weekly_task import WeeklyTaskManager
+
+
+def record(date, event):
+    return {"date": date, "plans": [{"event": event, "completed": False}]}
+
+
+def test_directory_layout():
+    """测试分片保存、混合布局的列表和读取、只检查相关分片以及双向迁移"""
+    print("🧪 测试分片目录布局")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        save_path = Path(temp_dir) / 'data'
+        flat = JsonFileStore(str(save_path), '每日记录_{date}')
+        flat.save('2024-12-31', record('2024-12-31', '平铺的记录'))
+        store = JsonFileStore(str(save_path), '每日记录_{date}', layout='sharded')
+        for date in ('2025-01-01', '2025-01-02', '2025-02-01'):
+            store.save(date, record(date, f'{date} 的计划'))
+
+        # 测试1: 分片布局写入 YYYY/MM/，两种布局的记录一起列出和读取
+        print("📋 测试1: 混合布局")
+        assert (save_path / '2025' / '01' / '每日记录_2025-01-02.json').exists()
+        entries = store.query()[0]
+        assert [entry['filename'] for entry in entries] == [
+            '2025/02/每日记录_2025-02-01.json', '2025/01/每日记录_2025-01-02.json',
+            '2025/01/每日记录_2025-01-01.json', '每日记录_2024-12-31.json']
+        assert store.load('2024-12-31')['plans'][0]['event'] == '平铺的记录'
+        assert flat.load('2025-01-02')['plans'][0]['event'] == '2025-01-02 的计划'
+        assert store.location('2024-12-31').endswith('每日记录_2024-12-31.json')
+        try:
+            store.file_path('2025-13-01')
+            raise AssertionError("无效日期应当报错")
+        except ValueError:
+            pass
+
+        # 以另一种布局保存同一天时移除旧文件，列表中只有一个条目
+        store.save('2024-12-31', record('2024-12-31', '改为分片'))
+        assert not (save_path / '每日记录_2024-12-31.json').exists()
+        assert len(store.query()[0]) == 4
+        assert store.query('2024-12-31', '2024-12-31')[0][0]['filename'].startswith('2024/12/')
+
+        # 测试2: 重启后范围查询只检查与范围相交的分片
+        print("📋 测试2: 只检查相关分片")
+        (save_path / '2025' / '02' / '每日记录_2025-02-03.json').write_text(
+            json.dumps(record('2025-02-03', '外部写入')), encoding='utf-8')
+        index = HistoryIndex(save_path, '每日记录_{date}')
+        scanned = []
+        original = index._scan_shard
+        index._scan_shard = lambda shard: scanned.append(shard) or original(shard)
+        assert [e['date'] for e in index.query('2025-01-01', '2025-01-31')[0]] == [
+            '2025-01-02', '2025-01-01']
+        assert scanned == []
+        assert index.query('2025-02-01', '2025-02-28')[2] == 2
+        assert scanned == ['2025/02']
+
+        # 测试3: 每周任务从分片目录读取
+        print("📋 测试3: 每周任务读取")
+        manager = WeeklyTaskManager(api_key='test')
+        data = manager.load_daily_data(datetime(2025, 1, 2), str(save_path),
+                                       {'fileNaming': '每日记录_{date}'})
+        assert data['plans'][0]['event'] == '2025-01-02 的计划'
+
+        # 测试4: 迁移回平铺布局再迁移到分片布局，修改时间不变
+        print("📋 测试4: 双向迁移")
+        before = {entry['date']: entry['modified'] for entry in store.query()[0]}
+        assert migrate_layout.migrate(store, 'flat') == 5
+        assert store.layout == 'flat'
+        assert sorted(name for name in os.listdir(save_path) if not name.startswith('.')) == [
+            f'每日记录_{date}.json' for date in sorted(before)]
+        assert {entry['date']: entry['modified'] for entry in store.query()[0]} == before
+        assert migrate_layout.plan_moves(store, 'flat') == []
+
+        assert migrate_layout.migrate(store, 'sharded') == 5
+        assert not list(save_path.glob('*.json'))
+        assert store.load('2025-02-03')['plans'][0]['event'] == '外部写入'
+        assert {entry['date']: entry['modified'] for entry in store.query()[0]} == before
+
+        # 测试5: 迁移工具只修改 general/directoryLayout
+        print("📋 测试5: 更新设置")
+        xml_file = Path(temp_dir) / 'settings.xml'
+        xml_file.write_text(
+            '<?xml version="1.0" encoding="utf-8"?><settings><general>'
+            f'<saveDirectory>{save_path}</saveDirectory><storageEngine>json</storageEngine>'
+            '</general></settings>', encoding='utf-8')
+        old_env = os.environ.get('QUIRKLOG_SETTINGS_FILE')
+        os.environ['QUIRKLOG_SETTINGS_FILE'] = str(xml_file)
+        settings_store.settings_cache.invalidate()
+        try:
+            migrate_layout.save_layout_setting('sharded')
+            settings = settings_store.load_settings()
+            assert settings['directoryLayout'] == 'sharded'
+            assert settings['saveDirectory'] == str(save_path)
+        finally:
+            if old_env is None:
+                os.environ.pop('QUIRKLOG_SETTINGS_FILE', None)
+            else:
+                os.environ['QUIRKLOG_SETTINGS_FILE'] = old_env
+            settings_store.settings_cache.invalidate()
+
+    print("\n✅ 分片目录布局测试完成！")
+
+
+if __name__ == "__main__":
+    test_directory_layout()
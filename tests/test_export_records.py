@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试记录流式导出
+"""
+
+import csv
+import io
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from export_records import iter_export
+from record_store import JsonFileStore
+
+
+def test_export_records():
+    """测试NDJSON/CSV导出的内容、日期过滤和分块"""
+    print("🧪 测试记录流式导出")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = JsonFileStore(temp_dir, '每日记录_{date}')
+        for day in range(1, 31):
+            date = f'2025-01-{day:02d}'
+            store.save(date, {
+                'date': date,
+                'plans': [{'event': f'计划,"{day}"', 'importance': '重要', 'completed': day % 2 == 0}],
+                'reflection': {'progress': ['进展'], 'dailyThoughts': '第一行\n第二行'}
+            })
+        
+        # 测试1: NDJSON 每行一条记录，按日期升序
+        print("📋 测试1: NDJSON导出")
+        chunks = list(iter_export(store, 'ndjson', chunk_size=1024))
+        assert len(chunks) > 1
+        lines = b''.join(chunks).decode('utf-8').splitlines()
+        assert len(lines) == 30
+        assert json.loads(lines[0])['date'] == '2025-01-01'
+        assert json.loads(lines[-1])['reflection']['dailyThoughts'] == '第一行\n第二行'
+        
+        # 测试2: CSV 每个计划和反思条目各占一行
+        print("📋 测试2: CSV导出与日期过滤")
+        data = b''.join(iter_export(store, 'csv', '2025-01-10', '2025-01-11'))
+        rows = list(csv.DictReader(io.StringIO(data.decode('utf-8-sig'))))
+        assert [row['kind'] for row in rows] == ['plan', 'progress', 'dailyThoughts'] * 2
+        assert rows[0]['event'] == '计划,"10"' and rows[0]['completed'] == 'true'
+        assert rows[2]['content'] == '第一行\n第二行'
+    
+    print("\n✅ 流式导出测试完成！")
+
+
+if __name__ == "__main__":
+    test_export_records()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试历史记录索引功能
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from history_index import HistoryIndex, INDEX_FILENAME
+
+
+def write_record(save_path, date, naming='每日记录_{date}'):
+    """写入一个最简单的记录文件"""
+    file_path = save_path / f"{naming.replace('{date}', date)}.json"
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump({'date': date, 'plans': []}, f, ensure_ascii=False)
+    return file_path
+
+
+def test_history_index():
+    """测试索引的构建、增量更新与启动对账"""
+    print("🧪 测试历史记录索引功能")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        save_path = Path(temp_dir)
+        for date in ('2025-01-02', '2025-01-01', '2025-01-03'):
+            write_record(save_path, date)
+        # 不符合命名格式的文件应被忽略
+        (save_path / 'notes.json').write_text('{}', encoding='utf-8')
+        
+        # 测试1: 首次使用时扫描目录并持久化
+        print("📋 测试1: 首次扫描")
+        index = HistoryIndex(save_path, '每日记录_{date}')
+        dates = [entry['date'] for entry in index.list_entries()]
+        assert dates == ['2025-01-03', '2025-01-02', '2025-01-01']
+        assert (save_path / INDEX_FILENAME).exists()
+        
+        # 测试2: 增量更新
+        print("📋 测试2: 保存记录后增量更新")
+        with index.lock:
+            index.ensure_fresh()
+            file_path = write_record(save_path, '2025-01-05')
+            index.record_saved('2025-01-05', file_path)
+        assert index.list_entries()[0]['date'] == '2025-01-05'
+        
+        # 测试3: 重启后直接从索引文件加载，无需扫描目录
+        print("📋 测试3: 重启后从索引文件加载")
+        reloaded = HistoryIndex(save_path, '每日记录_{date}')
+        reloaded._scan_shard = lambda shard: (_ for _ in ()).throw(AssertionError("不应扫描目录"))
+        assert [e['date'] for e in reloaded.list_entries()][:2] == ['2025-01-05', '2025-01-03']
+        
+        # 测试4: 目录被外部修改后重建
+        print("📋 测试4: 外部新增文件后对账")
+        write_record(save_path, '2025-01-04')
+        reconciled = HistoryIndex(save_path, '每日记录_{date}')
+        assert len(reconciled.list_entries()) == 5
+        
+        # 测试5: 日期范围与分页查询
+        print("📋 测试5: 日期范围与分页查询")
+        page, cursor, total = reconciled.query(date_from='2025-01-02', limit=2, fields=['date'])
+        assert page == [{'date': '2025-01-05'}, {'date': '2025-01-04'}]
+        assert (cursor, total) == ('2025-01-04', 4)
+        page, cursor, _ = reconciled.query(date_from='2025-01-02', limit=2, cursor=cursor)
+        assert [e['date'] for e in page] == ['2025-01-03', '2025-01-02']
+        assert cursor is None
+        
+        # 测试6: 命名格式变化后重建
+        print("📋 测试6: 命名格式变化")
+        write_record(save_path, '2025-02-01', naming='daily_record_{date}')
+        renamed = HistoryIndex(save_path, 'daily_record_{date}')
+        assert [e['date'] for e in renamed.list_entries()] == ['2025-02-01']
+    
+    print("\n✅ 历史记录索引测试完成！")
+
+
+if __name__ == "__main__":
+    test_history_index()
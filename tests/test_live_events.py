@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试实时事件总线与 /api/events 事件流
+"""
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import api_handlers
+import live_events
+from live_events import EventBus, format_event, parse_last_event_id
+
+
+def test_live_events():
+    """测试事件推送、断线补发、缓冲区溢出后的重新同步和连接数上限"""
+    print("🧪 测试实时事件")
+    print("=" * 50)
+
+    # 测试1: 编码与 Last-Event-ID 解析
+    print("📋 测试1: SSE编码")
+    assert format_event('record-saved', {"date": "2025-01-01", "标题": "中文"}, 3) == (
+        'id: 3\nevent: record-saved\ndata: {"date": "2025-01-01", "标题": "中文"}\n\n'
+    ).encode('utf-8')
+    assert parse_last_event_id(' 12 ') == 12
+    assert parse_last_event_id('abc') is None
+    assert parse_last_event_id('-1') is None
+    assert parse_last_event_id(None) is None
+
+    # 测试2: 订阅后发布的事件立即推送给等待中的连接
+    print("📋 测试2: 事件推送")
+    bus = EventBus(buffer_size=4, max_subscribers=2)
+    bus.publish('record-saved', {"date": "2025-01-01"})
+    stream = bus.subscribe(heartbeat=2, max_seconds=5)
+    assert next(stream) == b'retry: 3000\n\n'
+    threading.Timer(0.05, bus.publish, ('record-saved', {"date": "2025-01-02"})).start()
+    started = time.perf_counter()
+    chunk = next(stream)
+    assert time.perf_counter() - started < 1
+    assert chunk.startswith(b'id: 2\nevent: record-saved\n') and b'2025-01-02' in chunk
+    stream.close()
+
+    # 测试3: 断线重连时补发错过的事件；缓冲区已覆盖不到时要求重新同步
+    print("📋 测试3: 断线补发")
+    bus.publish('settings-changed', {"autoSave": True})
+    stream = bus.subscribe(last_event_id=1, heartbeat=0.05, max_seconds=5)
+    chunks = [next(stream) for _ in range(3)]
+    assert [chunk.split(b'\n')[0] for chunk in chunks[1:]] == [b'id: 2', b'id: 3']
+    assert next(stream) == b': ping\n\n'
+    stream.close()
+
+    for day in range(4, 10):
+        bus.publish('record-saved', {"date": f"2025-01-0{day}"})
+    stream = bus.subscribe(last_event_id=2, heartbeat=0.05, max_seconds=5)
+    next(stream)
+    assert next(stream) == format_event('resync', {"reason": "missed"}, 9)
+    stream.close()
+
+    # 服务器重启后事件编号从头开始，客户端带来的编号比当前大
+    stream = bus.subscribe(last_event_id=100, heartbeat=0.05, max_seconds=5)
+    next(stream)
+    assert next(stream) == format_event('resync', {"reason": "restarted"}, 9)
+    stream.close()
+
+    # 测试4: 连接数上限，关闭或到期后释放名额
+    print("📋 测试4: 连接数上限")
+    first = bus.subscribe(heartbeat=0.05, max_seconds=0.1)
+    second = bus.subscribe(heartbeat=0.05, max_seconds=5)
+    assert bus.subscribers == 2
+    assert bus.subscribe() is None
+    second.close()
+    second.close()
+    assert bus.subscribers == 1
+    assert list(first)[0] == b'retry: 3000\n\n'
+    assert bus.subscribers == 0
+
+    # 测试5: /api/events 路由
+    print("📋 测试5: 事件流接口")
+    original = live_events.bus
+    live_events.bus = EventBus(max_subscribers=1)
+    try:
+        live_events.publish('weekly-insight', {"weekNumber": 1})
+        live_events.publish('weekly-insight', {"weekNumber": 2})
+        response = api_handlers.dispatch('GET', '/api/events',
+                                         headers={'Last-Event-ID': '1'})
+        assert response.is_stream
+        assert response.content_type == live_events.EVENT_STREAM_CONTENT_TYPE
+        assert ('Cache-Control', 'no-cache') in response.headers
+        next(response.stream)
+        assert b'"weekNumber": 2' in next(response.stream)
+        assert api_handlers.dispatch('GET', '/api/events').status == 503
+        response.stream.close()
+        response = api_handlers.dispatch('GET', '/api/events', 'lastEventId=0')
+        next(response.stream)
+        assert next(response.stream).startswith(b'id: 1\n')
+        response.stream.close()
+
+        # 日期无效的保存被拒绝，不会发布指向无关记录的事件
+        for date in ('', '2025-1-1', None):
+            response = api_handlers.dispatch('POST', '/api/save-daily-record',
+                                             body=json.dumps({"date": date}).encode('utf-8'))
+            assert response.status == 400 and response.payload['status'] == 'error'
+        assert live_events.bus.last_id == 2
+    finally:
+        live_events.bus = original
+
+    print("\n✅ 实时事件测试完成！")
+
+
+if __name__ == "__main__":
+    test_live_events()
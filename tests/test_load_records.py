@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试批量加载记录接口 /api/load-records
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import api_handlers
+import settings_store
+from record_store import JsonFileStore
+
+
+def load(query):
+    return api_handlers.dispatch('GET', '/api/load-records', query).payload
+
+
+def test_load_records():
+    """测试日期范围和日期列表的读取顺序、缺失日期的标注、无效参数和天数上限"""
+    print("🧪 测试批量加载记录")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = Path(temp_dir) / 'data'
+        xml_file = Path(temp_dir) / 'settings.xml'
+        xml_file.write_text(
+            '<?xml version="1.0" encoding="utf-8"?><settings><general>'
+            f'<saveDirectory>{data_dir}</saveDirectory></general></settings>',
+            encoding='utf-8')
+        old_env = os.environ.get('QUIRKLOG_SETTINGS_FILE')
+        os.environ['QUIRKLOG_SETTINGS_FILE'] = str(xml_file)
+        settings_store.settings_cache.invalidate()
+
+        try:
+            store = JsonFileStore(str(data_dir), '每日记录_{date}')
+            for date in ('2025-01-30', '2025-02-01', '2025-02-02'):
+                store.save(date, {'date': date, 'plans': []})
+
+            # 测试1: from/to 范围按日期升序返回，缺失的日期逐条标注
+            print("📋 测试1: 日期范围")
+            result = load('from=2025-01-30&to=2025-02-02')
+            assert result['status'] == 'success'
+            assert [item['date'] for item in result['records']] == [
+                '2025-01-30', '2025-01-31', '2025-02-01', '2025-02-02']
+            assert result['records'][1] == {'date': '2025-01-31', 'status': 'missing'}
+            assert result['records'][2]['data']['date'] == '2025-02-01'
+            assert result['found'] == 3 and result['missing'] == ['2025-01-31']
+
+            # 测试2: 日期列表与范围合并、去重后排序
+            print("📋 测试2: 日期列表")
+            result = load('dates=2025-02-02,2025-01-30,2025-02-02&from=2025-02-01&to=2025-02-01')
+            assert [item['date'] for item in result['records']] == [
+                '2025-01-30', '2025-02-01', '2025-02-02']
+            assert all(item['status'] == 'success' for item in result['records'])
+
+            # 测试3: 无效、颠倒或不完整的日期参数
+            print("📋 测试3: 无效参数")
+            for query in ('', 'dates=2025-13-01', 'dates=abc', 'from=2025-02-02&to=2025-01-30',
+                          'from=2025-01-30', 'to=bad&from=2025-01-01'):
+                result = load(query)
+                assert result['status'] == 'error', query
+
+            # 测试4: 超过 MAX_BATCH_DAYS 天的请求被拒绝
+            print("📋 测试4: 天数上限")
+            days = api_handlers.MAX_BATCH_DAYS
+            result = load('from=2024-01-01&to=2024-12-31')
+            assert days == 366 and result['status'] == 'success'
+            assert len(result['records']) == days
+            result = load('from=2024-01-01&to=2025-01-01')
+            assert result['status'] == 'error' and str(days) in result['message']
+            dates = ','.join(f'2023-{month:02d}-{day:02d}'
+                             for month in range(1, 13) for day in range(1, 29))
+            result = load(f'dates={dates}&from=2025-01-01&to=2025-01-31')
+            assert result['status'] == 'error' and str(days) in result['message']
+        finally:
+            if old_env is None:
+                os.environ.pop('QUIRKLOG_SETTINGS_FILE', None)
+            else:
+                os.environ['QUIRKLOG_SETTINGS_FILE'] = old_env
+            settings_store.settings_cache.invalidate()
+
+    print("\n✅ 批量加载记录测试完成！")
+
+
+if __name__ == "__main__":
+    test_load_records()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试月度归档的打包、mmap读取以及与JSON文件的合并
+"""
+
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import month_archive
+from record_store import JsonFileStore
+from weekly_task import WeeklyTaskManager
+
+
+def record(date, event):
+    return {"date": date, "plans": [{"event": event, "completed": False}]}
+
+
+def test_month_archive():
+    """测试已结束月份的打包、归档读取、修改已归档日期后的合并以及损坏检测"""
+    print("🧪 测试月度归档")
+    print("=" * 50)
+
+    today = datetime(2025, 2, 15)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = JsonFileStore(temp_dir, '每日记录_{date}')
+        for date in ('2025-01-01', '2025-01-02', '2025-01-31', '2025-02-01'):
+            store.save(date, record(date, f'{date} 的计划'))
+        before = {entry['date']: entry['modified'] for entry in store.query()[0]}
+
+        # 测试1: 只打包已结束的月份，JSON文件删除后列表和读取不变
+        print("📋 测试1: 打包")
+        assert month_archive.closed_months(store, today) == ['2025-01']
+        assert month_archive.pack_closed_months(store, 'gzip', today) == {'2025-01': 3}
+        assert sorted(path.name for path in Path(temp_dir).glob('*.json')) == [
+            '每日记录_2025-02-01.json']
+        assert month_archive.closed_months(store, today) == []
+
+        entries = store.query()[0]
+        assert {entry['date']: entry['modified'] for entry in entries} == before
+        assert entries[1]['filename'] == 'records_2025-01.qpack'
+        assert store.load('2025-01-31')['plans'][0]['event'] == '2025-01-31 的计划'
+        assert store.load('2025-01-15') is None
+        assert store.load('not-a-date') is None
+        assert store.location('2025-01-02').endswith('records_2025-01.qpack#2025-01-02')
+
+        # 测试2: 修改已归档的日期写出JSON文件，优先读取；再次打包时合并回归档
+        print("📋 测试2: 修改已归档的日期")
+        store.save('2025-01-02', record('2025-01-02', '补充的计划'))
+        assert store.load('2025-01-02')['plans'][0]['event'] == '补充的计划'
+        assert store.query('2025-01-02', '2025-01-02')[0][0]['filename'].endswith('.json')
+        assert month_archive.pack_month(store, '2025-01', 'none') == 1
+        assert store.load('2025-01-02')['plans'][0]['event'] == '补充的计划'
+        assert store.load('2025-01-01')['plans'][0]['event'] == '2025-01-01 的计划'
+        assert len(store.query()[0]) == 4
+
+        # 测试3: 每周任务读取归档中的记录
+        print("📋 测试3: 每周任务读取")
+        manager = WeeklyTaskManager(api_key='test')
+        data = manager.load_daily_data(datetime(2025, 1, 31), temp_dir,
+                                       {'fileNaming': '每日记录_{date}'})
+        assert data['plans'][0]['event'] == '2025-01-31 的计划'
+
+        # 测试4: 记录体损坏时报错而不是返回错误内容
+        print("📋 测试4: 损坏检测")
+        archive_path = Path(temp_dir) / 'records_2025-01.qpack'
+        data = bytearray(archive_path.read_bytes())
+        data[-2] ^= 0xFF
+        archive_path.write_bytes(bytes(data))
+        try:
+            store.load('2025-01-31')
+            raise AssertionError("损坏的记录应当报错")
+        except ValueError as e:
+            assert '已损坏' in str(e)
+        store.close()
+
+    # 测试5: 设置值与压缩方式
+    assert month_archive.compression_setting('true') == 'gzip'
+    assert month_archive.compression_setting('zstd') == 'zstd'
+    assert month_archive.compression_setting('false') is None
+    assert month_archive.compression_setting(None) is None
+
+    print("\n✅ 月度归档测试完成！")
+
+
+if __name__ == "__main__":
+    test_month_archive()
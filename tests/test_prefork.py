@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试多进程（pre-fork）服务模式与数据目录的进程间锁
+"""
+
+import http.client
+import json
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import prefork
+import settings_store
+import web_server
+from change_log import CHANGE_LOG_FILENAME
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_prefork():
+    """测试多个工作进程并发保存同一天、跨进程的列表一致性、拒绝追加日志存储、崩溃重启和停止"""
+    if not prefork.is_supported():
+        print("⏭️ 当前平台不支持多进程模式，跳过")
+        return
+
+    print("🧪 测试多进程服务模式")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = Path(temp_dir) / 'data'
+        xml_file = Path(temp_dir) / 'settings.xml'
+        xml_file.write_text(
+            '<?xml version="1.0" encoding="utf-8"?><settings><general>'
+            f'<saveDirectory>{data_dir}</saveDirectory></general></settings>',
+            encoding='utf-8')
+        old_env = os.environ.get('QUIRKLOG_SETTINGS_FILE')
+        os.environ['QUIRKLOG_SETTINGS_FILE'] = str(xml_file)
+        settings_store.settings_cache.invalidate()
+
+        def server_factory(sock):
+            # 记录各工作进程的槽位（web_server 据此只在槽位0中启动后台任务）
+            (Path(temp_dir) / f'slot-{prefork.worker_slot}-{prefork.worker_count}').touch()
+            return web_server.create_server(sock=sock)
+
+        server = prefork.PreforkServer(0, 2, server_factory)
+        port = server.server_address[1]
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        def request(method, path, body=None):
+            # 每个请求使用新连接，由内核分配给不同的工作进程
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            try:
+                data = json.dumps(body).encode('utf-8') if body is not None else None
+                conn.request(method, path, body=data)
+                response = conn.getresponse()
+                return json.loads(response.read())
+            finally:
+                conn.close()
+
+        try:
+            assert wait_for(lambda: len(server.worker_pids()) == 2)
+            assert wait_for(lambda: request('GET', '/api/history-files')['status'] == 'success')
+            assert sorted(path.name for path in Path(temp_dir).glob('slot-*')) == [
+                'slot-0-2', 'slot-1-2']
+            assert prefork.worker_slot is None and not prefork.multiple_workers()
+
+            # 测试1: 多个工作进程并发保存同一天，文件完整、版本号不重复
+            print("📋 测试1: 并发保存同一天")
+            errors = []
+
+            def save_many(worker):
+                for i in range(10):
+                    try:
+                        result = request('POST', '/api/save-daily-record', {
+                            'date': '2025-01-01',
+                            'plans': [{'event': f'{worker}-{i}', 'completed': False}]})
+                        assert result['status'] == 'success', result
+                    except Exception as e:
+                        errors.append(e)
+
+            threads = [threading.Thread(target=save_many, args=(n,)) for n in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert errors == []
+
+            record = request('GET', '/api/load-record/2025-01-01')['data']
+            assert record['date'] == '2025-01-01'
+            lines = (data_dir / CHANGE_LOG_FILENAME).read_text(encoding='utf-8').splitlines()
+            versions = [json.loads(line)['version'] for line in lines[1:]]
+            assert versions == sorted(set(versions))
+            assert versions[-1] >= 40
+
+            # 测试2: 其他进程保存的记录立即出现在每个进程的列表和同步结果中
+            print("📋 测试2: 跨进程一致")
+            for day in range(2, 8):
+                date = f'2025-01-{day:02d}'
+                request('POST', '/api/save-daily-record', {'date': date, 'plans': []})
+                for _ in range(3):
+                    files = request('GET', '/api/history-files?fields=date')['files']
+                    assert files[0] == {'date': date}
+            synced = request('GET', '/api/sync')
+            assert sorted(item['date'] for item in synced['changes']) == [
+                f'2025-01-{day:02d}' for day in range(1, 8)]
+
+            # 测试3: 运行中不能切换到追加日志存储（多个进程同时追加会损坏日志文件）
+            print("📋 测试3: 拒绝追加日志存储")
+            settings_xml = xml_file.read_text(encoding='utf-8')
+            result = request('POST', '/api/save-settings', {
+                'saveDirectory': str(data_dir), 'storageEngine': 'log'})
+            assert result['status'] == 'error' and '多进程' in result['message']
+            assert xml_file.read_text(encoding='utf-8') == settings_xml
+            xml_file.write_text(settings_xml.replace(
+                '</general>', '<storageEngine>log</storageEngine></general>'), encoding='utf-8')
+            # 每个工作进程最多每隔 DEFAULT_CHECK_INTERVAL 秒检查一次设置文件
+            time.sleep(settings_store.DEFAULT_CHECK_INTERVAL + 0.2)
+            for _ in range(4):
+                assert request('GET', '/api/load-record/2025-01-02')['status'] == 'error'
+            result = request('POST', '/api/save-daily-record', {'date': '2025-01-09', 'plans': []})
+            assert result['status'] == 'error'
+            assert not (data_dir / 'records.qlog').exists()
+            xml_file.write_text(settings_xml, encoding='utf-8')
+            time.sleep(settings_store.DEFAULT_CHECK_INTERVAL + 0.2)
+            for _ in range(4):
+                assert request('GET', '/api/load-record/2025-01-02')['status'] == 'success'
+
+            # 测试4: 工作进程意外退出后自动重启
+            print("📋 测试4: 崩溃重启")
+            old_pids = server.worker_pids()
+            os.kill(old_pids[0], signal.SIGKILL)
+            assert wait_for(lambda: len(server.worker_pids()) == 2 and
+                            old_pids[0] not in server.worker_pids())
+            assert request('GET', '/api/load-record/2025-01-02')['status'] == 'success'
+        finally:
+            pids = server.worker_pids()
+            server.shutdown()
+            server.server_close()
+            thread.join(5)
+            if old_env is None:
+                os.environ.pop('QUIRKLOG_SETTINGS_FILE', None)
+            else:
+                os.environ['QUIRKLOG_SETTINGS_FILE'] = old_env
+            settings_store.settings_cache.invalidate()
+
+        # 测试5: 停止时所有工作进程都已退出
+        print("📋 测试5: 停止")
+        for pid in pids:
+            try:
+                os.kill(pid, 0)
+                raise AssertionError(f"工作进程 {pid} 未退出")
+            except ProcessLookupError:
+                pass
+
+    print("\n✅ 多进程服务模式测试完成！")
+
+
+if __name__ == "__main__":
+    test_prefork()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试每日记录存储引擎
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from record_store import JsonFileStore, LogStructuredStore, SqliteStore
+
+
+def test_record_store():
+    """测试日志结构存储的读写、崩溃恢复、压缩以及从JSON存储导入"""
+    print("🧪 测试每日记录存储引擎")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 测试1: JSON存储保持原有的文件格式
+        print("📋 测试1: JSON存储")
+        json_store = JsonFileStore(temp_dir, '每日记录_{date}')
+        json_store.save('2025-01-01', {'date': '2025-01-01', 'plans': ['写周报']})
+        assert (Path(temp_dir) / '每日记录_2025-01-01.json').exists()
+        assert json_store.load('2025-01-01')['plans'] == ['写周报']
+        assert json_store.load('2025-01-09') is None
+        
+        # 测试2: 新建日志时导入已有的JSON记录
+        print("📋 测试2: 导入已有JSON记录")
+        store = LogStructuredStore(temp_dir, '每日记录_{date}')
+        assert store.load('2025-01-01')['plans'] == ['写周报']
+        
+        # 测试3: 追加写入，同一天以最新版本为准
+        print("📋 测试3: 追加写入与覆盖")
+        store.save('2025-01-02', {'date': '2025-01-02', 'summary': '初稿'})
+        store.save('2025-01-02', {'date': '2025-01-02', 'summary': '终稿'})
+        store.save('2025-01-03', {'date': '2025-01-03', 'summary': '周五'})
+        assert store.load('2025-01-02')['summary'] == '终稿'
+        page, cursor, total = store.query(limit=2, fields=['date'])
+        assert page == [{'date': '2025-01-03'}, {'date': '2025-01-02'}]
+        assert (cursor, total) == ('2025-01-02', 3)
+        store.close()
+        
+        # 测试4: 写入中途中断留下的半条记录在重新打开时被截掉
+        print("📋 测试4: 尾部损坏恢复")
+        log_path = Path(temp_dir) / LogStructuredStore.LOG_FILENAME
+        valid_size = log_path.stat().st_size
+        with open(log_path, 'ab') as f:
+            f.write(LogStructuredStore.MAGIC + b'\x00\x01')
+        reopened = LogStructuredStore(temp_dir, '每日记录_{date}')
+        assert reopened.load('2025-01-02')['summary'] == '终稿'
+        assert log_path.stat().st_size == valid_size
+        
+        # 测试5: 压缩只保留每天的最新版本
+        print("📋 测试5: 日志压缩")
+        for i in range(20):
+            reopened.save('2025-01-03', {'date': '2025-01-03', 'summary': f'修改{i}'})
+        before = log_path.stat().st_size
+        reopened.compact()
+        assert log_path.stat().st_size < before
+        assert reopened.load('2025-01-03')['summary'] == '修改19'
+        assert reopened.load('2025-01-01')['plans'] == ['写周报']
+        reopened.save('2025-01-04', {'date': '2025-01-04'})
+        reopened.close()
+        
+        final = LogStructuredStore(temp_dir)
+        assert [e['date'] for e in final.query()[0]] == [
+            '2025-01-04', '2025-01-03', '2025-01-02', '2025-01-01']
+        final.close()
+        assert not os.path.exists(str(log_path) + '.compact')
+    
+    print("\n✅ 存储引擎测试完成！")
+
+
+def test_sqlite_store():
+    """测试SQLite存储的读写、分页、按条件查询计划和连接池"""
+    print("🧪 测试SQLite存储")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        JsonFileStore(temp_dir, '每日记录_{date}').save('2025-03-31', {
+            'date': '2025-03-31',
+            'plans': [{'event': '季度总结', 'importance': '十分重要', 'urgency': '紧急',
+                       'completed': False}]
+        })
+        
+        # 测试1: 新建数据库时导入已有JSON记录
+        print("📋 测试1: 导入已有JSON记录")
+        store = SqliteStore(temp_dir, '每日记录_{date}')
+        assert store.load('2025-03-31')['plans'][0]['event'] == '季度总结'
+        
+        # 测试2: 保存覆盖，计划表随记录一起替换
+        print("📋 测试2: 保存与覆盖")
+        store.save('2025-04-01', {'date': '2025-04-01', 'plans': [
+            {'event': '写方案', 'importance': '十分重要', 'urgency': '十分紧急', 'completed': False},
+            {'event': '健身', 'importance': '一般重要', 'urgency': '不紧急', 'completed': True},
+        ], 'reflection': {'progress': ['完成初稿'], 'dailyThoughts': '今天很充实'}})
+        store.save('2025-04-01', {'date': '2025-04-01', 'plans': [
+            {'event': '写方案', 'importance': '十分重要', 'urgency': '十分紧急', 'completed': False},
+        ]})
+        store.save('2025-04-02', {'date': '2025-04-02', 'plans': []})
+        assert len(store.load('2025-04-01')['plans']) == 1
+        page, cursor, total = store.query(limit=2, fields=['date'])
+        assert page == [{'date': '2025-04-02'}, {'date': '2025-04-01'}]
+        assert (cursor, total) == ('2025-04-01', 3)
+        page, cursor, _ = store.query(limit=2, cursor=cursor)
+        assert [e['date'] for e in page] == ['2025-03-31'] and cursor is None
+        
+        # 测试3: 按条件查询计划
+        print("📋 测试3: 查询未完成的十分重要计划")
+        plans = store.query_plans(date_from='2025-04-01', date_to='2025-06-30',
+                                  completed=False, importance=['十分重要'])
+        assert [p['event'] for p in plans] == ['写方案']
+        assert len(store.query_plans(importance=['十分重要'])) == 2
+        
+        # 通用实现与索引查询结果一致
+        json_store = JsonFileStore(temp_dir, '每日记录_{date}')
+        assert [p['event'] for p in json_store.query_plans(importance=['十分重要'])] == ['季度总结']
+        
+        # 测试4: 多线程服务器为每个客户端连接新开线程，连接数不随线程数增长
+        print("📋 测试4: 短生命周期线程的连接复用")
+        errors = []
+        
+        def read_once():
+            try:
+                assert store.load('2025-04-02')['date'] == '2025-04-02'
+                store.query(limit=1)
+            except Exception as e:
+                errors.append(e)
+        
+        for batch in range(30):
+            threads = [threading.Thread(target=read_once) for _ in range(10)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert errors == []
+        assert store._open_connections <= SqliteStore.POOL_SIZE
+        store.close()
+        assert store._open_connections == 0
+    
+    print("\n✅ SQLite存储测试完成！")
+
+
+if __name__ == "__main__":
+    test_record_store()
+    test_sqlite_store()
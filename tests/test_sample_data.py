@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试合成数据生成器
+"""
+
+import json
+import re
+import sys
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import record_store
+import sample_data
+from weekly_task import WeeklyTaskManager
+
+CJK_RE = re.compile(r'[一-鿿]')
+
+
+def read_tree(directory):
+    return {path.relative_to(directory).as_posix(): path.read_bytes()
+            for path in sorted(Path(directory).rglob('*.json'))}
+
+
+def test_sample_data():
+    """测试记录结构、确定性、全部命名格式、分片布局和文本量参数"""
+    print("🧪 测试合成数据生成器")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+
+        # 测试1: 记录结构与页面保存的一致
+        print("📋 测试1: 记录结构")
+        record = sample_data.generate_record('2025-01-01', seed=3)
+        assert set(record) >= {'date', 'dateInfo', 'plans', 'reflection',
+                               'completionDetails', 'statistics'}
+        assert record['dateInfo']['weekday'] == 3 and record['dateInfo']['weekdayName'] == '周三'
+        assert record['dateInfo']['fullDateString'] == '2025年1月1日星期三'
+        plan_ids = {str(plan['id']) for plan in record['plans'] if not plan['completed']}
+        assert set(record['completionDetails']) <= plan_ids
+        for plan in record['plans']:
+            assert plan['importance'] in sample_data.IMPORTANCE_LEVELS
+            assert plan['urgency'] in sample_data.URGENCY_LEVELS
+            datetime.strptime(plan['startTime'], '%H:%M')
+        stats = record['statistics']
+        assert stats['totalPlans'] == len(record['plans'])
+        assert stats['completedPlans'] == sum(plan['completed'] for plan in record['plans'])
+
+        # 测试2: 相同种子生成相同的文件，不同种子不同
+        print("📋 测试2: 确定性")
+        start, end = date(2023, 12, 1), date(2024, 1, 31)
+        dates = sample_data.generate(temp_path / 'a', start, end, seed=5, density=0.8)
+        sample_data.generate(temp_path / 'b', start, end, seed=5, density=0.8)
+        sample_data.generate(temp_path / 'c', start, end, seed=6, density=0.8)
+        assert read_tree(temp_path / 'a') == read_tree(temp_path / 'b')
+        assert read_tree(temp_path / 'a') != read_tree(temp_path / 'c')
+        assert 0 < len(dates) < 62 and dates == sorted(dates)
+
+        # Web页面（历史索引）能列出并读取默认命名格式的记录
+        store = record_store.JsonFileStore(temp_path / 'a', sample_data.DEFAULT_NAMING)
+        entries, _, total = store.query()
+        assert total == len(dates) and entries[0]['date'] == dates[-1]
+        assert store.load(dates[0])['date'] == dates[0]
+
+        # 测试3: 混合命名覆盖每周任务接受的全部格式，分片布局也能被读取
+        print("📋 测试3: 命名格式与目录布局")
+        manager = WeeklyTaskManager(api_key='test')
+        possible = manager.get_possible_filenames('2024-01-01', {})
+        assert sorted(possible) == sorted(sample_data.record_filename('2024-01-01', pattern)
+                                          for pattern in sample_data.NAMING_PATTERNS)
+        mixed = temp_path / 'mixed'
+        dates = sample_data.generate(mixed, date(2024, 1, 1), date(2024, 3, 31),
+                                     naming=sample_data.MIXED_NAMING, layout='sharded', seed=1)
+        used = {re.sub(r'\d{4}-\d{2}-\d{2}', '{date}', path.stem)
+                for path in mixed.rglob('*.json')}
+        assert used == set(sample_data.NAMING_PATTERNS), used
+        assert (mixed / '2024' / '02').is_dir()
+        for day in dates[::7]:
+            data = manager.load_daily_data(datetime.strptime(day, '%Y-%m-%d'), str(mixed), {})
+            assert data['date'] == day
+
+        # 测试4: 文本量与中文比例
+        print("📋 测试4: 文本量")
+        large = sample_data.generate_record('2024-05-01', text_chars=5000)
+        reflection = large['reflection']
+        text_chars = len(reflection['dailyThoughts']) + sum(
+            len(item) for key in ('progress', 'improvements', 'gratitude')
+            for item in reflection[key])
+        text_chars += sum(len(text) for details in large['completionDetails'].values()
+                          for text in details.values())
+        assert 4500 <= text_chars <= 5500, text_chars
+        ascii_only = sample_data.generate_record('2024-05-01', cjk_ratio=0)
+        assert not CJK_RE.search(json.dumps(ascii_only['reflection'], ensure_ascii=False))
+        assert CJK_RE.search(large['reflection']['dailyThoughts'])
+
+        # 命令行参数错误时返回False
+        assert sample_data.main(['--output', str(temp_path / 'x'), '--naming', 'bad']) is False
+        assert sample_data.main(['--output', str(temp_path / 'y'), '--years', '1',
+                                 '--end', '2024-02-29']) is True
+        assert len(list((temp_path / 'y').glob('*.json'))) == 366
+
+    print("\n✅ 合成数据生成器测试完成！")
+
+
+if __name__ == "__main__":
+    test_sample_data()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试全文搜索索引
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from record_store import JsonFileStore
+from search_index import SearchIndex, tokenize
+
+
+def save(store, index, date, event, thoughts):
+    """保存一条记录并更新索引"""
+    record = {'date': date, 'plans': [{'event': event}],
+              'reflection': {'dailyThoughts': thoughts}}
+    store.save(date, record)
+    if index is not None:
+        index.record_saved(date, record)
+
+
+def test_search_index():
+    """测试分词、排序、日期过滤以及重启后的对账"""
+    print("🧪 测试全文搜索索引")
+    print("=" * 50)
+    
+    # 测试1: 中文单字+二元组，英文按单词小写
+    print("📋 测试1: 分词")
+    assert tokenize('写周报 OK') == ['写', '周', '报', '写周', '周报', 'ok']
+    assert tokenize('写周报', for_query=True) == ['写周', '周报']
+    assert tokenize('写', for_query=True) == ['写']
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = JsonFileStore(temp_dir, '每日记录_{date}')
+        save(store, None, '2025-01-01', '写周报', '周报写了一半，周报明天继续')
+        
+        # 测试2: 首次使用时从已有记录构建
+        print("📋 测试2: 构建与增量更新")
+        index = SearchIndex(store)
+        save(store, index, '2025-01-02', '健身', '顺便想了想周报')
+        save(store, index, '2025-01-03', '读书', 'Reading notes')
+        results, total = index.search('周报')
+        assert total == 2
+        assert results[0]['date'] == '2025-01-01'
+        assert results[0]['matches'][0]['field'] == 'plans[0].event'
+        
+        # 测试3: 日期过滤和字序
+        print("📋 测试3: 日期过滤")
+        assert [r['date'] for r in index.search('周报', date_from='2025-01-02')[0]] == ['2025-01-02']
+        assert index.search('报周')[1] == 0
+        assert index.search('READING')[0][0]['date'] == '2025-01-03'
+        
+        # 测试4: 覆盖保存后旧内容不再命中
+        print("📋 测试4: 覆盖保存")
+        save(store, index, '2025-01-03', '散步', '')
+        assert index.search('reading')[1] == 0
+        
+        # 测试5: 重启后从索引文件加载，并补上索引外新增的记录
+        print("📋 测试5: 重启后对账")
+        save(store, None, '2025-01-04', '整理周报模板', '')
+        reloaded = SearchIndex(store)
+        assert [r['date'] for r in reloaded.search('周报')[0]][-1] == '2025-01-02'
+        assert reloaded.search('周报')[1] == 3
+        assert reloaded.search('散步')[1] == 1
+    
+    print("\n✅ 全文搜索索引测试完成！")
+
+
+if __name__ == "__main__":
+    test_search_index()
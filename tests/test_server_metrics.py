@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试服务器请求指标
+"""
+
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import api_handlers
+import server_metrics
+import settings_store
+import web_server
+
+
+def test_server_metrics():
+    """测试指标注册表、路由归一化以及 /api/metrics 导出"""
+    print("🧪 测试服务器请求指标")
+    print("=" * 50)
+
+    # 测试1: 直方图按桶累计，关闭后不再记录
+    print("📋 测试1: 注册表与Prometheus文本")
+    registry = server_metrics.MetricsRegistry()
+    registry.observe('GET', '/api/plans', 200, 0.003, 0, 120)
+    registry.observe('GET', '/api/plans', 200, 0.2, 0, 80)
+    registry.observe('GET', '/api/plans', 500, 40.0)
+    text = registry.render()
+    assert 'quirklog_http_requests_total{method="GET",route="/api/plans",status="200"} 2' in text
+    assert 'quirklog_http_request_duration_seconds_bucket{method="GET",route="/api/plans",le="0.005"} 1' in text
+    assert 'quirklog_http_request_duration_seconds_bucket{method="GET",route="/api/plans",le="30.0"} 2' in text
+    assert 'quirklog_http_request_duration_seconds_count{method="GET",route="/api/plans"} 3' in text
+    assert 'quirklog_http_response_bytes_total{method="GET",route="/api/plans"} 200' in text
+    registry.enabled = False
+    registry.observe('GET', '/api/plans', 200, 0.1)
+    assert registry.snapshot()[('GET', '/api/plans')]['count'] == 3
+
+    # 测试2: 路径参数和未知路由被归一化
+    print("📋 测试2: 路由标签")
+    assert api_handlers.route_label('/api/load-record/2025-01-01') == '/api/load-record/{date}'
+    assert api_handlers.route_label('/api/../../etc') == '/api/other'
+    assert api_handlers.route_label('/style.css') == 'static'
+
+    # 测试3: 线程服务器记录请求并通过 /api/metrics 导出
+    print("📋 测试3: /api/metrics 端点")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        xml_file = Path(temp_dir) / 'settings.xml'
+        xml_file.write_text(
+            '<?xml version="1.0" encoding="utf-8"?><settings><general>'
+            f'<saveDirectory>{temp_dir}/data</saveDirectory></general></settings>',
+            encoding='utf-8')
+        old_env = os.environ.get('QUIRKLOG_SETTINGS_FILE')
+        os.environ['QUIRKLOG_SETTINGS_FILE'] = str(xml_file)
+        settings_store.settings_cache.invalidate()
+
+        class QuietHandler(web_server.SettingsHandler):
+            def log_message(self, format, *args):
+                pass
+
+        old_enabled = server_metrics.metrics.enabled
+        server_metrics.metrics.enabled = True
+        server_metrics.metrics.reset()
+        httpd = web_server.create_server(0, handler_class=QuietHandler,
+                                         directory=project_root)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1], timeout=10)
+            body = json.dumps({'date': '2025-01-01', 'plans': []}).encode('utf-8')
+            # 404 响应会关闭连接，放在最前面，保证其指标在查询之前已记录
+            for method, path, data in (('GET', '/api/nothing', None),
+                                       ('POST', '/api/save-daily-record', body),
+                                       ('GET', '/api/load-record/2025-01-01', None)):
+                conn.request(method, path, body=data)
+                conn.getresponse().read()
+
+            conn.request('GET', '/api/metrics')
+            response = conn.getresponse()
+            text = response.read().decode('utf-8')
+            assert response.status == 200
+            assert response.getheader('Content-Type').startswith('text/plain')
+            assert ('quirklog_http_requests_total{method="GET",'
+                    'route="/api/load-record/{date}",status="200"} 1') in text
+            assert 'route="/api/other",status="404"' in text
+            assert (f'quirklog_http_request_bytes_total{{method="POST",'
+                    f'route="/api/save-daily-record"}} {len(body)}') in text
+
+            # 关闭统计后端点返回404
+            server_metrics.metrics.enabled = False
+            conn.request('GET', '/api/metrics')
+            response = conn.getresponse()
+            response.read()
+            assert response.status == 404
+            conn.close()
+        finally:
+            server_metrics.metrics.enabled = old_enabled
+            httpd.shutdown()
+            httpd.server_close()
+            if old_env is None:
+                os.environ.pop('QUIRKLOG_SETTINGS_FILE', None)
+            else:
+                os.environ['QUIRKLOG_SETTINGS_FILE'] = old_env
+            settings_store.settings_cache.invalidate()
+
+    print("\n✅ 服务器指标测试完成！")
+
+
+if __name__ == "__main__":
+    test_server_metrics()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试设置缓存功能
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import settings_store
+from web_server import SettingsHandler
+
+
+def test_settings_cache():
+    """测试设置缓存的读取、失效与写穿"""
+    print("🧪 测试设置缓存功能")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        xml_file = Path(temp_dir) / 'settings.xml'
+        old_env = os.environ.get('QUIRKLOG_SETTINGS_FILE')
+        os.environ['QUIRKLOG_SETTINGS_FILE'] = str(xml_file)
+        cache = settings_store.SettingsCache(check_interval=0)
+        
+        try:
+            # 测试1: 文件不存在时返回空快照
+            print("📋 测试1: 文件不存在")
+            assert dict(cache.get()) == {}
+            
+            # 测试2: 写入默认设置后可读取，且重复读取返回同一快照
+            print("📋 测试2: 读取并缓存设置")
+            handler = SettingsHandler.__new__(SettingsHandler)
+            handler.create_default_settings_xml()
+            first = cache.get()
+            assert first['saveDirectory'] == './downloads'
+            assert cache.get() is first
+            
+            # 测试3: 快照只读
+            print("📋 测试3: 快照只读")
+            try:
+                first['saveDirectory'] = '/tmp'
+                assert False, "快照应为只读"
+            except TypeError:
+                pass
+            
+            # 测试4: 文件变化后自动失效
+            print("📋 测试4: 文件变化后重新解析")
+            content = xml_file.read_text(encoding='utf-8')
+            xml_file.write_text(content.replace('./downloads', './records_changed'),
+                                encoding='utf-8')
+            assert cache.get()['saveDirectory'] == './records_changed'
+            
+            # 测试5: update_settings_xml 写穿全局缓存
+            print("📋 测试5: 保存设置后缓存立即更新")
+            handler.update_settings_xml({'saveDirectory': './saved_via_api',
+                                         'fileNaming': 'daily_record_{date}'})
+            settings = settings_store.load_settings()
+            assert settings['saveDirectory'] == './saved_via_api'
+            assert settings['fileNaming'] == 'daily_record_{date}'
+        finally:
+            settings_store.settings_cache.invalidate()
+            if old_env is None:
+                os.environ.pop('QUIRKLOG_SETTINGS_FILE', None)
+            else:
+                os.environ['QUIRKLOG_SETTINGS_FILE'] = old_env
+    
+    print("\n✅ 设置缓存测试完成！")
+
+
+if __name__ == "__main__":
+    test_settings_cache()
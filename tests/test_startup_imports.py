@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试启动时不导入AI相关的重量级依赖
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+# 只应在AI功能实际使用时导入的模块
+HEAVY_MODULES = ('openai', 'httpx', 'schedule')
+
+
+def test_startup_imports():
+    """导入启动器、Web服务器和定时任务模块后，openai/schedule 仍未被导入"""
+    print("🧪 测试延迟导入")
+    print("=" * 50)
+
+    code = (
+        "import sys\n"
+        "import launcher, web_server, async_server, weekly_task\n"
+        "manager = weekly_task.WeeklyTaskManager(api_key='sk-test')\n"
+        f"print('loaded:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=project_root,
+                            capture_output=True, text=True, check=True)
+    line = result.stdout.strip().splitlines()[-1]
+    loaded = [name for name in line[len('loaded:'):].split(',') if name]
+    print(f"📋 已导入的重量级模块: {loaded or '无'}")
+    assert loaded == []
+
+    print("\n✅ 延迟导入测试完成！")
+
+
+if __name__ == "__main__":
+    test_startup_imports()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试静态资源缓存功能
+"""
+
+import gzip
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加父目录到Python路径以导入主项目模块
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import static_assets
+
+
+def test_static_assets():
+    """测试压缩协商、ETag校验、缓存失效与前端构建的新鲜度"""
+    print("🧪 测试静态资源缓存功能")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        js_file = Path(temp_dir) / 'app.js'
+        js_file.write_text("console.log('每日计划');\n" * 200, encoding='utf-8')
+        cache = static_assets.StaticAssetCache()
+        
+        # 测试1: 压缩协商
+        print("📋 测试1: 根据 Accept-Encoding 选择编码")
+        asset = cache.get(js_file, 'application/javascript')
+        assert static_assets.choose_encoding('', asset) is None
+        assert static_assets.choose_encoding('gzip;q=0', asset) is None
+        assert static_assets.choose_encoding('gzip, deflate', asset) == 'gzip'
+        assert gzip.decompress(asset.variant('gzip')) == asset.body
+        
+        # 测试2: 条件请求
+        print("📋 测试2: If-None-Match / If-Modified-Since")
+        etag = asset.etag('gzip')
+        assert static_assets.is_not_modified({'If-None-Match': etag}, asset, etag)
+        assert static_assets.is_not_modified({'If-None-Match': f'W/{etag}'}, asset, etag)
+        assert not static_assets.is_not_modified({'If-None-Match': '"other"'}, asset, etag)
+        assert static_assets.is_not_modified(
+            {'If-Modified-Since': asset.last_modified}, asset, etag)
+        
+        # 测试3: 命中缓存与文件修改后失效
+        print("📋 测试3: 缓存命中与失效")
+        assert cache.get(js_file, 'application/javascript') is asset
+        js_file.write_text("console.log('已修改');\n" * 300, encoding='utf-8')
+        changed = cache.get(js_file, 'application/javascript')
+        assert changed is not asset and changed.etag() != asset.etag()
+        
+        # 测试4: 构建清单按源文件指纹判断是否过期，指纹不经过资源缓存
+        print("📋 测试4: 前端构建的新鲜度")
+        dist = Path(temp_dir) / static_assets.BUILD_DIRNAME
+        dist.mkdir()
+        (dist / 'app.abc123.js').write_bytes(js_file.read_bytes())
+        (dist / static_assets.BUILD_MANIFEST).write_text(json.dumps({
+            'assets': {'app.js': 'app.abc123.js'},
+            'sources': {'app.js': static_assets.content_digest(js_file.read_bytes())},
+        }), encoding='utf-8')
+        locator = static_assets.BuildLocator()
+        build = locator.current(temp_dir)
+        assert build is not None and locator.current(temp_dir) is build
+        assert str(js_file) not in {key[0] for key in static_assets.asset_cache._assets}
+        js_file.write_text("console.log('构建之后修改');\n", encoding='utf-8')
+        assert locator.current(temp_dir) is None
+    
+    print("\n✅ 静态资源缓存测试完成！")
+
+
+if __name__ == "__main__":
+    test_static_assets()
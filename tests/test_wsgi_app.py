@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 WSGI 应用及标准库网关
+"""
+
+import gzip
+import http.client
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+from wsgiref.util import setup_testing_defaults
+
+# 添加父目录到Python路径以导入主项目模块
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import server_metrics
+import settings_store
+import web_server
+import wsgi_app
+
+
+def call(app, method, path, body=b'', query='', headers=None):
+    """直接调用 WSGI 应用，返回 (状态码, 响应头字典, 响应体)"""
+    environ = {'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': query,
+               'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body)}
+    for name, value in (headers or {}).items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    setup_testing_defaults(environ)
+    captured = {}
+
+    def start_response(status, response_headers, exc_info=None):
+        captured['status'] = int(status.split()[0])
+        captured['headers'] = dict(response_headers)
+
+    result = app(environ, start_response)
+    try:
+        content = b''.join(result)
+    finally:
+        close = getattr(result, 'close', None)
+        if close is not None:
+            close()
+    return captured['status'], captured['headers'], content
+
+
+class QuietWSGIHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietHandler(web_server.SettingsHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def test_wsgi_app():
+    """测试API、静态文件、错误处理和指标，以及在WSGI服务器和标准库网关下的运行"""
+    print("🧪 测试WSGI应用")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        xml_file = Path(temp_dir) / 'settings.xml'
+        xml_file.write_text(
+            '<?xml version="1.0" encoding="utf-8"?><settings><general>'
+            f'<saveDirectory>{temp_dir}/data</saveDirectory></general></settings>',
+            encoding='utf-8')
+        old_env = os.environ.get('QUIRKLOG_SETTINGS_FILE')
+        os.environ['QUIRKLOG_SETTINGS_FILE'] = str(xml_file)
+        settings_store.settings_cache.invalidate()
+        old_enabled = server_metrics.metrics.enabled
+        app = wsgi_app.QuirkLogApp(project_root)
+
+        try:
+            # 测试1: API路由与CORS
+            print("📋 测试1: API")
+            record = json.dumps({'date': '2025-01-01', 'plans': []}).encode('utf-8')
+            status, headers, _ = call(app, 'POST', '/api/save-daily-record', record)
+            assert status == 200 and headers['Access-Control-Allow-Origin'] == '*'
+            status, _, content = call(app, 'GET', '/api/load-record/2025-01-01')
+            assert json.loads(content)['data']['date'] == '2025-01-01'
+            status, headers, _ = call(app, 'OPTIONS', '/api/save-daily-record')
+            assert status == 200 and 'POST' in headers['Access-Control-Allow-Methods']
+            status, headers, content = call(app, 'GET', '/api/export', query='format=ndjson')
+            assert status == 200 and 'Content-Length' not in headers
+            assert json.loads(content.decode('utf-8').splitlines()[0])['date'] == '2025-01-01'
+
+            # 测试2: 错误处理
+            print("📋 测试2: 错误处理")
+            assert call(app, 'POST', '/api/nothing')[0] == 404
+            assert call(app, 'PUT', '/index.html')[0] == 501
+            status, _, content = call(app, 'POST', '/api/save-daily-record', b'{not json')
+            assert json.loads(content)['status'] == 'error'
+            status, _, _ = call(app, 'GET', '/../../etc/passwd')
+            assert status == 404
+            statuses = []
+            for length in ('abc', str(wsgi_app.MAX_REQUEST_BODY + 1)):
+                environ = {'REQUEST_METHOD': 'POST', 'PATH_INFO': '/api/save-daily-record',
+                           'CONTENT_LENGTH': length, 'wsgi.input': io.BytesIO(b'')}
+                setup_testing_defaults(environ)
+                app(environ, lambda status, headers, exc_info=None: statuses.append(status))
+            assert statuses == ['400 Bad Request', '413 Request Entity Too Large']
+
+            def broken(*args, **kwargs):
+                raise RuntimeError("磁盘错误")
+
+            app.serve_static = broken
+            try:
+                status, headers, content = call(app, 'GET', '/index.html')
+            finally:
+                del app.serve_static
+            assert status == 500 and b'500' in content
+            assert int(headers['Content-Length']) == len(content)
+
+            # 测试3: 静态文件的缓存校验、压缩协商、HEAD 和目录跳转
+            print("📋 测试3: 静态文件")
+            status, headers, content = call(app, 'GET', '/index.html')
+            assert status == 200 and content == (project_root / 'index.html').read_bytes()
+            assert call(app, 'GET', '/index.html',
+                        headers={'If-None-Match': headers['ETag']})[0] == 304
+            status, headers, content = call(app, 'GET', '/style.css',
+                                            headers={'Accept-Encoding': 'gzip'})
+            assert headers.get('Content-Encoding') == 'gzip'
+            assert gzip.decompress(content) == (project_root / 'style.css').read_bytes()
+            status, headers, content = call(app, 'HEAD', '/index.html')
+            assert status == 200 and content == b'' and int(headers['Content-Length']) > 0
+            status, headers, _ = call(app, 'GET', '/tests')
+            assert status == 301 and headers['Location'] == '/tests/'
+
+            # 测试4: 应用自己记录请求指标
+            print("📋 测试4: 指标")
+            server_metrics.metrics.enabled = True
+            server_metrics.metrics.reset()
+            call(app, 'GET', '/api/load-record/2025-01-01')
+            stats = server_metrics.metrics.snapshot()[('GET', '/api/load-record/{date}')]
+            assert stats['count'] == 1 and stats['bytesOut'] > 0
+            server_metrics.metrics.enabled = old_enabled
+
+            # 测试5: 运行在标准库 wsgiref 服务器下
+            print("📋 测试5: WSGI服务器")
+            httpd = make_server('127.0.0.1', 0, app, handler_class=QuietWSGIHandler)
+            threading.Thread(target=httpd.serve_forever, daemon=True).start()
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', httpd.server_port, timeout=10)
+                conn.request('GET', '/api/history-files')
+                response = conn.getresponse()
+                assert response.status == 200
+                assert json.loads(response.read())['files'][0]['date'] == '2025-01-01'
+                conn.close()
+            finally:
+                httpd.shutdown()
+                httpd.server_close()
+
+            # 测试6: 标准库网关在同一持久连接上转发静态文件和分块的流式响应
+            print("📋 测试6: 标准库网关")
+            httpd = web_server.create_server(0, handler_class=QuietHandler,
+                                             directory=project_root)
+            # 所有连接共用服务器上的同一个应用
+            assert httpd.app.directory == str(project_root) and not httpd.app.record_metrics
+            threading.Thread(target=httpd.serve_forever, daemon=True).start()
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1],
+                                                  timeout=10)
+                conn.request('GET', '/index.html')
+                response = conn.getresponse()
+                assert response.status == 200 and response.read()
+                conn.request('GET', '/api/export?format=ndjson')
+                response = conn.getresponse()
+                assert response.getheader('Transfer-Encoding') == 'chunked'
+                assert b'2025-01-01' in response.read()
+                conn.request('HEAD', '/style.css')
+                response = conn.getresponse()
+                assert response.status == 200 and response.read() == b''
+                conn.request('GET', '/api/load-record/2025-01-01')
+                response = conn.getresponse()
+                assert json.loads(response.read())['status'] == 'success'
+                conn.close()
+
+                # 请求体的大小限制由应用检查，未读取的请求体不能留在连接上
+                for length, expected in (('abc', 400), (str(wsgi_app.MAX_REQUEST_BODY + 1), 413)):
+                    conn = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1],
+                                                      timeout=10)
+                    conn.putrequest('POST', '/api/save-daily-record')
+                    conn.putheader('Content-Length', length)
+                    conn.endheaders()
+                    response = conn.getresponse()
+                    response.read()
+                    assert response.status == expected and response.will_close
+                    conn.close()
+            finally:
+                httpd.shutdown()
+                httpd.server_close()
+        finally:
+            server_metrics.metrics.enabled = old_enabled
+            if old_env is None:
+                os.environ.pop('QUIRKLOG_SETTINGS_FILE', None)
+            else:
+                os.environ['QUIRKLOG_SETTINGS_FILE'] = old_env
+            settings_store.settings_cache.invalidate()
+
+    print("\n✅ WSGI应用测试完成！")
+
+
+if __name__ == "__main__":
+    test_wsgi_app()
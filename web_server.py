@@ -6,501 +6,329 @@
 
 import http.server
 import socketserver
-import webbrowser
+import threading
+import time
 import os
 import sys
-import json
-import xml.etree.ElementTree as ET
-from urllib.parse import urlparse, parse_qs
+from datetime import datetime
+from urllib.parse import unquote, urlparse
 from pathlib import Path
 
+import api_handlers
+import history_index
+import prefork
+import server_metrics
+import settings_store
+import wsgi_app
+
+
+# 并发服务默认参数：最大工作线程数与监听队列深度
+DEFAULT_MAX_WORKERS = 32
+DEFAULT_QUEUE_SIZE = 64
+
+# HTTP/1.1 keep-alive 参数：空闲连接的超时秒数与单个连接最多处理的请求数
+DEFAULT_KEEPALIVE_TIMEOUT = 15
+DEFAULT_MAX_KEEPALIVE_REQUESTS = 100
+
+
+class RequestBody:
+    """传给 WSGI 应用的请求体输入流，记录应用读取的字节数
+
+    请求体由应用读取（Content-Length 无效或超过 wsgi_app.MAX_REQUEST_BODY 时应用回复
+    400/413 而不读取），没有按 Content-Length 读完时连接不能继续使用。
+    """
+
+    def __init__(self, rfile, content_length):
+        self.rfile = rfile
+        try:
+            self.expected = int(content_length or 0)
+        except ValueError:
+            self.expected = None
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.rfile.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    @property
+    def complete(self):
+        return self.bytes_read == self.expected
+
+
+class ThreadedHTTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """带工作线程上限的多线程HTTP服务器
+
+    每个连接由独立线程处理，同时处理的连接数不超过 max_workers；
+    超出上限的连接留在内核监听队列中等待（队列深度为 queue_size），
+    从而避免慢请求（如AI连接测试）阻塞静态文件和其他API请求。
+    """
+
+    daemon_threads = True
+
+    def __init__(self, server_address, handler_class,
+                 max_workers=DEFAULT_MAX_WORKERS, queue_size=DEFAULT_QUEUE_SIZE,
+                 bind_and_activate=True):
+        self.max_workers = max(1, int(max_workers))
+        self.request_queue_size = max(1, int(queue_size))
+        self._worker_slots = threading.BoundedSemaphore(self.max_workers)
+        super().__init__(server_address, handler_class, bind_and_activate)
+
+    def process_request(self, request, client_address):
+        """占用一个工作线程名额后再派发请求，名额用尽时暂停accept"""
+        self._worker_slots.acquire()
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._worker_slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        """在工作线程中处理请求，结束后归还名额"""
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._worker_slots.release()
+
 
 class SettingsHandler(http.server.SimpleHTTPRequestHandler):
-    """自定义HTTP处理器，支持设置保存功能"""
+    """标准库 http.server 与 WSGI 应用之间的网关
+
+    路由、API和静态文件都由服务器上的 wsgi_app.QuirkLogApp（server.app，见 create_server）
+    处理（与在 gunicorn 等WSGI服务器下运行时相同），本类只负责连接：
+    HTTP/1.1 持久连接、分块传输和请求指标。
+    空闲超过 keepalive_timeout 秒或处理满 max_keepalive_requests 个请求后关闭连接，
+    这两个参数可由服务器对象上的同名属性覆盖。
+    """
     
-    def do_POST(self):
-        """处理POST请求"""
-        if self.path == '/api/save-settings':
-            self.handle_save_settings()
-        elif self.path == '/api/save-daily-record':
-            self.handle_save_daily_record()
-        elif self.path == '/api/test-ai-connection':
-            self.handle_test_ai_connection()
-        else:
-            self.send_error(404, "Not Found")
+    protocol_version = 'HTTP/1.1'
+    # 响应头和响应体分两次写出，持久连接上需关闭Nagle算法，否则会与延迟ACK叠加出约40ms的停顿
+    disable_nagle_algorithm = True
+    keepalive_timeout = DEFAULT_KEEPALIVE_TIMEOUT
+    max_keepalive_requests = DEFAULT_MAX_KEEPALIVE_REQUESTS
     
-    def do_GET(self):
-        """处理GET请求"""
-        if self.path == '/api/history-files':
-            self.handle_get_history_files()
-        elif self.path.startswith('/api/load-record/'):
-            date = self.path.split('/')[-1]
-            self.handle_load_record(date)
-        else:
-            # 默认的静态文件处理
-            super().do_GET()
+    def setup(self):
+        """应用服务器上的keep-alive设置（socket超时即空闲超时）"""
+        self.timeout = getattr(self.server, 'keepalive_timeout', self.keepalive_timeout)
+        self.max_keepalive_requests = getattr(
+            self.server, 'max_keepalive_requests', self.max_keepalive_requests)
+        self.requests_served = 0
+        super().setup()
+        self.wfile = server_metrics.CountingWriter(self.wfile)
     
-    def handle_save_settings(self):
-        """处理保存设置的请求"""
-        try:
-            # 读取POST数据
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            
-            # 解析JSON数据
-            settings_data = json.loads(post_data.decode('utf-8'))
-            
-            # 更新XML文件
-            self.update_settings_xml(settings_data)
-            
-            # 返回成功响应
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            response = {"status": "success", "message": "设置保存成功！"}
-            self.wfile.write(json.dumps(response).encode('utf-8'))
-            
-        except Exception as e:
-            # 返回错误响应
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            response = {"status": "error", "message": f"保存设置失败: {str(e)}"}
-            self.wfile.write(json.dumps(response).encode('utf-8'))
+    def send_response(self, code, message=None):
+        """记录响应状态码供指标统计使用"""
+        self.wfile.status = code
+        super().send_response(code, message)
     
-    def handle_save_daily_record(self):
-        """处理保存日记记录的请求"""
-        try:
-            # 读取POST数据
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            
-            # 解析JSON数据
-            record_data = json.loads(post_data.decode('utf-8'))
-            
-            # 获取当前设置
-            settings = self.load_settings()
-            save_directory = settings.get('saveDirectory', './downloads')
-            file_naming = settings.get('fileNaming', '每日记录_{date}')
-            
-            # 创建保存目录
-            save_path = Path(save_directory)
-            save_path.mkdir(parents=True, exist_ok=True)
-            
-            # 生成文件名
-            date = record_data.get('date', '')
-            file_name = file_naming.replace('{date}', date)
-            file_path = save_path / f"{file_name}.json"
-            
-            # 保存文件
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(record_data, f, ensure_ascii=False, indent=2)
-            
-            # 返回成功响应
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            response = {
-                "status": "success", 
-                "message": f"文件已保存到: {file_path}",
-                "filePath": str(file_path)
-            }
-            self.wfile.write(json.dumps(response).encode('utf-8'))
-            
-        except Exception as e:
-            # 返回错误响应
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            response = {"status": "error", "message": f"保存日记失败: {str(e)}"}
-            self.wfile.write(json.dumps(response).encode('utf-8'))
+    def begin_request(self):
+        """开始处理请求：清零输出统计并返回开始时间"""
+        self.wfile.reset()
+        return time.perf_counter()
     
-    def handle_test_ai_connection(self):
-        """处理测试AI连接的请求"""
-        try:
-            # 读取POST数据
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            
-            # 解析JSON数据
-            test_data = json.loads(post_data.decode('utf-8'))
-            api_key = test_data.get('apiKey', '')
-            base_url = test_data.get('baseUrl', 'https://openrouter.ai/api/v1')
-            model = test_data.get('model', 'deepseek/deepseek-r1-0528-qwen3-8b:free')
-            
-            # 测试AI连接
-            success, message = self.test_openrouter_connection(api_key, base_url, model)
-            
-            # 返回响应
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            if success:
-                response = {"status": "success", "message": message}
-            else:
-                response = {"status": "error", "message": message}
-            
-            self.wfile.write(json.dumps(response).encode('utf-8'))
-            
-        except Exception as e:
-            # 返回错误响应
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            response = {"status": "error", "message": f"测试连接失败: {str(e)}"}
-            self.wfile.write(json.dumps(response).encode('utf-8'))
+    def record_metrics(self, started, bytes_in=0):
+        """请求处理完毕后记录路由指标"""
+        if not server_metrics.metrics.enabled:
+            return
+        server_metrics.metrics.observe(
+            self.command, api_handlers.route_label(urlparse(self.path).path),
+            self.wfile.status, time.perf_counter() - started,
+            bytes_in, self.wfile.bytes_written)
     
-    def test_openrouter_connection(self, api_key, base_url, model=None):
-        """测试OpenRouter API连接"""
-        try:
-            from openai import OpenAI
-            
-            # 如果没有提供模型，使用默认模型
-            if not model:
-                model = "deepseek/deepseek-r1-0528-qwen3-8b:free"
-            
-            # 创建客户端
-            client = OpenAI(
-                base_url=base_url,
-                api_key=api_key,
-            )
-            
-            # 发送简单的测试请求
-            completion = client.chat.completions.create(
-                extra_headers={
-                    "HTTP-Referer": "https://quirklog.app",
-                    "X-Title": "QuirkLog Daily Planner",
-                },
-                model=model,  # 使用指定的模型
-                messages=[
-                    {
-                        "role": "user",
-                        "content": "Hello! This is a connection test."
-                    }
-                ],
-                max_tokens=10  # 限制token数量，减少费用
-            )
-            
-            if completion.choices and completion.choices[0].message:
-                return True, f"API连接测试成功！使用模型: {model}"
-            else:
-                return False, "API返回了空响应"
-                
-        except ImportError:
-            return False, "未安装openai库，请运行: pip install openai"
-        except Exception as e:
-            error_msg = str(e)
-            if "401" in error_msg or "Unauthorized" in error_msg:
-                return False, "API密钥无效或已过期"
-            elif "404" in error_msg or "Not Found" in error_msg:
-                return False, "API服务地址无效或模型不存在"
-            elif "timeout" in error_msg.lower():
-                return False, "连接超时，请检查网络"
-            else:
-                return False, f"连接失败: {error_msg}"
+    def end_headers(self):
+        """每个响应计数，达到单连接请求上限时通知客户端关闭连接"""
+        self.requests_served += 1
+        if (self.requests_served >= self.max_keepalive_requests and
+                not self.close_connection):
+            self.send_header('Connection', 'close')
+        super().end_headers()
+    
+    def run_app(self):
+        """把当前请求交给 WSGI 应用处理，并记录请求指标
+
+        应用没有读完请求体时（如请求体过大被拒绝）回复后关闭连接，
+        否则剩余内容会污染同一连接上的下一个请求。
+        """
+        started = self.begin_request()
+        body = RequestBody(self.rfile, self.headers.get('Content-Length'))
+        chunks = self.server.app(self.wsgi_environ(body), self.start_response)
+        if not body.complete:
+            self._app_headers = list(self._app_headers) + [('Connection', 'close')]
+        self.write_app_response(chunks)
+        self.record_metrics(started, body.bytes_read)
     
-    def handle_get_history_files(self):
-        """获取历史文件列表"""
+    do_GET = do_POST = do_HEAD = do_OPTIONS = run_app
+    
+    def wsgi_environ(self, body):
+        """由当前请求构造 WSGI 环境（body 为 RequestBody）"""
+        parsed = urlparse(self.path)
+        environ = {
+            'REQUEST_METHOD': self.command,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': unquote(parsed.path, 'iso-8859-1'),
+            'QUERY_STRING': parsed.query,
+            'CONTENT_TYPE': self.headers.get('Content-Type', ''),
+            'CONTENT_LENGTH': self.headers.get('Content-Length', ''),
+            'SERVER_NAME': self.server.server_address[0] or 'localhost',
+            'SERVER_PORT': str(self.server.server_address[1]),
+            'SERVER_PROTOCOL': self.request_version,
+            'REMOTE_ADDR': self.client_address[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+            wsgi_app.AI_TESTER_KEY: self.test_openrouter_connection,
+        }
+        for name, value in self.headers.items():
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            if key in ('HTTP_CONTENT_TYPE', 'HTTP_CONTENT_LENGTH'):
+                continue
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+    
+    def start_response(self, status, headers, exc_info=None):
+        """WSGI start_response：记下状态和响应头，写出第一个响应体块之前发送"""
+        self._app_status = status
+        self._app_headers = headers
+        return self.wfile.write
+    
+    def write_app_response(self, chunks):
+        """写出 WSGI 应用的响应
+
+        有 Content-Length 时直接写出；否则 HTTP/1.1 连接使用分块传输编码，
+        HTTP/1.0 直接写出内容并在结束后关闭连接。响应头立即发送（实时事件流
+        需要客户端尽快收到响应头），之后出错只能中断连接。
+        """
         try:
-            # 获取当前设置
-            settings = self.load_settings()
-            save_directory = settings.get('saveDirectory', './downloads')
-            file_naming = settings.get('fileNaming', '每日记录_{date}')
-            
-            save_path = Path(save_directory)
-            
-            if not save_path.exists():
-                # 如果目录不存在，返回空列表
-                self.send_json_response({"status": "success", "files": []})
-                return
+            code, _, reason = self._app_status.partition(' ')
+            code = int(code)
+            self.send_response(code, reason)
+            has_length = False
+            for name, value in self._app_headers:
+                has_length = has_length or name.lower() == 'content-length'
+                self.send_header(name, value)
+            bodiless = self.command == 'HEAD' or code in (204, 304)
+            chunked = (not has_length and not bodiless and
+                       self.protocol_version >= 'HTTP/1.1' and
+                       self.request_version >= 'HTTP/1.1')
+            if chunked:
+                self.send_header('Transfer-Encoding', 'chunked')
+            elif not has_length and not bodiless:
+                self.send_header('Connection', 'close')
+                self.close_connection = True
+            self.end_headers()
             
-            # 扫描目录中的JSON文件
-            json_files = []
-            for file_path in save_path.glob('*.json'):
-                try:
-                    # 从文件名解析日期
-                    file_name = file_path.stem
-                    date = self.extract_date_from_filename(file_name, file_naming)
-                    
-                    if date:
-                        # 获取文件基本信息
-                        stat = file_path.stat()
-                        json_files.append({
-                            'date': date,
-                            'filename': file_path.name,
-                            'path': str(file_path),
-                            'size': stat.st_size,
-                            'modified': stat.st_mtime
-                        })
-                except Exception as e:
-                    print(f"处理文件 {file_path} 时出错: {e}")
+            for chunk in chunks:
+                if not chunk:
                     continue
-            
-            # 按日期排序
-            json_files.sort(key=lambda x: x['date'], reverse=True)
-            
-            self.send_json_response({
-                "status": "success", 
-                "files": json_files,
-                "saveDirectory": save_directory
-            })
-            
+                if chunked:
+                    self.wfile.write(f"{len(chunk):X}\r\n".encode('ascii') + chunk + b"\r\n")
+                else:
+                    self.wfile.write(chunk)
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
         except Exception as e:
-            self.send_json_response({
-                "status": "error", 
-                "message": f"获取历史文件失败: {str(e)}"
-            })
+            print(f"❌ 流式响应中断: {e}")
+            self.close_connection = True
+        finally:
+            # 及时释放响应体占用的资源（如实时事件的订阅名额）
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
     
-    def handle_load_record(self, date):
-        """加载指定日期的记录"""
-        try:
-            # 获取当前设置
-            settings = self.load_settings()
-            save_directory = settings.get('saveDirectory', './downloads')
-            file_naming = settings.get('fileNaming', '每日记录_{date}')
-            
-            # 构建文件路径
-            file_name = file_naming.replace('{date}', date)
-            file_path = Path(save_directory) / f"{file_name}.json"
-            
-            if not file_path.exists():
-                self.send_json_response({
-                    "status": "error", 
-                    "message": f"文件不存在: {file_path}"
-                })
-                return
-            
-            # 读取文件内容
-            with open(file_path, 'r', encoding='utf-8') as f:
-                record_data = json.load(f)
-            
-            self.send_json_response({
-                "status": "success", 
-                "data": record_data,
-                "filePath": str(file_path)
-            })
-            
-        except Exception as e:
-            self.send_json_response({
-                "status": "error", 
-                "message": f"加载记录失败: {str(e)}"
-            })
+    def test_openrouter_connection(self, api_key, base_url, model=None):
+        """测试OpenRouter API连接（子类可替换，例如基准测试中模拟AI延迟）"""
+        return api_handlers.test_openrouter_connection(api_key, base_url, model)
     
+    # 兼容接口：早期处理器的公开方法，网关不再调用，保留给现有脚本和测试
     def extract_date_from_filename(self, filename, naming_pattern):
         """从文件名中提取日期"""
-        try:
-            # 移除模式中的 {date} 部分，获取前缀和后缀
-            if '{date}' not in naming_pattern:
-                return None
-            
-            prefix, suffix = naming_pattern.split('{date}', 1)
-            
-            # 从文件名中提取日期部分
-            if prefix and not filename.startswith(prefix):
-                return None
-            if suffix and not filename.endswith(suffix):
-                return None
-            
-            # 提取日期字符串
-            start_pos = len(prefix)
-            end_pos = len(filename) - len(suffix) if suffix else len(filename)
-            date_str = filename[start_pos:end_pos]
-            
-            # 验证日期格式 (YYYY-MM-DD)
-            if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
-                # 尝试解析日期以验证有效性
-                from datetime import datetime
-                datetime.strptime(date_str, '%Y-%m-%d')
-                return date_str
-            
-            return None
-            
-        except Exception:
-            return None
-    
-    def send_json_response(self, data):
-        """发送JSON响应"""
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps(data, ensure_ascii=False).encode('utf-8'))
-    
-    def do_OPTIONS(self):
-        """处理预检请求"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+        return history_index.extract_date_from_filename(filename, naming_pattern)
     
     def update_settings_xml(self, settings_data):
         """更新settings.xml文件"""
-        xml_file = Path('settings.xml')
-        
-        # 如果XML文件不存在，创建一个默认的
-        if not xml_file.exists():
-            self.create_default_settings_xml()
-        
-        # 解析现有XML
-        tree = ET.parse(xml_file)
-        root = tree.getroot()
-        
-        # 更新基础设置值
-        general = root.find('general')
-        if general is not None:
-            save_dir = general.find('saveDirectory')
-            if save_dir is not None:
-                save_dir.text = settings_data.get('saveDirectory', './downloads')
-            
-            auto_save = general.find('autoSave')
-            if auto_save is not None:
-                auto_save.text = str(settings_data.get('autoSave', True)).lower()
-        
-        export_section = root.find('export')
-        if export_section is not None:
-            file_naming = export_section.find('fileNaming')
-            if file_naming is not None:
-                file_naming.text = settings_data.get('fileNaming', '每日记录_{date}')
-        
-        # 更新或创建AI设置
-        ai_section = root.find('ai')
-        if ai_section is None:
-            ai_section = ET.SubElement(root, 'ai')
-        
-        # 更新AI enabled设置
-        enabled_elem = ai_section.find('enabled')
-        if enabled_elem is None:
-            enabled_elem = ET.SubElement(ai_section, 'enabled')
-        enabled_elem.text = str(settings_data.get('aiEnabled', False)).lower()
-        
-        # 更新API密钥（仅在提供时保存）
-        api_key = settings_data.get('openrouterApiKey', '')
-        if api_key:  # 只有在提供了API密钥时才保存
-            api_key_elem = ai_section.find('openrouterApiKey')
-            if api_key_elem is None:
-                api_key_elem = ET.SubElement(ai_section, 'openrouterApiKey')
-            api_key_elem.text = api_key
-        
-        # 更新Base URL
-        base_url_elem = ai_section.find('openrouterBaseUrl')
-        if base_url_elem is None:
-            base_url_elem = ET.SubElement(ai_section, 'openrouterBaseUrl')
-        base_url_elem.text = settings_data.get('openrouterBaseUrl', 'https://openrouter.ai/api/v1')
-        
-        # 更新模型
-        model_elem = ai_section.find('openrouterModel')
-        if model_elem is None:
-            model_elem = ET.SubElement(ai_section, 'openrouterModel')
-        model_elem.text = settings_data.get('openrouterModel', 'deepseek/deepseek-r1-0528-qwen3-8b:free')
-        
-        # 添加更新时间
-        last_updated = root.find('lastUpdated')
-        if last_updated is None:
-            last_updated = ET.SubElement(root, 'lastUpdated')
-        last_updated.text = settings_data.get('updatedAt', '')
-        
-        # 保存XML文件
-        tree.write(xml_file, encoding='utf-8', xml_declaration=True)
+        api_handlers.update_settings_xml(settings_data)
     
     def create_default_settings_xml(self):
         """创建默认的settings.xml文件"""
-        root = ET.Element("settings")
-        
-        general = ET.SubElement(root, "general")
-        ET.SubElement(general, "saveDirectory").text = "./downloads"
-        ET.SubElement(general, "autoSave").text = "true"
-        ET.SubElement(general, "dateFormat").text = "YYYY-MM-DD"
-        
-        export_section = ET.SubElement(root, "export")
-        ET.SubElement(export_section, "includeStatistics").text = "true"
-        ET.SubElement(export_section, "includeTimestamp").text = "true"
-        ET.SubElement(export_section, "fileNaming").text = "每日记录_{date}"
-        
-        # 添加AI设置
-        ai_section = ET.SubElement(root, "ai")
-        ET.SubElement(ai_section, "enabled").text = "false"
-        ET.SubElement(ai_section, "openrouterApiKey").text = ""
-        ET.SubElement(ai_section, "openrouterBaseUrl").text = "https://openrouter.ai/api/v1"
-        ET.SubElement(ai_section, "openrouterModel").text = "deepseek/deepseek-r1-0528-qwen3-8b:free"
-        
-        ui = ET.SubElement(root, "ui")
-        ET.SubElement(ui, "theme").text = "light"
-        ET.SubElement(ui, "language").text = "zh-CN"
-        
-        tree = ET.ElementTree(root)
-        tree.write('settings.xml', encoding='utf-8', xml_declaration=True)
+        api_handlers.create_default_settings_xml()
     
     def load_settings(self):
-        """从settings.xml文件加载设置"""
-        try:
-            xml_file = Path('settings.xml')
-            if not xml_file.exists():
-                return {}
-            
-            tree = ET.parse(xml_file)
-            root = tree.getroot()
-            
-            settings = {}
-            
-            # 读取general设置
-            general = root.find('general')
-            if general is not None:
-                save_dir = general.find('saveDirectory')
-                if save_dir is not None:
-                    settings['saveDirectory'] = save_dir.text
-                
-                auto_save = general.find('autoSave')
-                if auto_save is not None:
-                    settings['autoSave'] = auto_save.text.lower() == 'true'
-            
-            # 读取export设置
-            export_section = root.find('export')
-            if export_section is not None:
-                file_naming = export_section.find('fileNaming')
-                if file_naming is not None:
-                    settings['fileNaming'] = file_naming.text
-            
-            # 读取AI设置
-            ai_section = root.find('ai')
-            if ai_section is not None:
-                enabled = ai_section.find('enabled')
-                if enabled is not None:
-                    settings['aiEnabled'] = enabled.text.lower() == 'true'
-                
-                api_key = ai_section.find('openrouterApiKey')
-                if api_key is not None and api_key.text:
-                    settings['openrouterApiKey'] = api_key.text
-                
-                base_url = ai_section.find('openrouterBaseUrl')
-                if base_url is not None and base_url.text:
-                    settings['openrouterBaseUrl'] = base_url.text
-                
-                model = ai_section.find('openrouterModel')
-                if model is not None and model.text:
-                    settings['openrouterModel'] = model.text
-            
-            return settings
-            
-        except Exception as e:
-            print(f"加载设置失败: {e}")
-            return {}
+        """读取当前设置（进程级缓存的只读快照）"""
+        return settings_store.load_settings()
+
+
+def create_server(port=8000, handler_class=None, concurrent=True,
+                  max_workers=DEFAULT_MAX_WORKERS, queue_size=DEFAULT_QUEUE_SIZE,
+                  keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+                  max_keepalive_requests=DEFAULT_MAX_KEEPALIVE_REQUESTS, sock=None,
+                  directory=None):
+    """创建HTTP服务器实例
+
+    Args:
+        port: 监听端口，0 表示由系统分配
+        handler_class: 请求处理器类，默认为 SettingsHandler
+        concurrent: 是否使用多线程并发模式，False 时退回单线程 TCPServer
+        max_workers: 并发模式下同时处理的最大连接数
+        queue_size: 监听队列深度
+        keepalive_timeout: 持久连接的空闲超时（秒）
+        max_keepalive_requests: 单个连接最多处理的请求数
+        sock: 已在监听的socket（多进程模式下由主进程创建），提供时忽略 port
+        directory: 静态文件的服务目录，默认为当前目录
+
+    服务器上的所有连接共用一个 WSGI 应用（httpd.app）；处理器的AI连接测试
+    （test_openrouter_connection）通过 WSGI 环境传给应用。
+    """
+    handler_class = handler_class or SettingsHandler
+    bind_and_activate = sock is None
+    if concurrent:
+        httpd = ThreadedHTTPServer(("", port), handler_class,
+                                   max_workers=max_workers, queue_size=queue_size,
+                                   bind_and_activate=bind_and_activate)
+        httpd.max_keepalive_requests = max(1, int(max_keepalive_requests))
+    else:
+        # 单线程模式下一个持久连接会独占唯一的线程，因此每个连接只处理一个请求
+        httpd = socketserver.TCPServer(("", port), handler_class, bind_and_activate)
+        httpd.max_keepalive_requests = 1
+    if sock is not None:
+        httpd.socket.close()
+        httpd.socket = sock
+        httpd.server_address = sock.getsockname()
+    httpd.keepalive_timeout = keepalive_timeout
+    httpd.app = wsgi_app.QuirkLogApp(directory or os.getcwd(), record_metrics=False)
+    return httpd
+
+
+def effective_workers(workers, settings):
+    """返回实际使用的工作进程数（平台或存储引擎不支持多进程时退回1）"""
+    if workers <= 1:
+        return 1
+    if not prefork.is_supported():
+        print("⚠️ 当前平台不支持多进程模式，使用单进程")
+        return 1
+    if settings.get('storageEngine') == 'log':
+        # 追加日志存储在进程内维护记录偏移，不能由多个进程同时写入
+        print("⚠️ 追加日志存储引擎不支持多进程模式，使用单进程")
+        return 1
+    return workers
 
 
-def start_server(port=8000):
-    """启动HTTP服务器"""
+def start_server(port=8000, concurrent=True,
+                 max_workers=DEFAULT_MAX_WORKERS, queue_size=DEFAULT_QUEUE_SIZE,
+                 keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+                 max_keepalive_requests=DEFAULT_MAX_KEEPALIVE_REQUESTS,
+                 workers=1, reuse_port=False, background_task=None):
+    """启动HTTP服务器（workers 大于1时为多进程模式，见 prefork）
+
+    background_task 在服务器创建后调用一次，用于启动每周洞察等后台线程。
+    多进程模式下只在槽位0的工作进程中（fork 之后）调用：监督者进程没有客户端连接，
+    在其中发布的实时事件无法推送，fork 时也不应有其他线程在运行。
+    """
     
     # 确保在正确的目录中
     script_dir = Path(__file__).parent
@@ -512,19 +340,51 @@ def start_server(port=8000):
         print("请确保在正确的目录中运行此脚本")
         return
     
-    # 使用自定义处理器
-    Handler = SettingsHandler
+    # 启动时核对历史索引，保存目录被外部修改过时重建（多进程模式下在 fork 之前完成）
+    settings = settings_store.load_settings()
+    try:
+        history_index.get_index(
+            settings.get('saveDirectory', './downloads'),
+            settings.get('fileNaming', '每日记录_{date}')
+        ).ensure_fresh()
+    except Exception as e:
+        print(f"⚠️ 历史索引初始化失败: {e}")
+    workers = effective_workers(workers, settings)
+    
+    def server_factory(sock=None):
+        httpd = create_server(port, concurrent=concurrent,
+                              max_workers=max_workers, queue_size=queue_size,
+                              keepalive_timeout=keepalive_timeout,
+                              max_keepalive_requests=max_keepalive_requests, sock=sock)
+        if background_task is not None and prefork.worker_slot in (None, 0):
+            background_task()
+        return httpd
     
     try:
-        with socketserver.TCPServer(("", port), Handler) as httpd:
+        if workers > 1:
+            server = prefork.PreforkServer(port, workers, server_factory,
+                                           queue_size=queue_size, reuse_port=reuse_port)
+        else:
+            server = server_factory()
+        with server as httpd:
             print(f"🌐 每日计划与总结Web应用已启动")
             print(f"📍 服务器地址: http://localhost:{port}")
             print(f"📂 服务目录: {script_dir}")
+            if concurrent:
+                print(f"🧵 并发模式: 最多 {max_workers} 个工作线程，队列深度 {queue_size}")
+                print(f"🔗 持久连接: 空闲 {keepalive_timeout} 秒后关闭，"
+                      f"每个连接最多 {max_keepalive_requests} 个请求")
+            else:
+                print("🧵 单线程模式")
+            if workers > 1:
+                print(f"🧩 多进程模式: {workers} 个工作进程"
+                      f"{'（SO_REUSEPORT）' if reuse_port else ''}")
             print("🔄 按 Ctrl+C 停止服务器")
             print("-" * 50)
             
             # 自动打开浏览器
             try:
+                import webbrowser
                 webbrowser.open(f'http://localhost:{port}')
                 print("🚀 正在打开浏览器...")
             except Exception as e:
@@ -539,28 +399,86 @@ def start_server(port=8000):
         if e.errno == 48:  # Address already in use
             print(f"❌ 端口 {port} 已被占用")
             print(f"尝试使用其他端口...")
-            start_server(port + 1)
+            start_server(port + 1, concurrent=concurrent,
+                         max_workers=max_workers, queue_size=queue_size,
+                         keepalive_timeout=keepalive_timeout,
+                         max_keepalive_requests=max_keepalive_requests,
+                         workers=workers, reuse_port=reuse_port,
+                         background_task=background_task)
         else:
             print(f"❌ 启动服务器失败: {e}")
+    except RuntimeError as e:
+        print(f"❌ 启动服务器失败: {e}")
 
-def main():
-    """主函数"""
-    port = 8000
+def parse_args(argv=None):
+    """解析命令行参数（忽略启动器传入的其他参数）"""
+    import argparse
     
-    # 检查命令行参数
-    if len(sys.argv) > 1:
-        try:
-            port = int(sys.argv[1])
-        except ValueError:
-            print("❌ 无效的端口号，使用默认端口 8000")
-            port = 8000
+    parser = argparse.ArgumentParser(description="QuirkLog Web服务器")
+    parser.add_argument('port', nargs='?', default='8000', help="监听端口 (默认 8000)")
+    parser.add_argument('--threads', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f"最大工作线程数 (默认 {DEFAULT_MAX_WORKERS})")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"监听队列深度 (默认 {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument('--keepalive-timeout', type=float, default=None,
+                        help=f"持久连接空闲超时秒数 (threaded 默认 {DEFAULT_KEEPALIVE_TIMEOUT}，"
+                             f"asyncio 默认 75)")
+    parser.add_argument('--max-keepalive-requests', type=int,
+                        default=DEFAULT_MAX_KEEPALIVE_REQUESTS,
+                        help=f"单个连接最多处理的请求数 (默认 {DEFAULT_MAX_KEEPALIVE_REQUESTS})")
+    parser.add_argument('--no-metrics', action='store_true',
+                        help="关闭请求指标统计（/api/metrics 返回404）")
+    parser.add_argument('--serial', action='store_true',
+                        help="使用单线程模式（一次只处理一个请求）")
+    parser.add_argument('--engine', choices=('threaded', 'asyncio'), default='threaded',
+                        help="服务器实现：threaded（默认，多线程）或 asyncio（单线程事件循环）")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="工作进程数 (默认 1)；大于1时 fork 多个进程共享监听端口，仅 threaded 引擎")
+    parser.add_argument('--reuse-port', action='store_true',
+                        help="多进程模式下各工作进程以 SO_REUSEPORT 各自监听，而不是共享同一个socket")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
+def main(background_task=None):
+    """主函数（background_task 见 start_server）"""
+    args = parse_args(sys.argv[1:])
+    
+    # 检查端口参数
+    try:
+        port = int(args.port)
+    except ValueError:
+        print("❌ 无效的端口号，使用默认端口 8000")
+        port = 8000
     
-    from datetime import datetime
     today = datetime.now().strftime("%Y年%m月%d日")
     print(f"🌟 {today} 计划与总结Web应用启动器")
     print("=" * 40)
     
-    start_server(port)
+    if args.no_metrics:
+        server_metrics.metrics.enabled = False
+    
+    if args.engine == 'asyncio':
+        if args.workers > 1:
+            print("⚠️ 多进程模式只适用于 threaded 引擎，asyncio 服务器以单进程运行")
+        import async_server
+        if background_task is not None:
+            background_task()
+        if args.keepalive_timeout is None:
+            async_server.start_server(port)
+        else:
+            async_server.start_server(port, keepalive_timeout=args.keepalive_timeout)
+        return
+    
+    if args.keepalive_timeout is None:
+        args.keepalive_timeout = DEFAULT_KEEPALIVE_TIMEOUT
+    
+    start_server(port, concurrent=not args.serial,
+                 max_workers=args.threads, queue_size=args.queue_size,
+                 keepalive_timeout=args.keepalive_timeout,
+                 max_keepalive_requests=args.max_keepalive_requests,
+                 workers=args.workers, reuse_port=args.reuse_port,
+                 background_task=background_task)
 
 if __name__ == "__main__":
     main()
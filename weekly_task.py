@@ -3,18 +3,22 @@
 """
 QuirkLog 每周定时任务
 设置为每周一上午10点执行，总结上一周的内容
+
+openai 和 schedule 只在真正用到时才导入，导入本模块不会拖慢Web服务的启动。
 """
 
-import schedule
 import time
 import threading
 from datetime import datetime, timedelta
-from openai import OpenAI
 import json
 import os
-import xml.etree.ElementTree as ET
 from pathlib import Path
 
+import history_index
+import live_events
+import record_store
+import settings_store
+
 
 class WeeklyTaskManager:
     """每周定时任务管理器"""
@@ -52,69 +56,31 @@ class WeeklyTaskManager:
             "deepseek/deepseek-r1-0528-qwen3-8b:free"
         )
         
-        self.client = None
+        self._client = None
         self.running = False
         self.task_thread = None
         
-        # 初始化OpenAI客户端
-        if self.api_key:
-            self.client = OpenAI(
+        if not self.api_key:
+            print("⚠️ 警告: 未找到OpenRouter API密钥")
+    
+    @property
+    def client(self):
+        """OpenAI客户端（首次使用时创建，没有API密钥或未安装openai时为None）"""
+        if self._client is None and self.api_key:
+            try:
+                from openai import OpenAI
+            except ImportError:
+                print("❌ 未安装openai库，请运行: pip install openai")
+                return None
+            self._client = OpenAI(
                 base_url=self.base_url,
                 api_key=self.api_key,
             )
-        else:
-            print("⚠️ 警告: 未找到OpenRouter API密钥")
+        return self._client
     
     def load_settings_from_xml(self):
-        """从settings.xml文件加载AI相关设置和保存路径"""
-        try:
-            xml_file = Path('settings.xml')
-            if not xml_file.exists():
-                return {}
-            
-            tree = ET.parse(xml_file)
-            root = tree.getroot()
-            
-            settings = {}
-            
-            # 读取文件设置（保存路径）
-            general_section = root.find('general')
-            if general_section is not None:
-                save_dir_elem = general_section.find('saveDirectory')
-                if save_dir_elem is not None and save_dir_elem.text:
-                    settings['saveDirectory'] = save_dir_elem.text
-            
-            # 读取导出设置（文件命名）
-            export_section = root.find('export')
-            if export_section is not None:
-                file_naming_elem = export_section.find('fileNaming')
-                if file_naming_elem is not None and file_naming_elem.text:
-                    settings['fileNaming'] = file_naming_elem.text
-            
-            # 读取AI设置
-            ai_section = root.find('ai')
-            if ai_section is not None:
-                api_key_elem = ai_section.find('openrouterApiKey')
-                if api_key_elem is not None and api_key_elem.text:
-                    settings['openrouterApiKey'] = api_key_elem.text
-                
-                base_url_elem = ai_section.find('openrouterBaseUrl')
-                if base_url_elem is not None and base_url_elem.text:
-                    settings['openrouterBaseUrl'] = base_url_elem.text
-                
-                model_elem = ai_section.find('openrouterModel')
-                if model_elem is not None and model_elem.text:
-                    settings['openrouterModel'] = model_elem.text
-                
-                enabled_elem = ai_section.find('enabled')
-                if enabled_elem is not None:
-                    settings['aiEnabled'] = enabled_elem.text.lower() == 'true'
-            
-            return settings
-            
-        except Exception as e:
-            print(f"加载设置失败: {e}")
-            return {}
+        """读取AI相关设置和保存路径（进程级缓存的只读快照）"""
+        return settings_store.load_settings()
     
     def make_api_request(self, prompt="生成一段关于每周总结和下周计划的建议"):
         """
@@ -194,6 +160,14 @@ class WeeklyTaskManager:
             
             print(f"💾 每周洞察已保存到: {file_path}")
             
+            # 通知已打开的Web页面
+            live_events.publish(live_events.WEEKLY_INSIGHT, {
+                "date": insight_data["date"],
+                "weekNumber": insight_data["week_number"],
+                "year": insight_data["year"],
+                "filename": filename
+            })
+            
         except Exception as e:
             print(f"❌ 保存每周洞察失败: {e}")
     
@@ -238,16 +212,33 @@ class WeeklyTaskManager:
         
         return possible_files
     
-    def load_daily_data(self, date, data_directory):
+    def load_daily_data(self, date, data_directory, settings=None):
         """加载指定日期的每日数据"""
         date_str = date.strftime('%Y-%m-%d')
-        settings = self.load_settings_from_xml()
+        if settings is None:
+            settings = self.load_settings_from_xml()
+        
+        # 非默认存储引擎直接从存储读取
+        engine = settings.get('storageEngine', record_store.DEFAULT_ENGINE)
+        if engine != record_store.DEFAULT_ENGINE:
+            store = record_store.get_store(
+                engine, data_directory, settings.get('fileNaming', '每日记录_{date}'))
+            record = store.load(date_str)
+            if record is not None:
+                print(f"✅ 找到数据记录: {store.location(date_str)}")
+                return record
+            return {}
         
         # 获取所有可能的文件名
         possible_files = self.get_possible_filenames(date_str, settings)
         
-        for filename in possible_files:
-            file_path = Path(data_directory) / filename
+        # 平铺布局和 YYYY/MM/ 分片布局都只打开该日期可能所在的文件
+        shard = history_index.shard_dir(date_str)
+        candidates = [Path(data_directory) / filename for filename in possible_files]
+        if shard:
+            candidates += [Path(data_directory) / shard / filename for filename in possible_files]
+        for file_path in candidates:
+            filename = file_path.relative_to(data_directory).as_posix()
             if file_path.exists():
                 try:
                     with open(file_path, 'r', encoding='utf-8') as f:
@@ -256,6 +247,18 @@ class WeeklyTaskManager:
                 except Exception as e:
                     print(f"⚠️ 读取文件 {filename} 失败: {e}")
                     continue
+        
+        # 已打包到月度归档的日期（通过 mmap 直接读取该天的记录）
+        store = record_store.get_store(
+            engine, data_directory, settings.get('fileNaming', '每日记录_{date}'))
+        try:
+            payload = store.archives.read(date_str)
+        except Exception as e:
+            print(f"⚠️ 读取月度归档失败: {e}")
+            payload = None
+        if payload is not None:
+            print(f"✅ 找到归档记录: {store.location(date_str)}")
+            return json.loads(payload.decode('utf-8'))
                     
         return {}
     
@@ -277,7 +280,7 @@ class WeeklyTaskManager:
         weekdays = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
         
         while current_date <= end_date:
-            daily_data = self.load_daily_data(current_date, data_directory)
+            daily_data = self.load_daily_data(current_date, data_directory, settings)
             daily_data['date'] = current_date.strftime('%Y-%m-%d')
             daily_data['weekday_cn'] = weekdays[current_date.weekday()]
             weekly_data.append(daily_data)
@@ -459,6 +462,8 @@ class WeeklyTaskManager:
     
     def setup_schedule(self):
         """设置定时任务计划"""
+        import schedule
+        
         # 清除现有计划
         schedule.clear()
         
@@ -470,6 +475,8 @@ class WeeklyTaskManager:
         
     def run_scheduler(self):
         """运行定时任务调度器"""
+        import schedule
+        
         print("🚀 每周总结定时任务调度器已启动...")
         self.running = True
         
@@ -508,6 +515,8 @@ class WeeklyTaskManager:
     
     def list_scheduled_jobs(self):
         """列出所有计划的任务"""
+        import schedule
+        
         print("📅 已计划的任务:")
         for job in schedule.jobs:
             print(f"   - {job}")
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QuirkLog WSGI 应用
+把全部请求处理（API路由、静态文件、CORS预检）封装为一个标准的 WSGI 可调用对象，
+可以运行在任何 WSGI 服务器下，例如:
+
+    gunicorn -w 4 -b 0.0.0.0:8000 wsgi_app:application
+    waitress-serve --port=8000 wsgi_app:application
+    uwsgi --http :8000 --wsgi-file wsgi_app.py
+
+内置的 web_server.SettingsHandler 也只是把标准库 http.server 的请求转换为
+WSGI 调用，两者共用同一个应用。
+
+注意: /api/events（SSE）是长连接，在同步工作进程的WSGI服务器下会一直占用一个工作进程，
+这类部署建议使用线程或协程工作进程（如 gunicorn --threads / gevent）。
+"""
+
+import http.client
+import mimetypes
+import os
+import posixpath
+import sys
+import time
+from email.utils import formatdate
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import quote
+
+import api_handlers
+import server_metrics
+import static_assets
+
+
+# 请求体大小上限（各路由的上限见 api_router）
+MAX_REQUEST_BODY = 32 * 1024 * 1024
+
+# 未进入内存缓存的大文件按块读取
+FILE_CHUNK_SIZE = 64 * 1024
+
+# 服务目录默认为本文件所在目录（index.html 所在位置）
+DEFAULT_DIRECTORY = Path(__file__).parent
+
+CORS_HEADERS = [
+    ('Access-Control-Allow-Origin', '*'),
+    ('Access-Control-Allow-Methods', 'POST, GET, OPTIONS'),
+    ('Access-Control-Allow-Headers', 'Content-Type'),
+]
+
+# 标准库网关通过该环境键传入AI连接测试函数（便于测试和基准测试替换）
+AI_TESTER_KEY = 'quirklog.ai_tester'
+
+
+def status_line(status):
+    status = HTTPStatus(status)
+    return f"{status.value} {status.phrase}"
+
+
+def request_headers(environ):
+    """由 WSGI 环境重建请求头（大小写不敏感，与 http.server 的 self.headers 相同）"""
+    headers = http.client.HTTPMessage()
+    for key, value in environ.items():
+        if key.startswith('HTTP_'):
+            headers[key[5:].replace('_', '-').title()] = value
+    for key, name in (('CONTENT_TYPE', 'Content-Type'), ('CONTENT_LENGTH', 'Content-Length')):
+        if environ.get(key):
+            headers[name] = environ[key]
+    return headers
+
+
+def request_path(environ):
+    """返回解码后的请求路径"""
+    return decode_path(environ.get('PATH_INFO') or '/')
+
+
+def decode_path(path):
+    """把以 latin-1 表示字节的路径（WSGI 的 PATH_INFO）按 UTF-8 解码，无效时原样返回"""
+    try:
+        return path.encode('latin-1').decode('utf-8')
+    except UnicodeError:
+        return path
+
+
+def translate_path(directory, url_path):
+    """把已解码的URL路径转换为服务目录中的文件路径（与 SimpleHTTPRequestHandler 相同的规则）"""
+    trailing_slash = url_path.rstrip().endswith('/')
+    url_path = posixpath.normpath(url_path)
+    path = os.fspath(directory)
+    for word in filter(None, url_path.split('/')):
+        if os.path.dirname(word) or word in (os.curdir, os.pardir):
+            continue
+        path = os.path.join(path, word)
+    if trailing_slash:
+        path += '/'
+    return path
+
+
+def guess_type(path):
+    return mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+
+class BadRequest(Exception):
+    """请求格式错误，直接回复状态码"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def read_body(environ):
+    """读取请求体，Content-Length 无效或超过上限时抛出 BadRequest"""
+    try:
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        raise BadRequest(400, "Invalid Content-Length")
+    if length > MAX_REQUEST_BODY:
+        raise BadRequest(413, "Request Entity Too Large")
+    return environ['wsgi.input'].read(length) if length > 0 else b''
+
+
+class MeteredBody:
+    """包装响应体，迭代结束（close）时记录请求指标"""
+
+    def __init__(self, chunks, observe):
+        self._chunks = chunks
+        self._observe = observe
+        self.bytes_written = 0
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            self.bytes_written += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            close = getattr(self._chunks, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self._observe(self.bytes_written)
+
+
+class QuirkLogApp:
+    """QuirkLog 的 WSGI 应用
+
+    Args:
+        directory: 静态文件的服务目录，默认为本文件所在目录
+        ai_tester: AI连接测试函数，None 时使用 api_handlers 的默认实现
+        record_metrics: 是否由应用记录请求指标（响应字节数只含响应体）；
+            标准库网关自己在连接上统计（含响应头），创建应用时关闭
+    """
+
+    def __init__(self, directory=None, ai_tester=None, record_metrics=True):
+        self.directory = os.fspath(directory or DEFAULT_DIRECTORY)
+        self.ai_tester = ai_tester
+        self.record_metrics = record_metrics
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        method = environ.get('REQUEST_METHOD', 'GET').upper()
+        path = request_path(environ)
+        body = b''
+        try:
+            body = read_body(environ)
+            status, headers, chunks = self.handle(environ, method, path, body)
+        except BadRequest as e:
+            status, headers, chunks = self.error(e.status, str(e))
+        except Exception as e:
+            # 处理过程中的意外错误也回复500，而不是交给WSGI服务器断开连接
+            print(f"❌ 处理请求失败 {method} {path}: {e}")
+            status, headers, chunks = self.error(500, "Internal Server Error")
+        if method == 'HEAD':
+            chunks = []
+
+        start_response(status_line(status), headers)
+        if not (self.record_metrics and server_metrics.metrics.enabled):
+            return chunks
+
+        def observe(bytes_out):
+            server_metrics.metrics.observe(
+                method, api_handlers.route_label(path), status,
+                time.perf_counter() - started, len(body), bytes_out)
+        return MeteredBody(chunks, observe)
+
+    # ---- 请求处理 ----
+
+    def handle(self, environ, method, path, body):
+        """处理一个请求，返回 (状态码, 响应头列表, 响应体可迭代对象)"""
+        if method == 'OPTIONS':
+            return 200, CORS_HEADERS + [('Content-Length', '0')], []
+
+        headers = request_headers(environ)
+        if api_handlers.is_api_path(path) and method in ('GET', 'POST'):
+            response = api_handlers.dispatch(
+                method, path, environ.get('QUERY_STRING', ''), body,
+                ai_tester=environ.get(AI_TESTER_KEY) or self.ai_tester, headers=headers)
+            if response is not None:
+                return self.api_response(response)
+
+        if method in ('GET', 'HEAD'):
+            return self.serve_static(path, headers, send_body=method == 'GET')
+        if method == 'POST':
+            return self.error(404, "Not Found")
+        return self.error(501, f"Unsupported method ({method})")
+
+    @staticmethod
+    def api_response(response):
+        """把 ApiResponse 转换为 WSGI 响应（流式响应不带 Content-Length，由服务器分块发送）"""
+        headers = [('Content-Type', response.content_type),
+                   ('Access-Control-Allow-Origin', '*'),
+                   *response.headers]
+        if response.is_stream:
+            if response.filename:
+                headers.append(('Content-Disposition',
+                                f'attachment; filename="{response.filename}"'))
+            return 200, headers, response.stream
+        body = response.body()
+        headers.append(('Content-Length', str(len(body))))
+        return response.status, headers, [body]
+
+    @staticmethod
+    def error(status, message):
+        body = f"<html><body><h1>{int(status)} {message}</h1></body></html>".encode('utf-8')
+        return status, [('Content-Type', 'text/html; charset=utf-8'),
+                        ('Content-Length', str(len(body)))], [body]
+
+    # ---- 静态文件 ----
+
+    def serve_static(self, url_path, headers, send_body=True):
+        """提供静态文件：可缓存的文件走内存缓存、ETag校验和压缩协商，大文件按块读取"""
+        path = translate_path(self.directory, url_path)
+        if os.path.isdir(path):
+            if not url_path.endswith('/'):
+                return 301, [('Location', quote(url_path) + '/'), ('Content-Length', '0')], []
+            path = os.path.join(path, 'index.html')
+
+        # 存在有效的前端构建时，页面和带指纹的资源从构建目录提供
+        path, cache_control = static_assets.locate(self.directory, path)
+        if not os.path.isfile(path):
+            return self.error(404, "File not found")
+
+        asset = static_assets.asset_cache.get(path, guess_type(path))
+        if asset is None:
+            return self.send_file(path, send_body)
+
+        encoding = static_assets.choose_encoding(headers.get('Accept-Encoding'), asset)
+        etag = asset.etag(encoding)
+        common = [('ETag', etag), ('Cache-Control', cache_control), ('Vary', 'Accept-Encoding')]
+        if static_assets.is_not_modified(headers, asset, etag):
+            return 304, common, []
+
+        content = asset.variant(encoding) if encoding else asset.body
+        response_headers = [('Content-Type', asset.content_type),
+                            ('Content-Length', str(len(content))),
+                            ('Last-Modified', asset.last_modified)] + common
+        if encoding:
+            response_headers.append(('Content-Encoding', encoding))
+        return 200, response_headers, [content] if send_body else []
+
+    @staticmethod
+    def send_file(path, send_body=True):
+        """按块读取未进入内存缓存的大文件（迭代响应体时才打开文件）"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return QuirkLogApp.error(404, "File not found")
+        headers = [('Content-Type', guess_type(path)),
+                   ('Content-Length', str(stat.st_size)),
+                   ('Last-Modified', formatdate(stat.st_mtime, usegmt=True))]
+        if not send_body:
+            return 200, headers, []
+
+        def chunks():
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(FILE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        return 200, headers, chunks()
+
+
+# 供 WSGI 服务器加载的默认应用（gunicorn wsgi_app:application）
+application = QuirkLogApp()
+
+
+if __name__ == "__main__":
+    # 不依赖第三方服务器的快速试用（单线程、HTTP/1.0），正式部署请使用 WSGI 服务器
+    from wsgiref.simple_server import make_server
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    with make_server('', port, application) as httpd:
+        print(f"🌐 QuirkLog WSGI 应用: http://localhost:{port}")
+        httpd.serve_forever()